@@ -0,0 +1,324 @@
+# Save as: src/analysis/task2_embeddings.py
+"""
+Task 2: Review Embeddings and Similarity Search
+Batch-encodes reviews into dense vectors cached on disk and builds an
+IVF approximate-nearest-neighbour index for clustering and "find similar" queries
+"""
+
+import os
+import json
+import time
+import numpy as np
+import pandas as pd
+import warnings
+warnings.filterwarnings('ignore')
+
+from task2_themes import load_sentiment_data, preprocess_text
+from task2_topics import dataset_fingerprint
+
+EMBEDDING_CACHE_DIR = '../../data/embeddings'
+SENTIMENT_MODEL = 'distilbert-base-uncased-finetuned-sst-2-english'
+CLUSTER_COLUMNS = ['cluster', 'size', 'top_bank', 'avg_rating', 'examples']
+
+class ReviewEncoder:
+    """
+    Encode reviews into L2-normalised vectors.
+    'distilbert' mean-pools the sentiment model's encoder on CPU;
+    'hashing' is a dependency-light fallback (char n-gram hashing + random projection).
+    """
+
+    def __init__(self, backend='distilbert', model_name=SENTIMENT_MODEL, batch_size=64, dim=256):
+        self.backend = backend
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.dim = dim
+        self._tokenizer = None
+        self._model = None
+        self._hasher = None
+        self._projection = None
+
+        if backend == 'distilbert':
+            try:
+                from transformers import AutoTokenizer, AutoModel
+                self._tokenizer = AutoTokenizer.from_pretrained(model_name)
+                self._model = AutoModel.from_pretrained(model_name)
+                self._model.eval()
+                self.dim = self._model.config.hidden_size
+                print(f"✅ Loaded encoder: {model_name}")
+            except Exception as e:
+                print(f"❌ Error loading encoder: {e}")
+                print("Falling back to hashing encoder...")
+                self.backend = 'hashing'
+
+        if self.backend == 'hashing':
+            from sklearn.feature_extraction.text import HashingVectorizer
+            from sklearn.random_projection import SparseRandomProjection
+            self._hasher = HashingVectorizer(
+                analyzer='char_wb', ngram_range=(3, 4),
+                n_features=2**18, alternate_sign=False, norm='l2'
+            )
+            # Fitting only fixes the random matrix for the input width
+            self._projection = SparseRandomProjection(n_components=self.dim, random_state=42)
+            self._projection.fit(self._hasher.transform(['']))
+
+    @property
+    def name(self):
+        return self.model_name if self.backend == 'distilbert' else f"hashing-{self.dim}"
+
+    def encode(self, texts):
+        """Encode one batch of texts to a float32 matrix"""
+        if self.backend == 'distilbert':
+            import torch
+            inputs = self._tokenizer(
+                [str(t) for t in texts], padding=True, truncation=True,
+                max_length=128, return_tensors='pt'
+            )
+            with torch.no_grad():
+                hidden = self._model(**inputs).last_hidden_state
+            # Mean-pool over real tokens only
+            mask = inputs['attention_mask'].unsqueeze(-1).float()
+            vectors = ((hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)).numpy()
+        else:
+            processed = [preprocess_text(t) for t in texts]
+            vectors = self._projection.transform(self._hasher.transform(processed))
+            vectors = np.asarray(vectors.todense() if hasattr(vectors, 'todense') else vectors)
+
+        return _normalize(vectors.astype(np.float32))
+
+def _normalize(vectors):
+    """L2-normalise rows so dot product equals cosine similarity"""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def embedding_fingerprint(texts, encoder):
+    """Cache key of the embeddings of `texts` (and of the index built over them)"""
+    return dataset_fingerprint(texts, encoder=encoder.name)
+
+def embed_reviews(texts, encoder, cache_dir=EMBEDDING_CACHE_DIR, checkpoint_every=50):
+    """
+    Embed reviews into a memory-mapped float32 array cached by dataset fingerprint.
+    Interrupted runs resume from the last checkpointed row.
+    """
+    texts = list(texts)
+    if not texts:
+        return np.empty((0, encoder.dim), dtype=np.float32)
+    fingerprint = embedding_fingerprint(texts, encoder)
+    os.makedirs(cache_dir, exist_ok=True)
+    vectors_path = os.path.join(cache_dir, f"{fingerprint}.f32")
+    meta_path = os.path.join(cache_dir, f"{fingerprint}.json")
+
+    meta = {'rows': len(texts), 'dim': encoder.dim, 'encoder': encoder.name, 'rows_done': 0}
+    if os.path.exists(meta_path) and os.path.exists(vectors_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta['rows_done'] >= meta['rows']:
+            print(f"♻️  Using cached embeddings ({fingerprint}, {meta['rows']} x {meta['dim']})")
+            return np.memmap(vectors_path, dtype=np.float32, mode='r', shape=(meta['rows'], meta['dim']))
+        mode = 'r+'
+    else:
+        mode = 'w+'
+
+    vectors = np.memmap(vectors_path, dtype=np.float32, mode=mode, shape=(meta['rows'], meta['dim']))
+    start_row = meta['rows_done']
+    print(f"\n🔢 Embedding {len(texts) - start_row} reviews with {encoder.name}...")
+    started = time.time()
+
+    batch_size = encoder.batch_size
+    for batch_num, i in enumerate(range(start_row, len(texts), batch_size), 1):
+        vectors[i:i + batch_size] = encoder.encode(texts[i:i + batch_size])
+
+        if batch_num % checkpoint_every == 0:
+            vectors.flush()
+            meta['rows_done'] = min(i + batch_size, len(texts))
+            with open(meta_path, 'w') as f:
+                json.dump(meta, f)
+            print(f"  Embedded {meta['rows_done']}/{len(texts)} reviews...")
+
+    vectors.flush()
+    meta['rows_done'] = len(texts)
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+
+    print(f"✅ Embeddings cached to: {vectors_path} ({time.time() - started:.1f}s)")
+    return np.memmap(vectors_path, dtype=np.float32, mode='r', shape=(meta['rows'], meta['dim']))
+
+class IVFIndex:
+    """
+    Inverted-file ANN index over L2-normalised vectors.
+    Vectors are bucketed by their nearest k-means centroid; a query only scans
+    the `nprobe` closest buckets. The buckets double as review clusters.
+    """
+
+    def __init__(self, n_lists=None, nprobe=8, train_size=100000, random_state=42):
+        self.n_lists = n_lists
+        self.nprobe = nprobe
+        self.train_size = train_size
+        self.random_state = random_state
+        self.centroids = None
+        self.order = None      # row ids sorted by list
+        self.offsets = None    # start of each list within `order`
+        self.labels = None     # list (cluster) id per row
+        self.vectors = None
+
+    def build(self, vectors, chunk_size=100000):
+        """Train centroids on a sample and assign every vector to a list"""
+        from sklearn.cluster import MiniBatchKMeans
+
+        n_rows = vectors.shape[0]
+        n_lists = self.n_lists or max(1, min(4096, int(4 * np.sqrt(n_rows))))
+        n_lists = min(n_lists, n_rows)
+        print(f"\n🗂️  Building IVF index: {n_rows} vectors, {n_lists} lists...")
+
+        rng = np.random.default_rng(self.random_state)
+        sample_idx = np.sort(rng.choice(n_rows, size=min(self.train_size, n_rows), replace=False))
+        kmeans = MiniBatchKMeans(
+            n_clusters=n_lists, batch_size=4096, n_init=3, random_state=self.random_state
+        )
+        kmeans.fit(np.asarray(vectors[sample_idx]))
+        self.centroids = _normalize(kmeans.cluster_centers_.astype(np.float32))
+
+        # Assign in chunks so memory-mapped inputs never load fully into RAM
+        labels = np.empty(n_rows, dtype=np.int32)
+        for i in range(0, n_rows, chunk_size):
+            labels[i:i + chunk_size] = (np.asarray(vectors[i:i + chunk_size]) @ self.centroids.T).argmax(axis=1)
+
+        self.labels = labels
+        self.order = np.argsort(labels, kind='stable').astype(np.int64)
+        self.offsets = np.searchsorted(labels[self.order], np.arange(n_lists + 1))
+        self.vectors = vectors
+        self.n_lists = n_lists
+        print(f"✅ Index built (avg {n_rows / n_lists:.0f} vectors per list)")
+        return self
+
+    def search(self, queries, k=10, nprobe=None):
+        """Return (similarities, row ids) of the k nearest rows for each query"""
+        queries = _normalize(np.atleast_2d(np.asarray(queries, dtype=np.float32)))
+        nprobe = min(nprobe or self.nprobe, self.n_lists)
+
+        probe_lists = np.argsort(queries @ self.centroids.T, axis=1)[:, ::-1][:, :nprobe]
+
+        all_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        all_ids = np.full((len(queries), k), -1, dtype=np.int64)
+        for q, lists in enumerate(probe_lists):
+            candidates = np.concatenate([
+                self.order[self.offsets[l]:self.offsets[l + 1]] for l in lists
+            ])
+            if len(candidates) == 0:
+                continue
+            candidates.sort()  # sequential reads on memory-mapped vectors
+            scores = np.asarray(self.vectors[candidates]) @ queries[q]
+            top = min(k, len(candidates))
+            best = np.argpartition(-scores, top - 1)[:top]
+            best = best[np.argsort(-scores[best])]
+            all_scores[q, :top] = scores[best]
+            all_ids[q, :top] = candidates[best]
+
+        return all_scores, all_ids
+
+    def cluster_members(self, cluster_id):
+        """Row ids belonging to one cluster"""
+        return self.order[self.offsets[cluster_id]:self.offsets[cluster_id + 1]]
+
+    def save(self, path):
+        """Persist centroids and inverted lists (vectors stay in their memmap)"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez(path, centroids=self.centroids, order=self.order,
+                 offsets=self.offsets, labels=self.labels, nprobe=self.nprobe)
+        return path
+
+    @classmethod
+    def load(cls, path, vectors):
+        """Load an index saved with save() over the given vectors"""
+        data = np.load(path)
+        index = cls(n_lists=len(data['centroids']), nprobe=int(data['nprobe']))
+        index.centroids = data['centroids']
+        index.order = data['order']
+        index.offsets = data['offsets']
+        index.labels = data['labels']
+        index.vectors = vectors
+        return index
+
+def get_ivf_index(vectors, fingerprint, cache_dir=EMBEDDING_CACHE_DIR, **kwargs):
+    """
+    Load the cached IVF index for these embeddings and index parameters
+    (IVFIndex keyword arguments) or build and cache a new one
+    """
+    index = IVFIndex(**kwargs)
+    key = dataset_fingerprint([], embeddings=fingerprint, n_lists=index.n_lists, nprobe=index.nprobe,
+                              train_size=index.train_size, random_state=index.random_state)
+    path = os.path.join(cache_dir, f"{fingerprint}_{key}.ivf.npz")
+    if os.path.exists(path):
+        print(f"♻️  Using cached IVF index ({fingerprint}_{key})")
+        return IVFIndex.load(path, vectors)
+
+    index.build(vectors)
+    index.save(path)
+    return index
+
+def summarize_clusters(df, index, n_examples=3, min_size=5):
+    """Cluster sizes with the reviews closest to each centroid"""
+    rows = []
+    for cluster_id in range(index.n_lists):
+        members = np.sort(index.cluster_members(cluster_id))
+        if len(members) < min_size:
+            continue
+        scores = np.asarray(index.vectors[members]) @ index.centroids[cluster_id]
+        closest = members[np.argsort(-scores)[:n_examples]]
+        cluster_df = df.iloc[members]
+        rows.append({
+            'cluster': cluster_id,
+            'size': len(members),
+            'top_bank': cluster_df['bank'].mode().iloc[0],
+            'avg_rating': round(cluster_df['rating'].mean(), 2),
+            'examples': ' | '.join(str(df.iloc[i]['review'])[:60] for i in closest)
+        })
+
+    # Columns given explicitly: no cluster may reach min_size
+    return pd.DataFrame(rows, columns=CLUSTER_COLUMNS).sort_values('size', ascending=False)
+
+def find_similar_reviews(df, index, encoder, query, k=10, nprobe=None):
+    """Find reviews most similar to a query text"""
+    scores, ids = index.search(encoder.encode([query]), k=k, nprobe=nprobe)
+    valid = ids[0] >= 0
+    result = df.iloc[ids[0][valid]][['bank', 'review', 'rating']].copy()
+    result['similarity'] = scores[0][valid].round(4)
+    return result
+
+def main():
+    """Main function for Task 2 Review Embeddings"""
+    print("="*60)
+    print("TASK 2: REVIEW EMBEDDINGS & SIMILARITY SEARCH")
+    print("="*60)
+
+    df = load_sentiment_data()
+
+    if df is None:
+        print("❌ Cannot proceed without sentiment data")
+        return
+
+    if df.empty:
+        print("❌ No reviews to embed")
+        return
+
+    texts = df['review'].astype(str).tolist()
+    encoder = ReviewEncoder()
+    vectors = embed_reviews(texts, encoder)
+    index = get_ivf_index(vectors, embedding_fingerprint(texts, encoder))
+
+    clusters = summarize_clusters(df, index)
+    clusters_path = '../../data/outputs/review_clusters.csv'
+    os.makedirs(os.path.dirname(clusters_path), exist_ok=True)
+    clusters.to_csv(clusters_path, index=False)
+    print(f"✅ Cluster summary saved to: {clusters_path}")
+
+    print("\n🔍 Reviews similar to \"transfer stuck\":")
+    started = time.time()
+    similar = find_similar_reviews(df, index, encoder, "transfer stuck", k=5)
+    elapsed_ms = (time.time() - started) * 1000
+    for _, row in similar.iterrows():
+        print(f"  [{row['similarity']:.3f}] {row['bank']}: \"{str(row['review'])[:80]}\"")
+    print(f"  Query time: {elapsed_ms:.1f} ms")
+
+if __name__ == "__main__":
+    main()
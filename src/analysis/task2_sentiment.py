@@ -4,13 +4,18 @@ Task 2: Sentiment Analysis
 Uses distilbert-base-uncased-finetuned-sst-2-english for sentiment analysis
 """
 
+import os
+import sys
+import hashlib
 import pandas as pd
 import numpy as np
-from transformers import pipeline
 from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'monitoring'))
+import pipeline_metrics as metrics
+
 def load_data():
     """Load the cleaned reviews from Task 1"""
     try:
@@ -41,41 +46,10 @@ def load_data():
 
 def create_sample_data():
     """Create sample data if real data isn't found"""
-    data = []
-    banks = ['Commercial Bank of Ethiopia', 'Bank of Abyssinia', 'Dashen Bank']
-    
-    # Sample reviews covering different scenarios
-    sample_reviews = [
-        ("Great app! Fast and reliable transfers.", 5, "Commercial Bank of Ethiopia"),
-        ("App crashes during login. Very frustrating.", 1, "Bank of Abyssinia"),
-        ("UI is clean but transfers are slow.", 3, "Dashen Bank"),
-        ("Customer support is excellent.", 4, "Commercial Bank of Ethiopia"),
-        ("Can't update my profile information.", 2, "Bank of Abyssinia"),
-        ("Love the fingerprint login feature.", 5, "Dashen Bank"),
-        ("Transfers fail randomly. Needs fixing.", 1, "Commercial Bank of Ethiopia"),
-        ("Average app, could be better.", 3, "Bank of Abyssinia"),
-        ("Best banking app in Ethiopia!", 5, "Dashen Bank"),
-        ("Login errors are too frequent.", 2, "Commercial Bank of Ethiopia"),
-        ("App is slow during peak hours.", 2, "Bank of Abyssinia"),
-        ("Very user-friendly interface.", 4, "Dashen Bank"),
-        ("Money transfer takes too long.", 2, "Commercial Bank of Ethiopia"),
-        ("Good app but needs dark mode.", 4, "Bank of Abyssinia"),
-        ("Transactions are secure and fast.", 5, "Dashen Bank"),
-    ]
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scraping'))
+    from synthetic_reviews import generate_reviews
     
-    # Expand sample data to 1200 reviews
-    for i in range(80):  # 80 * 15 = 1200
-        for review_text, rating, bank in sample_reviews:
-            data.append({
-                'review': f"{review_text} User ID: {i}",
-                'rating': rating,
-                'date': f"2024-{np.random.randint(1, 12):02d}-{np.random.randint(1, 28):02d}",
-                'bank': bank,
-                'source': 'Google Play Store',
-                'review_id': f"{bank[:3].lower()}_{i}_{hash(review_text)}"
-            })
-    
-    df = pd.DataFrame(data)
+    df = generate_reviews(1200, banks=3, seed=42)
     print(f"Created sample data with {len(df)} reviews")
     return df
 
@@ -88,12 +62,14 @@ def analyze_sentiment_distilbert(df):
     
     # Initialize the sentiment analysis pipeline
     try:
-        sentiment_pipeline = pipeline(
-            "sentiment-analysis",
-            model="distilbert-base-uncased-finetuned-sst-2-english",
-            truncation=True,
-            max_length=512
-        )
+        from transformers import pipeline
+        with metrics.timer('sentiment_model_load', model='distilbert'):
+            sentiment_pipeline = pipeline(
+                "sentiment-analysis",
+                model="distilbert-base-uncased-finetuned-sst-2-english",
+                truncation=True,
+                max_length=512
+            )
         print("✅ DistilBERT model loaded successfully")
     except Exception as e:
         print(f"❌ Error loading DistilBERT: {e}")
@@ -103,42 +79,51 @@ def analyze_sentiment_distilbert(df):
     sentiments = []
     scores = []
     
-    # Process reviews in batches
+    # Score each distinct text once; repeated short reviews ("Good", "Nice app")
+    # share the result
+    codes, texts = pd.factorize(df['review'].astype(str))
+    print(f"  {len(texts)} distinct texts in {len(df)} reviews")
+    metrics.gauge('sentiment_distinct_texts', len(texts), model='distilbert')
+    
+    # Process texts in batches
     batch_size = 100
-    total_batches = (len(df) // batch_size) + 1
+    total_batches = (len(texts) // batch_size) + 1
     
-    for i in range(0, len(df), batch_size):
-        batch = df['review'].iloc[i:i+batch_size].tolist()
-        batch_num = (i // batch_size) + 1
+    with metrics.timer('sentiment', rows=len(df), model='distilbert'):
+        for i in range(0, len(texts), batch_size):
+            batch = texts[i:i+batch_size].tolist()
+            batch_num = (i // batch_size) + 1
         
-        print(f"  Processing batch {batch_num}/{total_batches}...")
+            print(f"  Processing batch {batch_num}/{total_batches}...")
         
-        try:
-            # Get sentiment predictions
-            results = sentiment_pipeline(batch)
+            try:
+                # Get sentiment predictions
+                with metrics.timer('sentiment_batch', rows=len(batch), model='distilbert'):
+                    results = sentiment_pipeline(batch)
             
-            for result in results:
-                label = result['label']
-                score = result['score']
+                for result in results:
+                    label = result['label']
+                    score = result['score']
                 
-                # Map to our labels
-                if label == 'POSITIVE':
-                    sentiments.append('positive')
-                    scores.append(score)
-                else:  # 'NEGATIVE'
-                    sentiments.append('negative')
-                    scores.append(score)
+                    # Map to our labels
+                    if label == 'POSITIVE':
+                        sentiments.append('positive')
+                        scores.append(score)
+                    else:  # 'NEGATIVE'
+                        sentiments.append('negative')
+                        scores.append(score)
                     
-        except Exception as e:
-            print(f"    Error in batch {batch_num}: {e}")
-            # Fill with neutral as fallback
-            for _ in batch:
-                sentiments.append('neutral')
-                scores.append(0.5)
+            except Exception as e:
+                print(f"    Error in batch {batch_num}: {e}")
+                metrics.count('sentiment_batch_errors', model='distilbert')
+                # Fill with neutral as fallback
+                for _ in batch:
+                    sentiments.append('neutral')
+                    scores.append(0.5)
     
     # Add to DataFrame
-    df['sentiment_label'] = sentiments
-    df['sentiment_score'] = scores
+    df['sentiment_label'] = np.asarray(sentiments, dtype=object)[codes]
+    df['sentiment_score'] = np.asarray(scores, dtype=float)[codes]
     
     # Convert binary sentiment to ternary (positive/neutral/negative)
     # Based on score thresholds
@@ -165,27 +150,33 @@ def analyze_sentiment_textblob(df):
     sentiments = []
     scores = []
     
-    for review in df['review']:
-        try:
-            blob = TextBlob(str(review))
-            polarity = blob.sentiment.polarity
-            
-            # Map polarity to sentiment
-            if polarity > 0.1:
-                sentiments.append('positive')
-                scores.append(polarity)
-            elif polarity < -0.1:
-                sentiments.append('negative')
-                scores.append(abs(polarity))
-            else:
+    # Score each distinct text once
+    codes, texts = pd.factorize(df['review'].astype(str))
+    metrics.gauge('sentiment_distinct_texts', len(texts), model='textblob')
+    
+    with metrics.timer('sentiment', rows=len(df), model='textblob'):
+        for review in texts:
+            try:
+                blob = TextBlob(str(review))
+                polarity = blob.sentiment.polarity
+                
+                # Map polarity to sentiment
+                if polarity > 0.1:
+                    sentiments.append('positive')
+                    scores.append(polarity)
+                elif polarity < -0.1:
+                    sentiments.append('negative')
+                    scores.append(abs(polarity))
+                else:
+                    sentiments.append('neutral')
+                    scores.append(0)
+            except:
                 sentiments.append('neutral')
                 scores.append(0)
-        except:
-            sentiments.append('neutral')
-            scores.append(0)
     
+    sentiments = np.asarray(sentiments, dtype=object)[codes]
     df['sentiment_label'] = sentiments
-    df['sentiment_score'] = scores
+    df['sentiment_score'] = np.asarray(scores, dtype=float)[codes]
     df['sentiment_ternary'] = sentiments  # TextBlob already gives ternary
     
     return df
@@ -274,9 +265,14 @@ def main():
     # Load data
     df = load_data()
     
-    # Add review_id if not present
+    # Add a stable content-derived review_id where the Play Store ID is missing
     if 'review_id' not in df.columns:
-        df['review_id'] = [f"rev_{i}" for i in range(len(df))]
+        df['review_id'] = ''
+    missing_id = df['review_id'].isna() | (df['review_id'].astype(str).str.strip() == '')
+    df.loc[missing_id, 'review_id'] = [
+        'sha1:' + hashlib.sha1(f"{bank}|{date}|{review}".encode('utf-8')).hexdigest()
+        for bank, date, review in zip(df.loc[missing_id, 'bank'], df.loc[missing_id, 'date'], df.loc[missing_id, 'review'])
+    ]
     
     # Perform sentiment analysis
     df = analyze_sentiment_distilbert(df)
@@ -4,15 +4,55 @@ Task 2: Thematic Analysis
 Extract keywords and identify themes from reviews
 """
 
+import os
+import json
+import hashlib
 import pandas as pd
 import numpy as np
 import re
 from collections import Counter
-import spacy
-from sklearn.feature_extraction.text import TfidfVectorizer
+import sys
+from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'monitoring'))
+import pipeline_metrics as metrics
+
+THEME_CACHE_DIR = '../../data/cache/themes'
+
+# Theme mapping based on common banking app categories
+THEME_KEYWORDS = {
+    'Login & Security Issues': [
+        'login', 'password', 'security', 'authentication', 'fingerprint',
+        'biometric', 'access', 'account', 'secure', 'verification'
+    ],
+    'Transaction Problems': [
+        'transfer', 'transaction', 'payment', 'send', 'receive',
+        'money', 'cash', 'failed', 'pending', 'slow', 'fast'
+    ],
+    'App Performance & Bugs': [
+        'crash', 'bug', 'error', 'freeze', 'lag', 'slow',
+        'performance', 'loading', 'responsive', 'stable'
+    ],
+    'User Interface & Experience': [
+        'interface', 'design', 'ui', 'ux', 'navigation', 'menu',
+        'button', 'screen', 'layout', 'color', 'theme', 'dark'
+    ],
+    'Customer Support': [
+        'support', 'help', 'service', 'response', 'contact',
+        'assistance', 'complaint', 'issue', 'problem'
+    ],
+    'Feature Requests': [
+        'feature', 'request', 'need', 'want', 'should',
+        'add', 'include', 'missing', 'option', 'tool'
+    ],
+    'Account Management': [
+        'balance', 'statement', 'history', 'profile', 'update',
+        'information', 'details', 'personal', 'data'
+    ]
+}
+
 def load_sentiment_data():
     """Load data with sentiment analysis"""
     try:
@@ -46,24 +86,27 @@ def extract_keywords_tfidf(df, n_keywords=20):
     """Extract keywords using TF-IDF"""
     print("\n🔍 Extracting keywords using TF-IDF...")
     
-    # Preprocess all reviews
-    processed_reviews = df['review'].apply(preprocess_text)
-    
-    # Initialize TF-IDF Vectorizer
-    vectorizer = TfidfVectorizer(
-        max_features=100,
-        stop_words='english',
-        ngram_range=(1, 2)  # Single words and bi-grams
-    )
-    
-    # Fit and transform
-    tfidf_matrix = vectorizer.fit_transform(processed_reviews)
+    from sklearn.feature_extraction.text import TfidfVectorizer
     
-    # Get feature names (words)
-    feature_names = vectorizer.get_feature_names_out()
-    
-    # Get TF-IDF scores
-    tfidf_scores = np.asarray(tfidf_matrix.sum(axis=0)).flatten()
+    with metrics.timer('tfidf', rows=len(df)):
+        # Preprocess all reviews
+        processed_reviews = df['review'].apply(preprocess_text)
+        
+        # Initialize TF-IDF Vectorizer
+        vectorizer = TfidfVectorizer(
+            max_features=100,
+            stop_words='english',
+            ngram_range=(1, 2)  # Single words and bi-grams
+        )
+        
+        # Fit and transform
+        tfidf_matrix = vectorizer.fit_transform(processed_reviews)
+        
+        # Get feature names (words)
+        feature_names = vectorizer.get_feature_names_out()
+        
+        # Get TF-IDF scores
+        tfidf_scores = np.asarray(tfidf_matrix.sum(axis=0)).flatten()
     
     # Create DataFrame of keywords and scores
     keywords_df = pd.DataFrame({
@@ -78,6 +121,8 @@ def extract_keywords_spacy(df, n_keywords=30):
     """Extract keywords using spaCy"""
     print("🔍 Extracting keywords using spaCy...")
     
+    import spacy
+    
     try:
         # Load spaCy model
         nlp = spacy.load('en_core_web_sm')
@@ -121,41 +166,9 @@ def identify_themes(keywords_df, bank_name):
     Based on banking app common issues and scenarios
     """
     
-    # Define theme mapping based on common banking app categories
-    theme_keywords = {
-        'Login & Security Issues': [
-            'login', 'password', 'security', 'authentication', 'fingerprint',
-            'biometric', 'access', 'account', 'secure', 'verification'
-        ],
-        'Transaction Problems': [
-            'transfer', 'transaction', 'payment', 'send', 'receive',
-            'money', 'cash', 'failed', 'pending', 'slow', 'fast'
-        ],
-        'App Performance & Bugs': [
-            'crash', 'bug', 'error', 'freeze', 'lag', 'slow',
-            'performance', 'loading', 'responsive', 'stable'
-        ],
-        'User Interface & Experience': [
-            'interface', 'design', 'ui', 'ux', 'navigation', 'menu',
-            'button', 'screen', 'layout', 'color', 'theme', 'dark'
-        ],
-        'Customer Support': [
-            'support', 'help', 'service', 'response', 'contact',
-            'assistance', 'complaint', 'issue', 'problem'
-        ],
-        'Feature Requests': [
-            'feature', 'request', 'need', 'want', 'should',
-            'add', 'include', 'missing', 'option', 'tool'
-        ],
-        'Account Management': [
-            'balance', 'statement', 'history', 'profile', 'update',
-            'information', 'details', 'personal', 'data'
-        ]
-    }
-    
     # Map keywords to themes
     keyword_to_theme = {}
-    for theme, words in theme_keywords.items():
+    for theme, words in THEME_KEYWORDS.items():
         for word in words:
             keyword_to_theme[word] = theme
     
@@ -187,31 +200,135 @@ def identify_themes(keywords_df, bank_name):
     
     return keywords_df, theme_counts
 
-def analyze_by_bank(df):
-    """Perform thematic analysis for each bank"""
+def assign_review_themes(df):
+    """
+    Assign themes to individual reviews by keyword presence.
+    Returns one row per (review, theme) with the theme's share of the
+    review's keyword hits as its score; reviews with no hits get 'Other'.
+    """
+    # Match each distinct text once and spread the counts back to its reviews
+    codes, texts = pd.factorize(df['review'].astype(str))
+    processed = pd.Series(texts).apply(preprocess_text)
+
+    # Count keyword hits per theme (prefix match so 'transfers' counts as 'transfer')
+    text_hits = pd.DataFrame({
+        theme: processed.str.count(r'\b(?:' + '|'.join(words) + r')\w*')
+        for theme, words in THEME_KEYWORDS.items()
+    })
+    hits = text_hits.iloc[codes].set_index(df.index)
+    hits['Other'] = (hits.sum(axis=1) == 0).astype(int)
+
+    review_themes = hits.stack().rename('hits').reset_index()
+    review_themes.columns = ['row', 'theme', 'hits']
+    review_themes = review_themes[review_themes['hits'] > 0]
+
+    totals = review_themes.groupby('row')['hits'].transform('sum')
+    review_themes['score'] = (review_themes['hits'] / totals).round(4)
+
+    return review_themes[['row', 'theme', 'score']].reset_index(drop=True)
+
+def partition_fingerprint(bank_df):
+    """Fingerprint one bank's input partition together with the theme configuration"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(THEME_KEYWORDS, sort_keys=True).encode('utf-8'))
+    columns = [c for c in ['review', 'rating', 'sentiment_ternary'] if c in bank_df.columns]
+    digest.update(pd.util.hash_pandas_object(bank_df[columns], index=False).values.tobytes())
+    return digest.hexdigest()[:16]
+
+def _partition_cache_path(bank, fingerprint, cache_dir=THEME_CACHE_DIR):
+    """Cache file for one bank partition"""
+    safe_bank = ''.join(c if c.isalnum() else '_' for c in bank).strip('_').lower()
+    return os.path.join(cache_dir, f"{safe_bank}_{fingerprint}.pkl")
+
+def load_cached_partition(bank, fingerprint, cache_dir=THEME_CACHE_DIR):
+    """Load cached thematic results for a bank partition, if present"""
+    path = _partition_cache_path(bank, fingerprint, cache_dir)
+    if os.path.exists(path):
+        return pd.read_pickle(path)
+    return None
+
+def save_cached_partition(bank, fingerprint, data, cache_dir=THEME_CACHE_DIR):
+    """Cache thematic results for a bank partition and drop its stale entries"""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _partition_cache_path(bank, fingerprint, cache_dir)
+    stale = re.compile(re.escape(os.path.basename(path)[:-len('_.pkl') - len(fingerprint)]) + r'_[0-9a-f]{16}\.pkl$')
+    for name in os.listdir(cache_dir):
+        if stale.match(name):
+            os.remove(os.path.join(cache_dir, name))
+    pd.to_pickle(data, path)
+    return path
+
+def bank_insights(bank, theme_counts):
+    """Scenario-based insights for one bank from its top themes"""
+    insights = []
+    themes_list = theme_counts.head(3).index.tolist()
+    
+    if 'Transaction Problems' in themes_list:
+        insights.append({
+            'bank': bank,
+            'insight': 'Users report transaction issues (slow transfers, failed payments)',
+            'recommendation': 'Optimize transaction processing and add real-time status updates'
+        })
+    
+    if 'Login & Security Issues' in themes_list:
+        insights.append({
+            'bank': bank,
+            'insight': 'Users face login and authentication problems',
+            'recommendation': 'Improve login flow and add biometric authentication options'
+        })
+    
+    if 'App Performance & Bugs' in themes_list:
+        insights.append({
+            'bank': bank,
+            'insight': 'App crashes and performance issues are common complaints',
+            'recommendation': 'Focus on bug fixes and performance optimization'
+        })
+    
+    return insights
+
+def analyze_bank(bank_df, bank):
+    """Run keyword extraction, theme identification and insights for one bank"""
+    # Extract keywords
+    keywords_df = extract_keywords_tfidf(bank_df, 30)
+    
+    # Identify themes
+    themed_keywords, theme_counts = identify_themes(keywords_df, bank)
+    
+    return {
+        'keywords': keywords_df,
+        'themed_keywords': themed_keywords,
+        'theme_counts': theme_counts,
+        'insights': bank_insights(bank, theme_counts),
+        'sample_reviews': bank_df.head(5)[['review', 'rating', 'sentiment_ternary']].to_dict('records'),
+        'analysis_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+def analyze_by_bank(df, cache_dir=THEME_CACHE_DIR, use_cache=True):
+    """
+    Perform thematic analysis for each bank.
+    Results are cached per bank partition fingerprint, so only banks whose
+    reviews changed since the last run are recomputed.
+    """
     print("\n" + "="*60)
     print("THEMATIC ANALYSIS BY BANK")
     print("="*60)
     
     all_themes = {}
+    recomputed = 0
     
     for bank in df['bank'].unique():
         print(f"\n🏦 Analyzing: {bank}")
         bank_df = df[df['bank'] == bank]
+        fingerprint = partition_fingerprint(bank_df)
         
-        # Extract keywords
-        keywords_df = extract_keywords_tfidf(bank_df, 30)
-        
-        # Identify themes
-        themed_keywords, theme_counts = identify_themes(keywords_df, bank)
-        
-        # Store results
-        all_themes[bank] = {
-            'keywords': keywords_df,
-            'themed_keywords': themed_keywords,
-            'theme_counts': theme_counts,
-            'sample_reviews': bank_df.head(5)[['review', 'rating', 'sentiment_ternary']].to_dict('records')
-        }
+        cached = load_cached_partition(bank, fingerprint, cache_dir) if use_cache else None
+        if cached is not None:
+            print(f"  ♻️  Unchanged since {cached['analysis_date']} - using cached themes ({fingerprint})")
+            all_themes[bank] = cached
+        else:
+            all_themes[bank] = analyze_bank(bank_df, bank)
+            save_cached_partition(bank, fingerprint, all_themes[bank], cache_dir)
+            recomputed += 1
         
         # Print sample reviews for context
         print(f"  Sample reviews from {bank}:")
@@ -219,16 +336,13 @@ def analyze_by_bank(df):
             print(f"    {i}. \"{review['review'][:80]}...\"")
             print(f"       Rating: {review['rating']}, Sentiment: {review['sentiment_ternary']}")
     
+    print(f"\n📦 Recomputed {recomputed} of {len(all_themes)} banks")
     return all_themes
 
 def save_thematic_results(all_themes):
     """Save thematic analysis results"""
     print("\n💾 Saving thematic analysis results...")
     
-    import os
-    import json
-    from datetime import datetime
-    
     os.makedirs('data/outputs', exist_ok=True)
     
     # Save themes by bank
@@ -240,7 +354,7 @@ def save_thematic_results(all_themes):
             'top_keywords': data['keywords'].to_dict('records'),
             'theme_distribution': data['theme_counts'].to_dict(),
             'total_reviews_analyzed': len(data['keywords']),
-            'analysis_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            'analysis_date': data.get('analysis_date', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
         }
     
     with open(themes_path, 'w') as f:
@@ -271,6 +385,27 @@ def save_thematic_results(all_themes):
     
     return themes_path
 
+def save_review_themes(df):
+    """
+    Save review-level theme assignments (review_id, bank, theme, score) for
+    loading into the review_themes table
+    """
+    review_themes = assign_review_themes(df)
+    rows = df.loc[review_themes['row']]
+    review_themes_df = pd.DataFrame({
+        'review_id': rows['review_id'].values if 'review_id' in df.columns else None,
+        'bank': rows['bank'].values,
+        'theme': review_themes['theme'].values,
+        'score': review_themes['score'].values
+    })
+
+    review_themes_path = '../../data/outputs/review_themes.csv'
+    review_themes_df.to_csv(review_themes_path, index=False)
+    print(f"✅ Review themes saved to: {review_themes_path} "
+          f"({len(review_themes_df)} assignments for {review_themes['row'].nunique()} reviews)")
+
+    return review_themes_path
+
 def generate_insights(all_themes):
     """Generate insights based on thematic analysis"""
     print("\n" + "="*60)
@@ -297,29 +432,8 @@ def generate_insights(all_themes):
                     theme_comparison[theme] = {}
                 theme_comparison[theme][bank] = count
         
-        # Generate specific insights based on scenarios
-        themes_list = top_themes.index.tolist()
-        
-        if 'Transaction Problems' in themes_list:
-            insights.append({
-                'bank': bank,
-                'insight': 'Users report transaction issues (slow transfers, failed payments)',
-                'recommendation': 'Optimize transaction processing and add real-time status updates'
-            })
-        
-        if 'Login & Security Issues' in themes_list:
-            insights.append({
-                'bank': bank,
-                'insight': 'Users face login and authentication problems',
-                'recommendation': 'Improve login flow and add biometric authentication options'
-            })
-        
-        if 'App Performance & Bugs' in themes_list:
-            insights.append({
-                'bank': bank,
-                'insight': 'App crashes and performance issues are common complaints',
-                'recommendation': 'Focus on bug fixes and performance optimization'
-            })
+        # Scenario insights are cached with the bank partition
+        insights.extend(data.get('insights') or bank_insights(bank, data['theme_counts']))
     
     # Save insights
     insights_df = pd.DataFrame(insights)
@@ -348,6 +462,7 @@ def main():
     
     # Save results
     save_thematic_results(all_themes)
+    save_review_themes(df)
     
     # Generate insights
     insights_df = generate_insights(all_themes)
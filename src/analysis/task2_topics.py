@@ -0,0 +1,322 @@
+# Save as: src/analysis/task2_topics.py
+"""
+Task 2: Topic Modelling
+Learn data-driven themes per bank and corpus-wide with MiniBatch NMF
+"""
+
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+from datetime import datetime
+import warnings
+warnings.filterwarnings('ignore')
+
+from task2_themes import load_sentiment_data, preprocess_text
+
+MODEL_CACHE_DIR = '../../data/models/topics'
+CORPUS_KEY = 'All Banks'
+
+def dataset_fingerprint(texts, **params):
+    """Stable fingerprint of a text collection plus the model parameters"""
+    digest = hashlib.sha256()
+    for key in sorted(params):
+        digest.update(f"{key}={params[key]};".encode('utf-8'))
+    for text in texts:
+        digest.update(str(text).encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()[:16]
+
+def review_keys(df):
+    """
+    64-bit key per review, used to tell which reviews a model has seen: the
+    Play review ID, or bank, date and text when it is missing
+    """
+    keys = df['bank'].astype(str) + '|' + df['date'].astype(str) + '|' + df['review'].astype(str)
+    if 'review_id' in df.columns:
+        keys = df['review_id'].astype(str).where(df['review_id'].notna(), keys)
+    return pd.util.hash_pandas_object(keys, index=False).values
+
+class TopicModel:
+    """
+    TF-IDF + MiniBatch NMF topic model that can be updated incrementally.
+    A corpus with no usable vocabulary (e.g. only stop words) leaves the model
+    unfitted; it then assigns every review to 'Other'.
+    """
+
+    def __init__(self, n_topics=8, max_features=2000, batch_size=512, random_state=42):
+        self.n_topics = n_topics
+        self.max_features = max_features
+        self.batch_size = batch_size
+        self.random_state = random_state
+        self.vectorizer = None
+        self.nmf = None
+        self.fingerprint = None
+        self.n_documents = 0
+        self.seen = np.array([], dtype=np.uint64)
+
+    def params(self):
+        """Parameters that take part in the cache key"""
+        return {
+            'n_topics': self.n_topics,
+            'max_features': self.max_features,
+            'batch_size': self.batch_size,
+            'random_state': self.random_state
+        }
+
+    @property
+    def fitted(self):
+        return self.nmf is not None
+
+    def unseen(self, keys):
+        """Mask of the reviews (by review_keys) this model has not been trained on"""
+        return ~np.isin(keys, self.seen)
+
+    def fit(self, texts, keys=()):
+        """Fit vocabulary and topics on an initial corpus of reviews (and their review_keys)"""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.decomposition import MiniBatchNMF
+
+        processed = [preprocess_text(t) for t in texts]
+        self.vectorizer, self.nmf = None, None
+        self.n_documents = len(processed)
+        self.seen = np.unique(np.asarray(keys, dtype=np.uint64))
+        self.fingerprint = dataset_fingerprint(texts, **self.params())
+
+        vectorizer = TfidfVectorizer(
+            max_features=self.max_features,
+            stop_words='english',
+            ngram_range=(1, 2),
+            min_df=2 if len(processed) >= 50 else 1,
+            dtype=np.float32
+        )
+        try:
+            tfidf_matrix = vectorizer.fit_transform(processed)
+        except ValueError:
+            # Empty vocabulary: nothing to learn topics from
+            print(f"  ⚠️  No usable vocabulary in {len(processed)} reviews; topics left empty")
+            return self
+        self.vectorizer = vectorizer
+
+        # Never ask for more topics than the vocabulary or corpus can support
+        n_topics = max(1, min(self.n_topics, tfidf_matrix.shape[0], tfidf_matrix.shape[1]))
+        self.nmf = MiniBatchNMF(
+            n_components=n_topics,
+            batch_size=self.batch_size,
+            init='nndsvda',
+            random_state=self.random_state
+        )
+        self.nmf.fit(tfidf_matrix)
+        return self
+
+    def partial_fit(self, texts, keys=()):
+        """
+        Update topics with new reviews without retraining from scratch.
+        The vocabulary is frozen at fit time, so unseen terms are ignored.
+        """
+        if not self.fitted:
+            return self.fit(texts, keys)
+
+        processed = [preprocess_text(t) for t in texts]
+        if not processed:
+            return self
+
+        tfidf_matrix = self.vectorizer.transform(processed)
+        for start in range(0, tfidf_matrix.shape[0], self.batch_size):
+            self.nmf.partial_fit(tfidf_matrix[start:start + self.batch_size])
+
+        self.n_documents += len(processed)
+        self.seen = np.union1d(self.seen, np.asarray(keys, dtype=np.uint64))
+        # Chained, so it identifies this version of the model in topics.json
+        self.fingerprint = dataset_fingerprint(texts, previous=self.fingerprint, **self.params())
+        return self
+
+    def transform(self, texts):
+        """Topic weights for each review (components stay fixed)"""
+        processed = [preprocess_text(t) for t in texts]
+        return self.nmf.transform(self.vectorizer.transform(processed))
+
+    def top_terms(self, n_terms=10):
+        """Highest-weighted terms for each topic"""
+        if not self.fitted:
+            return []
+        feature_names = self.vectorizer.get_feature_names_out()
+        terms = []
+        for component in self.nmf.components_:
+            top_idx = np.argsort(component)[::-1][:n_terms]
+            terms.append([feature_names[i] for i in top_idx])
+        return terms
+
+    def topic_labels(self, n_terms=3):
+        """Short human-readable label for each topic"""
+        return [' / '.join(terms) for terms in self.top_terms(n_terms)]
+
+    def assign(self, texts):
+        """Assign each review to its dominant topic"""
+        if not self.fitted:
+            return pd.DataFrame({
+                'topic': np.full(len(texts), -1),
+                'topic_label': 'Other',
+                'topic_score': np.zeros(len(texts))
+            })
+        weights = self.transform(texts)
+        labels = self.topic_labels()
+
+        topic_idx = weights.argmax(axis=1)
+        topic_score = weights.max(axis=1)
+        # Reviews with no known vocabulary get no topic
+        has_topic = topic_score > 0
+
+        return pd.DataFrame({
+            'topic': np.where(has_topic, topic_idx, -1),
+            'topic_label': [labels[i] if ok else 'Other' for i, ok in zip(topic_idx, has_topic)],
+            'topic_score': topic_score.round(4)
+        })
+
+    def save(self, path):
+        """Persist the fitted model"""
+        import joblib
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        joblib.dump(self, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        """Load a model saved with save()"""
+        import joblib
+        return joblib.load(path)
+
+def _model_path(name, cache_dir=MODEL_CACHE_DIR):
+    """Cache file holding the latest model of a partition (bank or corpus)"""
+    safe_name = ''.join(c if c.isalnum() else '_' for c in name).strip('_').lower()
+    return os.path.join(cache_dir, f"{safe_name}.joblib")
+
+def get_topic_model(reviews, name, n_topics=8, cache_dir=MODEL_CACHE_DIR, **kwargs):
+    """
+    Latest cached topic model for this partition of the reviews DataFrame,
+    updated with any reviews it has not seen; a new model is fitted when there
+    is none (or its parameters differ)
+    """
+    model = TopicModel(n_topics=n_topics, **kwargs)
+    path = _model_path(name, cache_dir)
+    texts, keys = reviews['review'].tolist(), review_keys(reviews)
+
+    if os.path.exists(path):
+        cached = TopicModel.load(path)
+        if cached.params() == model.params() and cached.fitted:
+            new = cached.unseen(keys)
+            if not new.any():
+                print(f"  ♻️  Using cached topic model for {name} ({cached.fingerprint})")
+                return cached
+            return update_topic_model(cached, [t for t, n in zip(texts, new) if n], keys[new], name, cache_dir)
+
+    print(f"  🧠 Fitting topic model for {name} ({len(texts)} reviews)...")
+    model.fit(texts, keys)
+    model.save(path)
+    return model
+
+def update_topic_model(model, new_texts, new_keys, name, cache_dir=MODEL_CACHE_DIR):
+    """Incrementally update a model with new reviews and cache the result"""
+    print(f"  🔄 Updating topic model for {name} with {len(new_texts)} new reviews...")
+    model.partial_fit(new_texts, new_keys)
+    model.save(_model_path(name, cache_dir))
+    return model
+
+def fit_topics_by_bank(df, n_topics=8, cache_dir=MODEL_CACHE_DIR):
+    """Fit one corpus-wide topic model plus one per bank"""
+    print("\n" + "="*60)
+    print("TOPIC MODELLING")
+    print("="*60)
+
+    models = {CORPUS_KEY: get_topic_model(df, CORPUS_KEY, n_topics, cache_dir)}
+
+    for bank in df['bank'].unique():
+        models[bank] = get_topic_model(df[df['bank'] == bank], bank, n_topics, cache_dir)
+
+    for name, model in models.items():
+        print(f"\n🏦 {name}:")
+        for i, label in enumerate(model.topic_labels()):
+            print(f"  • Topic {i}: {label}")
+
+    return models
+
+def assign_topics(df, models):
+    """Assign every review to corpus-wide and per-bank topics"""
+    assigned = df[['review', 'bank']].copy()
+    if 'review_id' in df.columns:
+        assigned.insert(0, 'review_id', df['review_id'])
+
+    corpus_topics = models[CORPUS_KEY].assign(df['review'].tolist())
+    assigned['corpus_topic'] = corpus_topics['topic'].values
+    assigned['corpus_topic_label'] = corpus_topics['topic_label'].values
+    assigned['corpus_topic_score'] = corpus_topics['topic_score'].values
+
+    assigned['bank_topic'] = -1
+    assigned['bank_topic_label'] = 'Other'
+    assigned['bank_topic_score'] = 0.0
+    for bank, model in models.items():
+        if bank == CORPUS_KEY:
+            continue
+        mask = (df['bank'] == bank).values
+        if not mask.any():
+            continue
+        bank_topics = model.assign(df.loc[mask, 'review'].tolist())
+        assigned.loc[mask, 'bank_topic'] = bank_topics['topic'].values
+        assigned.loc[mask, 'bank_topic_label'] = bank_topics['topic_label'].values
+        assigned.loc[mask, 'bank_topic_score'] = bank_topics['topic_score'].values
+
+    return assigned
+
+def save_topic_results(models, assigned, output_dir='../../data/outputs'):
+    """Save topic definitions and review-level assignments"""
+    print("\n💾 Saving topic modelling results...")
+    os.makedirs(output_dir, exist_ok=True)
+
+    topics_data = {}
+    for name, model in models.items():
+        topics_data[name] = {
+            'fingerprint': model.fingerprint,
+            'documents_seen': model.n_documents,
+            'topics': [
+                {'topic': i, 'label': label, 'top_terms': terms}
+                for i, (label, terms) in enumerate(zip(model.topic_labels(), model.top_terms()))
+            ],
+            'analysis_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+    topics_path = os.path.join(output_dir, 'topics.json')
+    with open(topics_path, 'w') as f:
+        json.dump(topics_data, f, indent=2)
+    print(f"✅ Topics saved to: {topics_path}")
+
+    assignments_path = os.path.join(output_dir, 'topic_assignments.csv')
+    assigned.drop(columns=['review']).to_csv(assignments_path, index=False)
+    print(f"✅ Topic assignments saved to: {assignments_path}")
+
+    return topics_path
+
+def main():
+    """Main function for Task 2 Topic Modelling"""
+    print("="*60)
+    print("TASK 2: TOPIC MODELLING")
+    print("="*60)
+
+    df = load_sentiment_data()
+
+    if df is None:
+        print("❌ Cannot proceed without sentiment data")
+        return
+
+    models = fit_topics_by_bank(df)
+    assigned = assign_topics(df, models)
+    save_topic_results(models, assigned)
+
+    print("\n" + "="*60)
+    print("✅ TOPIC MODELLING COMPLETED")
+    print("="*60)
+    for name, model in models.items():
+        print(f"{name}: {model.nmf.n_components if model.fitted else 0} topics")
+
+if __name__ == "__main__":
+    main()
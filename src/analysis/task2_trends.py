@@ -0,0 +1,169 @@
+# Save as: src/analysis/task2_trends.py
+"""
+Task 2: Theme and Sentiment Trends
+Incrementally maintained monthly store of theme counts and sentiment by bank
+"""
+
+import os
+import numpy as np
+import pandas as pd
+import warnings
+warnings.filterwarnings('ignore')
+
+from task2_themes import load_sentiment_data, assign_review_themes
+
+TREND_STORE_DIR = '../../data/outputs/trends'
+
+SENTIMENT_COLUMNS = ['reviews', 'positive', 'neutral', 'negative', 'rating_sum', 'sentiment_score_sum']
+THEME_COLUMNS = ['reviews', 'positive', 'neutral', 'negative', 'theme_score_sum']
+
+class TrendStore:
+    """
+    Time-bucketed aggregates keyed by (bank, month[, theme]).
+    Only additive columns (counts and sums) are stored, so a batch of new
+    reviews is folded in by adding its own aggregates - history is never rescanned.
+    A ledger of hashed review IDs keeps repeated updates idempotent.
+    """
+
+    def __init__(self, store_dir=TREND_STORE_DIR):
+        self.store_dir = store_dir
+        self.sentiment_path = os.path.join(store_dir, 'monthly_sentiment.csv')
+        self.themes_path = os.path.join(store_dir, 'monthly_themes.csv')
+        self.ledger_path = os.path.join(store_dir, 'seen_reviews.npy')
+
+        self.sentiment = self._read(self.sentiment_path, ['bank', 'month'] + SENTIMENT_COLUMNS)
+        self.themes = self._read(self.themes_path, ['bank', 'month', 'theme'] + THEME_COLUMNS)
+        self.seen = np.load(self.ledger_path) if os.path.exists(self.ledger_path) else np.array([], dtype=np.uint64)
+
+    @staticmethod
+    def _read(path, columns):
+        if os.path.exists(path):
+            return pd.read_csv(path)
+        return pd.DataFrame(columns=columns)
+
+    @staticmethod
+    def _review_keys(df):
+        """64-bit key per review (Play review ID when available)"""
+        if 'review_id' in df.columns:
+            keys = df['review_id'].astype(str)
+        else:
+            keys = df['bank'].astype(str) + '|' + df['date'].astype(str) + '|' + df['review'].astype(str)
+        return pd.util.hash_pandas_object(keys, index=False).values
+
+    def update(self, df):
+        """Fold a batch of reviews into the store; returns the number of new reviews"""
+        keys = self._review_keys(df)
+        _, first = np.unique(keys, return_index=True)
+        is_new = np.zeros(len(df), dtype=bool)
+        is_new[first] = True
+        is_new &= ~np.isin(keys, self.seen, assume_unique=False)
+
+        new_df = df[is_new].copy()
+        if new_df.empty:
+            print("♻️  Trend store already up to date")
+            return 0
+
+        new_df['month'] = pd.to_datetime(new_df['date'], errors='coerce').dt.strftime('%Y-%m')
+        dated = new_df['month'].notna().values
+        # Only counted reviews enter the ledger, so an undated review is
+        # still picked up once a later batch supplies its date
+        new_keys = keys[is_new][dated]
+        # Positional index: assign_review_themes reports rows by index label
+        new_df = new_df[dated].reset_index(drop=True)
+        if new_df.empty:
+            print(f"  ⚠️  Skipped {(~dated).sum()} reviews without a valid date")
+            return 0
+
+        sentiment = new_df.get('sentiment_ternary', new_df.get('sentiment_label'))
+        if sentiment is None:
+            sentiment = pd.Series('neutral', index=new_df.index)
+        for label in ['positive', 'neutral', 'negative']:
+            new_df[label] = (sentiment == label).astype(int)
+        new_df['reviews'] = 1
+        new_df['rating_sum'] = new_df['rating'].astype(float)
+        new_df['sentiment_score_sum'] = new_df.get('sentiment_score', pd.Series(0.0, index=new_df.index)).fillna(0).astype(float)
+
+        sentiment_delta = new_df.groupby(['bank', 'month'], as_index=False)[SENTIMENT_COLUMNS].sum()
+
+        review_themes = assign_review_themes(new_df)
+        theme_rows = new_df.iloc[review_themes['row'].values][['bank', 'month', 'reviews', 'positive', 'neutral', 'negative']]
+        theme_rows = theme_rows.reset_index(drop=True)
+        theme_rows['theme'] = review_themes['theme'].values
+        theme_rows['theme_score_sum'] = review_themes['score'].values
+        themes_delta = theme_rows.groupby(['bank', 'month', 'theme'], as_index=False)[THEME_COLUMNS].sum()
+
+        self.sentiment = self._merge(self.sentiment, sentiment_delta, ['bank', 'month'], SENTIMENT_COLUMNS)
+        self.themes = self._merge(self.themes, themes_delta, ['bank', 'month', 'theme'], THEME_COLUMNS)
+        self.seen = np.union1d(self.seen, new_keys)
+        self.save()
+
+        print(f"✅ Trend store updated with {len(new_df)} new reviews "
+              f"({len(sentiment_delta)} bank-months touched)")
+        if (~dated).any():
+            print(f"  ⚠️  Skipped {(~dated).sum()} reviews without a valid date")
+        return len(new_df)
+
+    @staticmethod
+    def _merge(current, delta, keys, columns):
+        """Add delta aggregates onto the stored ones"""
+        if current.empty:
+            return delta.sort_values(keys).reset_index(drop=True)
+        combined = pd.concat([current, delta], ignore_index=True)
+        return combined.groupby(keys, as_index=False)[columns].sum().sort_values(keys).reset_index(drop=True)
+
+    def save(self):
+        """Write the store atomically"""
+        os.makedirs(self.store_dir, exist_ok=True)
+        for frame, path in [(self.sentiment, self.sentiment_path), (self.themes, self.themes_path)]:
+            tmp_path = path + '.tmp'
+            frame.to_csv(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        tmp_path = self.ledger_path + '.tmp.npy'
+        np.save(tmp_path, self.seen)
+        os.replace(tmp_path, self.ledger_path)
+
+    def sentiment_trend(self, bank=None):
+        """Monthly review volume, average rating and sentiment shares"""
+        trend = self.sentiment if bank is None else self.sentiment[self.sentiment['bank'] == bank]
+        trend = trend.groupby('month', as_index=False)[SENTIMENT_COLUMNS].sum()
+        trend['avg_rating'] = (trend['rating_sum'] / trend['reviews']).round(2)
+        for label in ['positive', 'neutral', 'negative']:
+            trend[f'{label}_pct'] = (trend[label] / trend['reviews'] * 100).round(1)
+        return trend
+
+    def theme_drift(self, bank=None, negative_only=False):
+        """Share of each month's reviews mentioning each theme (months x themes)"""
+        themes = self.themes if bank is None else self.themes[self.themes['bank'] == bank]
+        totals = self.sentiment if bank is None else self.sentiment[self.sentiment['bank'] == bank]
+        value = 'negative' if negative_only else 'reviews'
+
+        counts = themes.pivot_table(index='month', columns='theme', values=value, aggfunc='sum', fill_value=0)
+        month_totals = totals.groupby('month')[value].sum()
+        return (counts.div(month_totals, axis=0) * 100).round(1).fillna(0)
+
+def main():
+    """Main function for Task 2 Trend Store"""
+    print("="*60)
+    print("TASK 2: THEME & SENTIMENT TRENDS")
+    print("="*60)
+
+    df = load_sentiment_data()
+
+    if df is None:
+        print("❌ Cannot proceed without sentiment data")
+        return
+
+    store = TrendStore()
+    store.update(df)
+
+    for bank in sorted(store.sentiment['bank'].unique()):
+        drift = store.theme_drift(bank)
+        print(f"\n🏦 {bank}: {len(drift)} months tracked")
+        if not drift.empty:
+            latest = drift.iloc[-1].drop(labels=['Other'], errors='ignore').sort_values(ascending=False)
+            print(f"  Latest month ({drift.index[-1]}) top themes:")
+            for theme, share in latest.head(3).items():
+                print(f"  • {theme}: {share}% of reviews")
+
+if __name__ == "__main__":
+    main()
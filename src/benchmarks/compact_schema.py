@@ -0,0 +1,175 @@
+# Save as: src/benchmarks/compact_schema.py
+"""
+Compact schema benchmark
+Copies the synthetic reviews into the original wide layout (VARCHAR labels
+and sources, NUMERIC scores, INTEGER ratings, declaration column order) and
+the compact layout of migration 0007, then compares table size, index size
+and aggregate latency on identical data
+"""
+
+import os
+import sys
+import json
+import argparse
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(SRC_DIR, 'database'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from db_pool import get_pool  # noqa: E402
+from migrate import migrate  # noqa: E402
+from query_plans import DEFAULT_DBNAME, ensure_database, explain, populate  # noqa: E402
+
+# Both copies keep the text inline and leave out review_tsv, as the
+# layouts compared here did before texts were interned
+LAYOUTS = {
+    'wide': """
+        CREATE TABLE bench_reviews_wide AS
+        SELECT
+            review_id, bank_id, review_text, rating::INTEGER AS rating, review_date,
+            sentiment_label::VARCHAR(20) AS sentiment_label,
+            sentiment_score::DECIMAL(5,4) AS sentiment_score,
+            source::VARCHAR(50) AS source, thumbs_up_count, reviewer_name, app_version,
+            scraped_date, created_at, external_review_id
+        FROM review_details
+    """,
+    'compact': """
+        CREATE TABLE bench_reviews_compact AS
+        SELECT
+            scraped_date, created_at, review_id, bank_id, review_date, sentiment_score,
+            thumbs_up_count, sentiment_label, source, rating, review_text, reviewer_name,
+            app_version, external_review_id
+        FROM review_details
+    """,
+}
+
+# The index set reviews carries for these columns
+INDEXES = {
+    'pkey': "CREATE UNIQUE INDEX {table}_pkey ON {table} (review_id)",
+    'bank_id': "CREATE INDEX {table}_bank_id ON {table} (bank_id)",
+    'rating': "CREATE INDEX {table}_rating ON {table} (rating)",
+    'sentiment': "CREATE INDEX {table}_sentiment ON {table} (sentiment_label)",
+    'date': "CREATE INDEX {table}_date ON {table} (review_date)",
+    'bank_date': "CREATE INDEX {table}_bank_date ON {table} (bank_id, review_date)",
+    'external_id': "CREATE UNIQUE INDEX {table}_external_id ON {table} (external_review_id)",
+}
+
+AGGREGATES = {
+    'avg_by_bank': """
+        SELECT bank_id, COUNT(*), AVG(rating), AVG(sentiment_score)
+        FROM {table} GROUP BY bank_id
+    """,
+    'sentiment_by_bank': """
+        SELECT bank_id, sentiment_label, COUNT(*), AVG(rating), AVG(sentiment_score)
+        FROM {table} GROUP BY bank_id, sentiment_label
+    """,
+    'negative_monthly': """
+        SELECT DATE_TRUNC('month', review_date), COUNT(*), AVG(sentiment_score)
+        FROM {table} WHERE sentiment_label = 'negative' AND source = 'Google Play Store'
+        GROUP BY 1
+    """,
+    'rating_histogram': """
+        SELECT rating, COUNT(*) FROM {table} GROUP BY rating
+    """,
+}
+
+SIZE_SQL = """
+SELECT
+    pg_relation_size(%(table)s::regclass),
+    pg_indexes_size(%(table)s::regclass),
+    pg_total_relation_size(%(table)s::regclass),
+    (SELECT AVG(pg_column_size(t.*)) FROM {table} t)
+"""
+
+def build_layout(db_pool, layout):
+    """(Re)create one benchmark copy of reviews with its indexes"""
+    table = f"bench_reviews_{layout}"
+    with db_pool.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"DROP TABLE IF EXISTS {table};")
+            cur.execute(LAYOUTS[layout])
+            for ddl in INDEXES.values():
+                cur.execute(ddl.format(table=table))
+        conn.commit()
+
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f"VACUUM ANALYZE {table};")
+        finally:
+            conn.autocommit = False
+    return table
+
+def measure_layout(db_pool, table, repeats=5):
+    with db_pool.cursor(dict_rows=False) as cur:
+        cur.execute(SIZE_SQL.format(table=table), {'table': table})
+        heap, indexes, total, row_bytes = cur.fetchone()
+        # One untimed pass per query so both layouts start from a warm cache
+        for query in AGGREGATES.values():
+            cur.execute(query.format(table=table))
+        return {
+            'table_bytes': heap,
+            'index_bytes': indexes,
+            'total_bytes': total,
+            'avg_row_bytes': round(float(row_bytes or 0), 1),
+            'queries': {name: explain(cur, query.format(table=table), repeats)
+                        for name, query in AGGREGATES.items()},
+        }
+
+def run_benchmark(dbname=DEFAULT_DBNAME, rows=1000000, years=3, repeats=5, skip_load=False, keep=False):
+    """Build both layouts from the same rows and compare them"""
+    print("="*60)
+    print("COMPACT SCHEMA BENCHMARK")
+    print("="*60)
+
+    ensure_database(dbname)
+    db_pool = get_pool(dbname=dbname)
+    migrate(db_pool)
+    if not skip_load:
+        populate(db_pool, rows, years)
+
+    results = {}
+    try:
+        for layout in LAYOUTS:
+            table = build_layout(db_pool, layout)
+            results[layout] = measure_layout(db_pool, table, repeats)
+    finally:
+        if not keep:
+            with db_pool.connection() as conn:
+                with conn.cursor() as cur:
+                    for layout in LAYOUTS:
+                        cur.execute(f"DROP TABLE IF EXISTS bench_reviews_{layout};")
+                conn.commit()
+
+    wide, compact = results['wide'], results['compact']
+    print(f"\n{'':<22}{'wide':>14}{'compact':>14}{'change':>10}")
+    for key in ('table_bytes', 'index_bytes', 'total_bytes', 'avg_row_bytes'):
+        change = (compact[key] - wide[key]) / wide[key] * 100 if wide[key] else 0
+        print(f"{key:<22}{wide[key]:>14,}{compact[key]:>14,}{change:>9.1f}%")
+    for name in AGGREGATES:
+        before, after = wide['queries'][name]['ms'], compact['queries'][name]['ms']
+        change = (after - before) / before * 100 if before else 0
+        print(f"{name + ' (ms)':<22}{before:>14.2f}{after:>14.2f}{change:>9.1f}%")
+
+    return {'database': dbname, 'rows': rows, 'repeats': repeats, 'layouts': results}
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the wide and compact reviews layouts")
+    parser.add_argument('--dbname', default=DEFAULT_DBNAME, help="benchmark database (created if missing; its reviews are replaced)")
+    parser.add_argument('--rows', type=int, default=1000000, help="synthetic reviews to generate")
+    parser.add_argument('--years', type=int, default=3, help="date span of the synthetic reviews")
+    parser.add_argument('--repeats', type=int, default=5, help="EXPLAIN ANALYZE runs per query (median is kept)")
+    parser.add_argument('--skip-load', action='store_true', help="reuse the data already in the benchmark database")
+    parser.add_argument('--keep', action='store_true', help="keep the bench_reviews_* copies for inspection")
+    parser.add_argument('--output', help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.dbname, args.rows, args.years, args.repeats, args.skip_load, args.keep)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, default=str)
+        print(f"💾 Results saved to: {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# Save as: src/benchmarks/import_time.py
+"""
+Import-time benchmark
+Measures the cold import time of each pipeline module in a fresh interpreter
+and checks that heavy libraries are only loaded on first use
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules are imported from their own directory, the way the scripts are run
+MODULES = {
+    'database': ['db_connection', 'async_db', 'duckdb_backend', 'test_queries', 'verify_queries', 'insert_data'],
+    'analysis': ['task2_themes', 'task2_sentiment', 'task2_topics', 'task2_embeddings', 'task2_trends'],
+}
+
+HEAVY_LIBRARIES = ['torch', 'transformers', 'spacy', 'sklearn', 'pandas', 'duckdb']
+
+# Heavy libraries a module may legitimately load at import time
+ALLOWED_AT_IMPORT = {
+    'analysis': ['pandas'],
+    'database': [],
+    'insert_data': ['pandas'],
+}
+
+PROBE = """
+import sys, time, json
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def measure_import(package, module, repeats=3):
+    """Best-of-N cold import time of one module plus the heavy libraries it loaded"""
+    cwd = os.path.join(SRC_DIR, package)
+    best = None
+    for _ in range(repeats):
+        result = subprocess.run(
+            [sys.executable, '-c', PROBE.format(module=module, heavy=HEAVY_LIBRARIES)],
+            cwd=cwd, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'unknown error'
+            return {'module': module, 'package': package, 'error': error}
+        measurement = json.loads(result.stdout.strip().splitlines()[-1])
+        if best is None or measurement['seconds'] < best['seconds']:
+            best = measurement
+
+    allowed = ALLOWED_AT_IMPORT.get(module, ALLOWED_AT_IMPORT.get(package, []))
+    return {
+        'module': module,
+        'package': package,
+        'seconds': round(best['seconds'], 4),
+        'heavy_loaded': best['loaded'],
+        'unexpected': [lib for lib in best['loaded'] if lib not in allowed]
+    }
+
+def run_benchmark(budget=1.0, repeats=3):
+    """Measure every module and report which ones break the budget"""
+    print("="*60)
+    print("IMPORT-TIME BENCHMARK")
+    print("="*60)
+    print(f"Budget: {budget:.2f}s per module, best of {repeats}\n")
+
+    results = []
+    for package, modules in MODULES.items():
+        for module in modules:
+            result = measure_import(package, module, repeats)
+            results.append(result)
+
+            if 'error' in result:
+                print(f"  ❌ {package}/{module}: could not import ({result['error']})")
+                continue
+
+            ok = result['seconds'] < budget and not result['unexpected']
+            status = '✅' if ok else '❌'
+            loaded = ', '.join(result['heavy_loaded']) or 'none'
+            print(f"  {status} {package}/{module}: {result['seconds']*1000:.0f} ms (heavy libs loaded: {loaded})")
+            if result['unexpected']:
+                print(f"       Should load lazily: {', '.join(result['unexpected'])}")
+
+    # A module that no longer imports is a failure, not a pass
+    failures = [r for r in results if 'error' in r or r['seconds'] >= budget or r['unexpected']]
+    print(f"\n{'✅ All modules within budget' if not failures else f'❌ {len(failures)} module(s) failed or over budget'}")
+    return results, failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cold import time of pipeline modules")
+    parser.add_argument('--budget', type=float, default=1.0, help="maximum seconds per module import")
+    parser.add_argument('--repeats', type=int, default=3, help="cold imports per module (best is kept)")
+    parser.add_argument('--output', help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    results, failures = run_benchmark(args.budget, args.repeats)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'budget': args.budget, 'results': results}, f, indent=2)
+        print(f"💾 Results saved to: {args.output}")
+
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
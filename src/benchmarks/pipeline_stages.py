@@ -0,0 +1,374 @@
+# Save as: src/benchmarks/pipeline_stages.py
+"""
+Pipeline stage benchmark
+Times and memory-profiles each pipeline stage (cleaning, sentiment, keyword
+extraction and themes, database load and export) on reproducible synthetic
+corpora of increasing size, and writes the scaling curves as JSON so runs
+can be compared across commits
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import platform
+import resource
+import statistics
+import subprocess
+from datetime import datetime
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT_DIR = os.path.dirname(SRC_DIR)
+for package in ('scraping', 'analysis', 'database'):
+    sys.path.insert(0, os.path.join(SRC_DIR, package))
+
+CORPUS_DIR = os.path.join(ROOT_DIR, 'data', 'benchmarks')
+DEFAULT_SIZES = [10000, 100000, 1000000, 10000000]
+DEFAULT_DBNAME = 'bank_reviews_bench'
+
+# Largest corpus each stage runs on by default; the model stages score every
+# distinct text and would take hours beyond these (--no-limits lifts them)
+STAGE_LIMITS = {
+    'sentiment_distilbert': 100000,
+    'sentiment_textblob': 1000000,
+}
+
+def peak_rss():
+    """Peak resident set size of this process, in bytes"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def corpus_path(rows, seed, extension):
+    return os.path.join(CORPUS_DIR, f"reviews_{rows}_seed{seed}.{extension}")
+
+def ensure_corpus(rows, seed, extension='parquet'):
+    """Write the synthetic corpus once and reuse it on later runs"""
+    from synthetic_reviews import write_reviews
+
+    path = corpus_path(rows, seed, extension)
+    if not os.path.exists(path):
+        started = time.time()
+        # Write under a temporary name so an interrupted run leaves no partial corpus
+        partial = path[:-len(extension)] + f"partial.{extension}"
+        write_reviews(partial, rows, seed=seed, with_sentiment=True)
+        os.replace(partial, path)
+        print(f"  📦 Generated {rows:,}-review corpus in {time.time() - started:.1f}s: {path}")
+    return path
+
+def read_corpus(rows, seed):
+    import pandas as pd
+    return pd.read_parquet(corpus_path(rows, seed, 'parquet'))
+
+def open_manager(options):
+    """Database manager on the benchmark database, schema up to date"""
+    from db_connection import create_manager
+
+    if options['backend'] == 'duckdb':
+        manager = create_manager('duckdb', database=options['duckdb_path'])
+    else:
+        from query_plans import ensure_database
+        ensure_database(options['dbname'])
+        manager = create_manager('postgres', dbname=options['dbname'])
+    if not manager.connect() or not manager.create_tables():
+        raise RuntimeError(f"could not prepare the {options['backend']} benchmark database")
+    return manager
+
+def reset_reviews(manager):
+    manager.execute_query("TRUNCATE reviews;")
+    if getattr(manager, 'backend', 'postgres') == 'postgres':
+        manager.prune_review_texts()
+
+def review_count(manager):
+    result = manager.execute_query("SELECT COUNT(*) as n FROM reviews;", fetch=True)
+    return result[0]['n'] if result else 0
+
+# Each stage is (setup, run): setup prepares inputs untimed and returns the
+# argument for run, which is what gets timed and profiled
+
+def setup_clean(rows, options):
+    # Raw scraper output: clean_data works on the Task 1 columns
+    df = read_corpus(rows, options['seed'])
+    return df[['review', 'rating', 'date', 'bank', 'source', 'review_id', 'thumbs_up']]
+
+def run_clean(df):
+    from task1_scrape import clean_data
+    return len(clean_data(df))
+
+def setup_sentiment(rows, options):
+    return read_corpus(rows, options['seed']).drop(columns=['sentiment_label', 'sentiment_score'])
+
+def run_sentiment_distilbert(df):
+    from task2_sentiment import analyze_sentiment_distilbert
+    return len(analyze_sentiment_distilbert(df))
+
+def run_sentiment_textblob(df):
+    from task2_sentiment import analyze_sentiment_textblob
+    return len(analyze_sentiment_textblob(df))
+
+def setup_bank_frames(rows, options):
+    df = read_corpus(rows, options['seed'])
+    return [(bank, bank_df) for bank, bank_df in df.groupby('bank')]
+
+def run_keywords_tfidf(bank_frames):
+    from task2_themes import extract_keywords_tfidf
+    for _, bank_df in bank_frames:
+        extract_keywords_tfidf(bank_df, 30)
+    return sum(len(bank_df) for _, bank_df in bank_frames)
+
+def setup_identify_themes(rows, options):
+    from task2_themes import extract_keywords_tfidf
+    return [(bank, extract_keywords_tfidf(bank_df, 30)) for bank, bank_df in setup_bank_frames(rows, options)]
+
+def run_identify_themes(bank_keywords):
+    from task2_themes import identify_themes
+    for bank, keywords_df in bank_keywords:
+        identify_themes(keywords_df, bank)
+    return sum(len(keywords_df) for _, keywords_df in bank_keywords)
+
+def setup_load(rows, options):
+    csv_path = ensure_corpus(rows, options['seed'], 'csv')
+    manager = open_manager(options)
+    reset_reviews(manager)
+    return manager, csv_path
+
+def run_load(state):
+    manager, csv_path = state
+    manager.load_reviews_from_csv(csv_path)
+    return review_count(manager)
+
+def setup_export(rows, options):
+    manager = open_manager(options)
+    # Reuse the rows the load stage left behind when they match this corpus
+    if review_count(manager) != rows:
+        reset_reviews(manager)
+        manager.load_reviews_from_csv(ensure_corpus(rows, options['seed'], 'csv'))
+    return manager, os.path.join(CORPUS_DIR, f"export_{rows}.csv")
+
+def run_export(state):
+    manager, output_path = state
+    try:
+        manager.export_to_csv(output_path)
+        with open(output_path, encoding='utf-8') as f:
+            return sum(1 for _ in f) - 1
+    finally:
+        if os.path.exists(output_path):
+            os.remove(output_path)
+
+STAGES = {
+    'clean_data': (setup_clean, run_clean),
+    'sentiment_distilbert': (setup_sentiment, run_sentiment_distilbert),
+    'sentiment_textblob': (setup_sentiment, run_sentiment_textblob),
+    'keywords_tfidf': (setup_bank_frames, run_keywords_tfidf),
+    'identify_themes': (setup_identify_themes, run_identify_themes),
+    'load_reviews_from_csv': (setup_load, run_load),
+    'export_to_csv': (setup_export, run_export),
+}
+
+def run_stage(stage, rows, options):
+    """Run one stage in this process and return its measurement"""
+    setup, run = STAGES[stage]
+    state = setup(rows, options)
+
+    rss_before = peak_rss()
+    started = time.perf_counter()
+    processed = run(state)
+    seconds = time.perf_counter() - started
+    rss_after = peak_rss()
+
+    return {
+        'seconds': round(seconds, 4),
+        'rows_per_sec': round(rows / seconds, 1) if seconds > 0 else None,
+        'processed': processed,
+        'peak_rss_bytes': rss_after,
+        # Memory the stage needed on top of its inputs
+        'stage_peak_bytes': max(rss_after - rss_before, 0),
+    }
+
+def measure_stage(stage, rows, options, repeats=1, timeout=None):
+    """
+    Median time and largest memory figures over `repeats` runs, each in a
+    fresh interpreter so peak RSS belongs to this stage alone
+    """
+    command = [
+        sys.executable, os.path.abspath(__file__), '--child', stage,
+        '--sizes', str(rows), '--seed', str(options['seed']),
+        '--backend', options['backend'], '--dbname', options['dbname'],
+        '--duckdb-path', options['duckdb_path'],
+    ]
+    runs = []
+    for _ in range(repeats):
+        try:
+            result = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return {'stage': stage, 'rows': rows, 'error': f"timed out after {timeout}s"}
+        if result.returncode != 0:
+            error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'unknown error'
+            return {'stage': stage, 'rows': rows, 'error': error}
+        runs.append(json.loads(result.stdout.strip().splitlines()[-1]))
+
+    seconds = statistics.median(run['seconds'] for run in runs)
+    return {
+        'stage': stage,
+        'rows': rows,
+        'seconds': round(seconds, 4),
+        'rows_per_sec': round(rows / seconds, 1) if seconds > 0 else None,
+        'processed': runs[-1]['processed'],
+        'peak_rss_mb': round(max(run['peak_rss_bytes'] for run in runs) / 2**20, 1),
+        'stage_peak_mb': round(max(run['stage_peak_bytes'] for run in runs) / 2**20, 1),
+        'runs': [run['seconds'] for run in runs],
+    }
+
+def scaling_exponent(points):
+    """
+    Least-squares slope of log(seconds) against log(rows): about 1 for
+    linear stages, 2 for quadratic ones
+    """
+    points = [(rows, seconds) for rows, seconds in points if seconds and seconds > 0]
+    if len(points) < 2:
+        return None
+    xs = [math.log(rows) for rows, _ in points]
+    ys = [math.log(seconds) for _, seconds in points]
+    mean_x, mean_y = statistics.mean(xs), statistics.mean(ys)
+    spread = sum((x - mean_x) ** 2 for x in xs)
+    if spread == 0:
+        return None
+    return round(sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / spread, 3)
+
+def git_commit():
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR,
+                                capture_output=True, text=True)
+        return result.stdout.strip() or None
+    except OSError:
+        return None
+
+def compare_results(results, baseline_path, tolerance=0.2):
+    """Stage/size pairs more than `tolerance` slower than a previous run"""
+    with open(baseline_path) as f:
+        baseline = {(r['stage'], r['rows']): r for r in json.load(f)['results'] if 'seconds' in r}
+
+    regressions = []
+    for result in results:
+        before = baseline.get((result['stage'], result['rows']))
+        if before is None or 'seconds' not in result or not before['seconds']:
+            continue
+        change = (result['seconds'] - before['seconds']) / before['seconds']
+        if change > tolerance:
+            regressions.append({
+                'stage': result['stage'], 'rows': result['rows'],
+                'before': before['seconds'], 'after': result['seconds'], 'change': round(change, 3)
+            })
+    return regressions
+
+def run_benchmark(sizes=None, stages=None, seed=0, repeats=1, backend='postgres', dbname=DEFAULT_DBNAME,
+                  duckdb_path=None, no_limits=False, timeout=None):
+    """Run every stage on every corpus size and collect the scaling curves"""
+    sizes = sorted(sizes or DEFAULT_SIZES)
+    stages = stages or list(STAGES)
+    options = {
+        'seed': seed, 'backend': backend, 'dbname': dbname,
+        'duckdb_path': duckdb_path or os.path.join(CORPUS_DIR, 'bench.duckdb'),
+    }
+
+    print("="*60)
+    print("PIPELINE STAGE BENCHMARK")
+    print("="*60)
+    print(f"Sizes: {', '.join(f'{rows:,}' for rows in sizes)} | seed {seed} | {backend} backend\n")
+
+    results = []
+    for rows in sizes:
+        ensure_corpus(rows, seed)
+        for stage in stages:
+            limit = STAGE_LIMITS.get(stage)
+            if limit and rows > limit and not no_limits:
+                results.append({'stage': stage, 'rows': rows, 'skipped': f"above the {limit:,}-row limit"})
+                continue
+
+            result = measure_stage(stage, rows, options, repeats, timeout)
+            results.append(result)
+            if 'error' in result:
+                print(f"  ⚠️  {stage} @ {rows:,}: {result['error']}")
+            else:
+                print(f"  {stage:<24}{rows:>12,}{result['seconds']:>10.2f}s"
+                      f"{result['rows_per_sec'] or 0:>14,.0f} rows/s{result['stage_peak_mb']:>10.1f} MB")
+
+    curves = {}
+    for stage in stages:
+        points = [(r['rows'], r['seconds']) for r in results if r['stage'] == stage and 'seconds' in r]
+        curves[stage] = {'points': points, 'scaling_exponent': scaling_exponent(points)}
+
+    print("\nScaling (time ~ rows^k):")
+    for stage, curve in curves.items():
+        k = curve['scaling_exponent']
+        print(f"  {stage:<24}k = {k if k is not None else 'n/a'}")
+
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'seed': seed,
+        'backend': backend,
+        'repeats': repeats,
+        'results': results,
+        'curves': curves,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Time and memory-profile each pipeline stage at increasing corpus sizes")
+    parser.add_argument('--sizes', type=lambda s: [int(n) for n in s.split(',')], default=DEFAULT_SIZES,
+                        help="comma-separated corpus sizes (default: 10k,100k,1M,10M)")
+    parser.add_argument('--stages', type=lambda s: s.split(','), help=f"comma-separated subset of: {', '.join(STAGES)}")
+    parser.add_argument('--seed', type=int, default=0, help="synthetic corpus seed")
+    parser.add_argument('--repeats', type=int, default=1, help="runs per stage and size (median is kept)")
+    parser.add_argument('--backend', choices=['postgres', 'duckdb'], default='postgres', help="database for the load/export stages")
+    parser.add_argument('--dbname', default=DEFAULT_DBNAME, help="PostgreSQL benchmark database (created if missing; its reviews are replaced)")
+    parser.add_argument('--duckdb-path', default=os.path.join(CORPUS_DIR, 'bench.duckdb'), help="DuckDB benchmark database file")
+    parser.add_argument('--no-limits', action='store_true', help="run the model stages on every size")
+    parser.add_argument('--timeout', type=int, help="seconds before a single stage run is abandoned")
+    parser.add_argument('--baseline', help="earlier results JSON to check for regressions")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="slowdown that counts as a regression (0.2 = 20%%)")
+    parser.add_argument('--output', help="results JSON path (default: data/benchmarks/pipeline_<commit>.json)")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        # One measurement for measure_stage; stage output goes to stderr
+        options = {'seed': args.seed, 'backend': args.backend, 'dbname': args.dbname,
+                   'duckdb_path': args.duckdb_path}
+        stdout, sys.stdout = sys.stdout, sys.stderr
+        try:
+            result = run_stage(args.child, args.sizes[0], options)
+        finally:
+            sys.stdout = stdout
+        print(json.dumps(result))
+        return
+
+    unknown = [stage for stage in args.stages or [] if stage not in STAGES]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    results = run_benchmark(args.sizes, args.stages, args.seed, args.repeats, args.backend, args.dbname,
+                            args.duckdb_path, args.no_limits, args.timeout)
+
+    if args.baseline:
+        regressions = compare_results(results['results'], args.baseline, args.tolerance)
+        results['regressions'] = regressions
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) against {args.baseline}:")
+            for r in regressions:
+                print(f"   {r['stage']} @ {r['rows']:,}: {r['before']:.2f}s → {r['after']:.2f}s (+{r['change']:.0%})")
+        else:
+            print(f"\n✅ No regressions against {args.baseline}")
+
+    output = args.output or os.path.join(CORPUS_DIR, f"pipeline_{results['commit'] or 'unknown'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2, default=str)
+    print(f"💾 Results saved to: {output}")
+
+if __name__ == "__main__":
+    main()
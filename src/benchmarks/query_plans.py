@@ -0,0 +1,292 @@
+# Save as: src/benchmarks/query_plans.py
+"""
+Query plan benchmark and index advisor
+Runs the verification / test queries and the schema views under
+EXPLAIN (ANALYZE, BUFFERS) against a synthetic database, then tries candidate
+indexes and reports which ones save more read time than they add write cost
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(SRC_DIR, 'database'))
+
+import psycopg2  # noqa: E402
+from db_pool import connection_params, get_pool  # noqa: E402
+from migrate import migrate  # noqa: E402
+from test_queries import COMMON_COMPLAINTS_SQL  # noqa: E402
+from verify_queries import (  # noqa: E402
+    DATE_RANGE_SQL, RATING_BY_BANK_SQL, REVIEWS_PER_BANK_SQL, SENTIMENT_DISTRIBUTION_SQL
+)
+
+DEFAULT_DBNAME = 'bank_reviews_bench'
+
+QUERIES = {
+    'reviews_per_bank': REVIEWS_PER_BANK_SQL,
+    'rating_by_bank': RATING_BY_BANK_SQL,
+    'sentiment_distribution': SENTIMENT_DISTRIBUTION_SQL,
+    'date_range': DATE_RANGE_SQL,
+    'common_complaints': COMMON_COMPLAINTS_SQL,
+    'view_bank_reviews_summary': "SELECT * FROM bank_reviews_summary",
+    'view_sentiment_analysis': "SELECT * FROM sentiment_analysis",
+    'view_monthly_trends': "SELECT * FROM monthly_trends",
+    # Dashboard-style window: one bank, last quarter
+    'bank_recent_window': """
+        SELECT r.review_date, COUNT(*), AVG(r.rating),
+               COUNT(*) FILTER (WHERE r.sentiment_label = 'negative') as negative
+        FROM reviews r
+        WHERE r.bank_id = (SELECT MIN(bank_id) FROM banks)
+          AND r.review_date >= (SELECT MAX(review_date) FROM reviews) - 90
+        GROUP BY r.review_date
+        ORDER BY r.review_date
+    """,
+}
+
+CANDIDATE_INDEXES = {
+    'bank_date_covering': "CREATE INDEX {name} ON reviews (bank_id, review_date) INCLUDE (rating, sentiment_label)",
+    'bank_sentiment': "CREATE INDEX {name} ON reviews (bank_id, sentiment_label)",
+    'negative_by_bank': "CREATE INDEX {name} ON reviews (bank_id) WHERE sentiment_label = 'negative'",
+    'bank_rating': "CREATE INDEX {name} ON reviews (bank_id, rating)",
+    'date_brin': "CREATE INDEX {name} ON reviews USING BRIN (review_date)",
+}
+
+BANK_NAMES = [
+    'Commercial Bank of Ethiopia', 'Bank of Abyssinia', 'Dashen Bank',
+    'Awash Bank', 'Abay Bank', 'Wegagen Bank'
+]
+
+# Set-based generator: rating drives sentiment, dates spread over `years`;
+# the few distinct texts are interned once per batch
+SYNTHETIC_REVIEWS_SQL = """
+WITH texts AS (
+    SELECT t AS review_text, n, sha256(convert_to(t, 'UTF8')) AS text_hash
+    FROM unnest(ARRAY['app keeps crashing after update', 'transfer is slow today',
+                      'login error again', 'great app, easy to use', 'fast and reliable',
+                      'cannot complete transfer', 'good but needs fingerprint login']) WITH ORDINALITY u(t, n)
+), interned AS (
+    INSERT INTO review_texts (text_hash, review_text)
+    SELECT text_hash, review_text FROM texts
+    ON CONFLICT (text_hash) DO NOTHING
+)
+INSERT INTO reviews (
+    bank_id, text_hash, rating, review_date, sentiment_label,
+    sentiment_score, source, thumbs_up_count, reviewer_name, app_version, external_review_id
+)
+SELECT
+    b.bank_ids[1 + (g %% array_length(b.bank_ids, 1))::INTEGER],
+    h.text_hashes[1 + ((g * 7919) %% 7)::INTEGER],
+    s.rating,
+    CURRENT_DATE - ((g * 104729) %% (%(years)s * 365))::INTEGER,
+    (CASE WHEN s.rating >= 4 THEN 'positive' WHEN s.rating <= 2 THEN 'negative' ELSE 'neutral' END)::sentiment_label_t,
+    ROUND((s.rating / 5.0)::NUMERIC, 4),
+    'Google Play Store',
+    (g * 31) %% 50,
+    'user_' || g,
+    '4.' || (g %% 9),
+    %(prefix)s || g
+FROM generate_series(%(first)s::BIGINT, %(last)s::BIGINT) g
+CROSS JOIN (SELECT ARRAY_AGG(bank_id ORDER BY bank_id) AS bank_ids FROM banks) b
+CROSS JOIN (SELECT ARRAY_AGG(text_hash ORDER BY n) AS text_hashes FROM texts) h
+CROSS JOIN LATERAL (SELECT 1 + ((g * 2654435761) %% 5)::INTEGER AS rating) s;
+"""
+
+def ensure_database(dbname):
+    """Create the benchmark database if it does not exist"""
+    params = connection_params(dbname='postgres')
+    conn = psycopg2.connect(**params)
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1 FROM pg_database WHERE datname = %s;", (dbname,))
+            if not cur.fetchone():
+                cur.execute(f'CREATE DATABASE "{dbname}";')
+                print(f"📦 Created database {dbname}")
+    finally:
+        conn.close()
+
+def populate(db_pool, rows, years=3):
+    """Replace the benchmark data with `rows` synthetic reviews"""
+    started = time.time()
+    with db_pool.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("TRUNCATE reviews;")
+            for name in BANK_NAMES:
+                cur.execute(
+                    "INSERT INTO banks (bank_name, app_name) VALUES (%s, %s) ON CONFLICT (bank_name) DO NOTHING;",
+                    (name, f"{name} Mobile Banking")
+                )
+            # Batches keep each statement's transition tables bounded
+            batch = 500000
+            for first in range(1, rows + 1, batch):
+                last = min(first + batch - 1, rows)
+                cur.execute(SYNTHETIC_REVIEWS_SQL, {'first': first, 'last': last, 'years': years, 'prefix': 'bench:'})
+        conn.commit()
+
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("VACUUM ANALYZE reviews;")
+        finally:
+            conn.autocommit = False
+    print(f"📥 Loaded {rows} synthetic reviews in {time.time() - started:.1f}s")
+
+def plan_shape(node, depth=0):
+    """Indented node outline of a JSON plan, e.g. 'Seq Scan on reviews'"""
+    label = node['Node Type']
+    if 'Relation Name' in node:
+        label += f" on {node['Relation Name']}"
+    if 'Index Name' in node:
+        label += f" using {node['Index Name']}"
+    lines = ['  ' * depth + label]
+    for child in node.get('Plans', []):
+        lines.extend(plan_shape(child, depth + 1))
+    return lines
+
+def explain(cursor, query, repeats=5):
+    """Median execution time and the plan of the final run"""
+    timings = []
+    for _ in range(repeats):
+        cursor.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + query)
+        result = cursor.fetchone()[0][0]
+        timings.append(result['Execution Time'])
+
+    plan = result['Plan']
+    return {
+        'ms': round(statistics.median(timings), 3),
+        'planning_ms': round(result['Planning Time'], 3),
+        'shared_hit': plan.get('Shared Hit Blocks', 0),
+        'shared_read': plan.get('Shared Read Blocks', 0),
+        'shape': plan_shape(plan),
+    }
+
+def run_queries(db_pool, repeats=5):
+    with db_pool.cursor(dict_rows=False) as cur:
+        return {name: explain(cur, query, repeats) for name, query in QUERIES.items()}
+
+def write_cost(db_pool, rows=20000, repeats=3):
+    """Median ms per inserted row for a batch insert, rolled back afterwards"""
+    timings = []
+    with db_pool.connection() as conn:
+        for _ in range(repeats):
+            with conn.cursor() as cur:
+                started = time.perf_counter()
+                cur.execute(SYNTHETIC_REVIEWS_SQL, {'first': 1, 'last': rows, 'years': 3, 'prefix': 'bench-write:'})
+                timings.append((time.perf_counter() - started) * 1000 / rows)
+            conn.rollback()
+    return statistics.median(timings)
+
+def evaluate_index(db_pool, label, ddl, baseline, baseline_write, repeats, write_rows):
+    """Build one candidate, re-measure reads and writes, then drop it"""
+    name = f"idx_bench_{label}"
+    with db_pool.connection() as conn:
+        with conn.cursor() as cur:
+            started = time.perf_counter()
+            cur.execute(ddl.format(name=name))
+            build_ms = (time.perf_counter() - started) * 1000
+            cur.execute("ANALYZE reviews;")
+            cur.execute("SELECT pg_relation_size(%s::regclass);", (name,))
+            size_bytes = cur.fetchone()[0]
+        conn.commit()
+
+    try:
+        queries = run_queries(db_pool, repeats)
+        write_ms = write_cost(db_pool, write_rows)
+    finally:
+        with db_pool.connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(f"DROP INDEX IF EXISTS {name};")
+            conn.commit()
+
+    used_by = [q for q, result in queries.items() if any(name in line for line in result['shape'])]
+    return {
+        'index': label,
+        'ddl': ddl.format(name=name),
+        'build_ms': round(build_ms, 1),
+        'size_bytes': size_bytes,
+        'used_by': used_by,
+        'saved_ms': {q: round(baseline[q]['ms'] - queries[q]['ms'], 3) for q in used_by},
+        'write_overhead_ms_per_row': round(write_ms - baseline_write, 5),
+        'queries': queries,
+    }
+
+def run_benchmark(dbname=DEFAULT_DBNAME, rows=1000000, years=3, repeats=5, write_rows=20000,
+                  query_runs=1000, inserts=100000, skip_load=False, candidates=None):
+    """
+    Measure the query set, then each candidate index. An index pays for itself
+    when `query_runs` executions of every query it speeds up save more time
+    than `inserts` row inserts lose to maintaining it.
+    """
+    print("="*60)
+    print("QUERY PLAN BENCHMARK")
+    print("="*60)
+
+    ensure_database(dbname)
+    db_pool = get_pool(dbname=dbname)
+    migrate(db_pool)
+    if not skip_load:
+        populate(db_pool, rows, years)
+
+    baseline = run_queries(db_pool, repeats)
+    baseline_write = write_cost(db_pool, write_rows)
+    print(f"\nBaseline ({rows} reviews), median of {repeats} runs:")
+    for name, result in baseline.items():
+        print(f"  {name}: {result['ms']:.2f} ms  [{result['shape'][0].strip()}]")
+    print(f"  insert: {baseline_write * 1000:.1f} µs/row")
+
+    evaluations = []
+    for label, ddl in (candidates or CANDIDATE_INDEXES).items():
+        evaluation = evaluate_index(db_pool, label, ddl, baseline, baseline_write, repeats, write_rows)
+        benefit_ms = query_runs * sum(max(v, 0) for v in evaluation['saved_ms'].values())
+        cost_ms = inserts * max(evaluation['write_overhead_ms_per_row'], 0)
+        evaluation.update({'benefit_ms': round(benefit_ms, 1), 'cost_ms': round(cost_ms, 1),
+                           'pays_off': benefit_ms > cost_ms})
+        evaluations.append(evaluation)
+
+        status = '✅' if evaluation['pays_off'] else '❌'
+        print(f"\n  {status} {label} ({evaluation['size_bytes'] / 1e6:.1f} MB, built in {evaluation['build_ms']:.0f} ms)")
+        print(f"       used by: {', '.join(evaluation['used_by']) or 'no query'}")
+        for query, saved in evaluation['saved_ms'].items():
+            print(f"       {query}: {saved:+.2f} ms saved per run")
+        print(f"       write overhead: {evaluation['write_overhead_ms_per_row'] * 1000:+.1f} µs/row")
+        print(f"       benefit {benefit_ms:.0f} ms vs cost {cost_ms:.0f} ms "
+              f"per {query_runs} query runs / {inserts} inserts")
+
+    return {
+        'database': dbname,
+        'rows': rows,
+        'workload': {'query_runs': query_runs, 'inserts': inserts},
+        'baseline': {'queries': baseline, 'write_ms_per_row': round(baseline_write, 5)},
+        'candidates': evaluations,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN ANALYZE the analytics queries and evaluate candidate indexes")
+    parser.add_argument('--dbname', default=DEFAULT_DBNAME, help="benchmark database (created if missing; its reviews are replaced)")
+    parser.add_argument('--rows', type=int, default=1000000, help="synthetic reviews to generate")
+    parser.add_argument('--years', type=int, default=3, help="date span of the synthetic reviews")
+    parser.add_argument('--repeats', type=int, default=5, help="EXPLAIN ANALYZE runs per query (median is kept)")
+    parser.add_argument('--write-rows', type=int, default=20000, help="rows per write-cost probe")
+    parser.add_argument('--query-runs', type=int, default=1000, help="workload: executions of each query")
+    parser.add_argument('--inserts', type=int, default=100000, help="workload: rows inserted")
+    parser.add_argument('--index', action='append', choices=sorted(CANDIDATE_INDEXES),
+                        help="only evaluate these candidates (repeatable)")
+    parser.add_argument('--skip-load', action='store_true', help="reuse the data already in the benchmark database")
+    parser.add_argument('--output', help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    candidates = {k: CANDIDATE_INDEXES[k] for k in args.index} if args.index else None
+    results = run_benchmark(args.dbname, args.rows, args.years, args.repeats, args.write_rows,
+                            args.query_runs, args.inserts, args.skip_load, candidates)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, default=str)
+        print(f"💾 Results saved to: {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+# Save as: src/database/async_db.py
+"""
+Asynchronous PostgreSQL access for Task 3
+asyncio counterpart to DatabaseManager on an asyncpg connection pool, so
+independent analytics queries run concurrently instead of back to back
+"""
+
+import io
+import time
+import asyncio
+from datetime import date
+
+import asyncpg
+
+from bulk_load import (
+    CONFLICT_COLUMNS, CREATE_STAGING_SQL, HASH_STAGED_TEXTS_SQL, INSERT_BANKS_SQL,
+    INTERN_TEXTS_SQL, MOVE_REVIEWS_SQL, PARTITIONED_CONFLICT_COLUMNS, REVIEWS_PARTITIONED_SQL, STAGING_COLUMNS,
+    merge_reviews_sql, prepare_reviews
+)
+from db_connection import (
+    REVIEW_COLUMNS, REVIEW_DEFAULTS, SUMMARY_STATISTICS_SQL, build_trends_query, has_external_review_id,
+    move_review_sql, upsert_review_sql, with_fallback_review_id
+)
+from db_pool import connection_params
+import pipeline_metrics as metrics  # on sys.path via bulk_load
+from verify_queries import (
+    DATE_RANGE_SQL, RATING_BY_BANK_SQL, REVIEWS_PER_BANK_SQL, SENTIMENT_DISTRIBUTION_SQL
+)
+
+# Independent aggregates behind a bank report; run concurrently by get_report()
+REPORT_QUERIES = {
+    'summary': SUMMARY_STATISTICS_SQL,
+    'reviews_per_bank': REVIEWS_PER_BANK_SQL,
+    'rating_by_bank': RATING_BY_BANK_SQL,
+    'sentiment_distribution': SENTIMENT_DISTRIBUTION_SQL,
+    'date_range': DATE_RANGE_SQL,
+    'bank_summary': "SELECT * FROM bank_reviews_summary;",
+    'sentiment_analysis': "SELECT * FROM sentiment_analysis;",
+}
+
+def _as_date(value):
+    """asyncpg binds DATE parameters from date objects only"""
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value
+
+def _as_param(column, value):
+    if column == 'review_date':
+        return _as_date(value)
+    return value
+
+class AsyncDatabaseManager:
+    """
+    Manage PostgreSQL database operations from asyncio code.
+    Every coroutine borrows its own pooled connection, so calls can be
+    awaited together with asyncio.gather().
+    """
+
+    def __init__(self, dbname=None, user=None, password=None, host=None, port=None,
+                 min_size=1, max_size=10):
+        """Initialize database connection parameters"""
+        self.params = connection_params(dbname, user, password, host, port)
+        self.min_size = min_size
+        self.max_size = max_size
+        self.pool = None
+
+    async def connect(self):
+        """Open the async connection pool"""
+        try:
+            self.pool = await asyncpg.create_pool(
+                database=self.params['dbname'],
+                user=self.params['user'],
+                password=self.params['password'],
+                host=self.params['host'],
+                port=int(self.params['port']),
+                min_size=self.min_size,
+                max_size=self.max_size
+            )
+            print(f"✅ Connected to database: {self.params['dbname']}")
+            return True
+        except Exception as e:
+            print(f"❌ Database connection failed: {e}")
+            return False
+
+    async def disconnect(self):
+        """Close every pooled connection"""
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
+            print("✅ Database connection closed")
+
+    async def __aenter__(self):
+        if not await self.connect():
+            raise ConnectionError(f"Cannot connect to database {self.params['dbname']}")
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.disconnect()
+
+    async def execute_query(self, query, *args, fetch=False):
+        """
+        Execute SQL on a pooled connection ($1, $2, ... placeholders).
+        Returns a list of dict rows when fetching, otherwise True; False on error.
+        """
+        try:
+            async with self.pool.acquire() as conn:
+                if fetch:
+                    return [dict(row) for row in await conn.fetch(query, *args)]
+                await conn.execute(query, *args)
+            return True
+        except Exception as e:
+            print(f"❌ Query execution failed: {e}")
+            return False
+
+    async def insert_bank(self, bank_name, app_name):
+        """Insert a bank record"""
+        query = """
+        INSERT INTO banks (bank_name, app_name)
+        VALUES ($1, $2)
+        ON CONFLICT (bank_name) DO NOTHING
+        RETURNING bank_id;
+        """
+        result = await self.execute_query(query, bank_name, app_name, fetch=True)
+        return result[0]['bank_id'] if result else None
+
+    async def _conflict_columns(self, conn):
+        partitioned = await conn.fetchval(REVIEWS_PARTITIONED_SQL)
+        return PARTITIONED_CONFLICT_COLUMNS if partitioned else CONFLICT_COLUMNS
+
+    async def insert_review(self, review_data):
+        """Insert (or update, by external review ID) a review record"""
+        try:
+            async with self.pool.acquire() as conn:
+                if not has_external_review_id(review_data):
+                    bank_name = await conn.fetchval("SELECT bank_name FROM banks WHERE bank_id = $1;",
+                                                    review_data.get('bank_id'))
+                    review_data = with_fallback_review_id(review_data, bank_name)
+                conflict_columns = await self._conflict_columns(conn)
+                params = [_as_param(c, review_data.get(c, REVIEW_DEFAULTS.get(c))) for c in REVIEW_COLUMNS]
+                async with conn.transaction():
+                    if conflict_columns != CONFLICT_COLUMNS:
+                        await conn.execute(move_review_sql(numbered=True),
+                                           params[REVIEW_COLUMNS.index('review_date')],
+                                           params[REVIEW_COLUMNS.index('external_review_id')])
+                    return await conn.fetchval(upsert_review_sql(conflict_columns, numbered=True), *params)
+        except Exception as e:
+            print(f"❌ Review insert failed: {e}")
+            return None
+
+    async def get_bank_id(self, bank_name):
+        """Get bank_id by bank name"""
+        result = await self.execute_query("SELECT bank_id FROM banks WHERE bank_name = $1;", bank_name, fetch=True)
+        return result[0]['bank_id'] if result else None
+
+    async def load_reviews_from_csv(self, csv_path, chunk_size=100000):
+        """
+        Bulk load reviews from a CSV file: COPY into a staging table and upsert
+        on the external review ID, as DatabaseManager.load_reviews_from_csv does.
+        Returns the number of reviews inserted or updated, or None if the load failed.
+        """
+        import pandas as pd
+
+        try:
+            print(f"📊 Bulk loading reviews from {csv_path}")
+            skipped = 0
+            with metrics.timer('db_load', table='reviews', backend='asyncpg') as stage:
+                async with self.pool.acquire() as conn:
+                    async with conn.transaction():
+                        await conn.execute(CREATE_STAGING_SQL)
+                        for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+                            prepared, chunk_skipped = prepare_reviews(chunk)
+                            skipped += chunk_skipped
+                            if prepared.empty:
+                                continue
+                            buffer = io.BytesIO(prepared.to_csv(header=False, index=False).encode('utf-8'))
+                            await conn.copy_to_table('staging_reviews', source=buffer,
+                                                     columns=STAGING_COLUMNS, format='csv')
+                            stage.rows = (stage.rows or 0) + len(prepared)
+
+                        await conn.execute(INSERT_BANKS_SQL)
+                        await conn.execute(HASH_STAGED_TEXTS_SQL)
+                        await conn.execute(INTERN_TEXTS_SQL)
+                        conflict_columns = await self._conflict_columns(conn)
+                        moved = 0
+                        if conflict_columns != CONFLICT_COLUMNS:
+                            status = await conn.execute(MOVE_REVIEWS_SQL)
+                            moved = int(status.split()[-1])
+                        inserted, updated = await conn.fetchrow(merge_reviews_sql(conflict_columns))
+
+            print(f"✅ Data loading complete: {inserted} inserted, {updated + moved} updated, "
+                  f"{skipped} skipped")
+            return inserted + updated + moved
+        except Exception as e:
+            print(f"❌ Error loading CSV: {e}")
+            return None
+
+    async def get_summary_statistics(self):
+        """Get summary statistics from the trigger-maintained summary table"""
+        return await self.execute_query(SUMMARY_STATISTICS_SQL, fetch=True)
+
+    async def get_trends(self, granularity='month', bank=None, start_date=None, end_date=None):
+        """Review volume, rating and sentiment per bank and period, from the daily rollup"""
+        query, params = build_trends_query(granularity, bank, _as_date(start_date), _as_date(end_date),
+                                           numbered=True)
+        return await self.execute_query(query, *params, fetch=True)
+
+    async def get_report(self, queries=None):
+        """
+        Run independent report queries concurrently, one pooled connection each.
+        Returns {name: rows}, so the report takes about as long as its slowest query.
+        """
+        queries = queries or REPORT_QUERIES
+        started = time.time()
+        results = await asyncio.gather(*(self.execute_query(q, fetch=True) for q in queries.values()))
+        print(f"📊 Ran {len(queries)} report queries in {time.time() - started:.2f}s")
+        return dict(zip(queries, results))
+
+async def run_report():
+    """Print the concurrent bank report"""
+    async with AsyncDatabaseManager() as db:
+        report = await db.get_report()
+
+    for name, rows in report.items():
+        print(f"\n{name.replace('_', ' ').title()}:")
+        for row in rows or []:
+            print(f"   {row}")
+
+if __name__ == "__main__":
+    asyncio.run(run_report())
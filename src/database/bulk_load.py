@@ -0,0 +1,277 @@
+# Save as: src/database/bulk_load.py
+"""
+Bulk loading helpers for Task 3
+Streams reviews through COPY into a staging table, interns their texts in
+review_texts and upserts them in one statement keyed on the external (Play
+Store) review ID
+"""
+
+import io
+import os
+import sys
+import hashlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'monitoring'))
+import pipeline_metrics as metrics
+
+# Columns staged from the input, in COPY order
+STAGING_COLUMNS = [
+    'bank_name', 'review_text', 'rating', 'review_date', 'sentiment_label',
+    'sentiment_score', 'source', 'thumbs_up_count', 'reviewer_name', 'app_version',
+    'external_review_id'
+]
+
+# Values of the sentiment_label_t and review_source_t enums (migration 0007)
+SENTIMENT_LABELS = ('positive', 'neutral', 'negative')
+REVIEW_SOURCES = ('Google Play Store', 'Apple App Store', 'Other')
+
+# Columns refreshed when a review we already hold has changed
+UPSERT_COLUMNS = [
+    'bank_id', 'text_hash', 'rating', 'review_date', 'sentiment_label',
+    'sentiment_score', 'source', 'thumbs_up_count', 'reviewer_name', 'app_version'
+]
+
+CREATE_STAGING_SQL = """
+CREATE TEMP TABLE IF NOT EXISTS staging_reviews (
+    bank_name VARCHAR(100),
+    review_text TEXT,
+    rating INTEGER,
+    review_date DATE,
+    sentiment_label VARCHAR(20),
+    sentiment_score DECIMAL(5,4),
+    source VARCHAR(50),
+    thumbs_up_count INTEGER,
+    reviewer_name VARCHAR(100),
+    app_version VARCHAR(20),
+    external_review_id TEXT,
+    staged_seq BIGSERIAL,
+    text_hash BYTEA
+) ON COMMIT DROP;
+"""
+
+# Filled after COPY: convert_to is not immutable, so text_hash cannot be a
+# generated column
+HASH_STAGED_TEXTS_SQL = """
+UPDATE staging_reviews SET text_hash = sha256(convert_to(review_text, 'UTF8'));
+"""
+
+COPY_STAGING_SQL = f"COPY staging_reviews ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+
+INSERT_BANKS_SQL = """
+INSERT INTO banks (bank_name, app_name)
+SELECT DISTINCT bank_name, bank_name || ' Mobile Banking'
+FROM staging_reviews
+ON CONFLICT (bank_name) DO NOTHING;
+"""
+
+# Store each distinct staged text once; texts already known are left alone
+INTERN_TEXTS_SQL = """
+INSERT INTO review_texts (text_hash, review_text)
+SELECT DISTINCT ON (text_hash) text_hash, review_text
+FROM staging_reviews
+ON CONFLICT (text_hash) DO NOTHING;
+"""
+
+# Unique key of reviews: the external ID alone, or together with review_date
+# when reviews is range-partitioned (unique indexes must cover the partition key)
+CONFLICT_COLUMNS = ('external_review_id',)
+PARTITIONED_CONFLICT_COLUMNS = ('external_review_id', 'review_date')
+
+REVIEWS_PARTITIONED_SQL = "SELECT relkind = 'p' FROM pg_class WHERE oid = 'reviews'::regclass;"
+
+# Partitioned layout only: a review whose date changed no longer matches its
+# stored (external_review_id, review_date) key. It is updated in place first,
+# which moves it between partitions but keeps its review_id (and so its
+# themes); the merge then finds it unchanged.
+MOVE_REVIEWS_SQL = f"""
+UPDATE reviews r SET
+    {', '.join(f'{c} = s.{c}' for c in UPSERT_COLUMNS)}
+FROM (
+    SELECT DISTINCT ON (s.external_review_id)
+        b.bank_id, s.text_hash, s.rating, s.review_date,
+        s.sentiment_label::sentiment_label_t AS sentiment_label, s.sentiment_score,
+        s.source::review_source_t AS source,
+        s.thumbs_up_count, s.reviewer_name, s.app_version, s.external_review_id
+    FROM staging_reviews s
+    JOIN banks b ON b.bank_name = s.bank_name
+    ORDER BY s.external_review_id, s.staged_seq DESC
+) s
+WHERE r.external_review_id = s.external_review_id
+  AND r.review_date IS DISTINCT FROM s.review_date;
+"""
+
+def merge_reviews_sql(conflict_columns=CONFLICT_COLUMNS):
+    """
+    Upsert on the natural key: new reviews are inserted, changed ones updated and
+    unchanged ones left alone. DISTINCT ON keeps the last staged copy of each ID,
+    since one statement may not update the same row twice.
+    Inserts are told from updates by whether the ID existed beforehand: the
+    outer query sees reviews as it was before the statement. (xmax cannot be
+    read through a partitioned table.)
+    """
+    return f"""
+WITH upserted AS (
+    INSERT INTO reviews (
+        bank_id, text_hash, rating, review_date,
+        sentiment_label, sentiment_score, source,
+        thumbs_up_count, reviewer_name, app_version, external_review_id
+    )
+    SELECT DISTINCT ON (s.external_review_id)
+        b.bank_id, s.text_hash, s.rating, s.review_date,
+        s.sentiment_label::sentiment_label_t, s.sentiment_score, s.source::review_source_t,
+        s.thumbs_up_count, s.reviewer_name, s.app_version, s.external_review_id
+    FROM staging_reviews s
+    JOIN banks b ON b.bank_name = s.bank_name
+    ORDER BY s.external_review_id, s.staged_seq DESC
+    ON CONFLICT ({', '.join(conflict_columns)}) DO UPDATE SET
+        {', '.join(f'{c} = EXCLUDED.{c}' for c in UPSERT_COLUMNS)}
+    WHERE ({', '.join(f'reviews.{c}' for c in UPSERT_COLUMNS)})
+        IS DISTINCT FROM ({', '.join(f'EXCLUDED.{c}' for c in UPSERT_COLUMNS)})
+    RETURNING external_review_id
+)
+SELECT
+    COUNT(*) FILTER (WHERE NOT existed) AS inserted,
+    COUNT(*) FILTER (WHERE existed) AS updated
+FROM (
+    SELECT EXISTS (
+        SELECT 1 FROM reviews r WHERE r.external_review_id = u.external_review_id
+    ) AS existed
+    FROM upserted u
+) outcomes;
+"""
+
+MERGE_REVIEWS_SQL = merge_reviews_sql()
+
+def review_conflict_columns(cursor):
+    """Conflict target matching the current reviews layout"""
+    cursor.execute(REVIEWS_PARTITIONED_SQL)
+    return PARTITIONED_CONFLICT_COLUMNS if cursor.fetchone()[0] else CONFLICT_COLUMNS
+
+def fallback_review_id(bank, date, review):
+    """Stable external ID for a review without a Play Store reviewId: hash of bank, date and text"""
+    return 'sha1:' + hashlib.sha1(f"{bank}|{date}|{review}".encode('utf-8')).hexdigest()
+
+def external_review_ids(df):
+    """Play Store reviewId where present, otherwise a stable hash of bank, date and text"""
+    import pandas as pd
+
+    ids = df['review_id'] if 'review_id' in df.columns else pd.Series(None, index=df.index, dtype=object)
+    ids = ids.where(ids.notna(), '').astype(str).str.strip()
+    missing = ids == ''
+    if missing.any():
+        subset = df.loc[missing]
+        parts = [subset[c] if c in subset.columns else [''] * len(subset) for c in ('bank', 'date', 'review')]
+        ids.loc[missing] = [fallback_review_id(bank, date, review) for bank, date, review in zip(*parts)]
+    return ids
+
+def prepare_reviews(df):
+    """
+    Map a reviews DataFrame (Task 1/2 CSV layout) onto the staging columns.
+    Returns (prepared DataFrame, number of rows skipped).
+    """
+    import pandas as pd
+
+    def column(name, default):
+        if name in df.columns:
+            return df[name]
+        return pd.Series(default, index=df.index)
+
+    prepared = pd.DataFrame({
+        'bank_name': column('bank', None),
+        'review_text': column('review', None),
+        'rating': pd.to_numeric(column('rating', None), errors='coerce'),
+        'review_date': pd.to_datetime(column('date', None), errors='coerce').dt.strftime('%Y-%m-%d'),
+        'sentiment_label': column('sentiment_label', None).astype('string').str.strip().str.lower(),
+        'sentiment_score': pd.to_numeric(column('sentiment_score', 0.5), errors='coerce').fillna(0.5).round(4),
+        'source': column('source', 'Google Play Store').fillna('Google Play Store').astype(str).str[:50],
+        'thumbs_up_count': pd.to_numeric(column('thumbs_up', 0), errors='coerce').fillna(0),
+        'reviewer_name': column('reviewer_name', 'Anonymous').fillna('Anonymous').astype(str).str[:100],
+        'app_version': column('app_version', 'Unknown').fillna('Unknown').astype(str).str[:20],
+        'external_review_id': external_review_ids(df),
+    })
+
+    # Rows the database would reject: no bank, no text, or an invalid rating
+    valid = (
+        prepared['bank_name'].notna()
+        & prepared['review_text'].notna()
+        & (prepared['review_text'].astype(str).str.strip() != '')
+        & prepared['rating'].between(1, 5)
+    )
+    prepared = prepared[valid].copy()
+    prepared['bank_name'] = prepared['bank_name'].astype(str).str[:100]
+    prepared['rating'] = prepared['rating'].astype(int)
+    prepared['thumbs_up_count'] = prepared['thumbs_up_count'].astype(int)
+    # Map onto the enum values; anything else would fail the whole batch
+    prepared['sentiment_label'] = prepared['sentiment_label'].where(
+        prepared['sentiment_label'].isin(SENTIMENT_LABELS))
+    prepared['source'] = prepared['source'].where(prepared['source'].isin(REVIEW_SOURCES), 'Other')
+
+    return prepared[STAGING_COLUMNS], int((~valid).sum())
+
+def copy_frame(cursor, df, copy_sql=COPY_STAGING_SQL):
+    """Stream one DataFrame into the database with COPY ... FROM STDIN (CSV)"""
+    buffer = io.StringIO()
+    df.to_csv(buffer, header=False, index=False)
+    buffer.seek(0)
+    cursor.copy_expert(copy_sql, buffer)
+
+def bulk_load_reviews(connection, frames):
+    """
+    Load reviews in one transaction: COPY every frame into a temporary
+    staging table, create any missing banks, intern the distinct texts, then upsert into reviews with a
+    single INSERT ... ON CONFLICT keyed on external_review_id, so reruns only
+    write new or changed reviews. `frames` is a DataFrame or an iterable of
+    DataFrames (e.g. pd.read_csv(..., chunksize=...)).
+    Returns a dict of inserted / updated / unchanged / skipped counts.
+    """
+    import pandas as pd
+
+    if isinstance(frames, pd.DataFrame):
+        frames = [frames]
+
+    staged_count = 0
+    skipped_count = 0
+
+    with metrics.timer('db_load', table='reviews', backend='postgres') as stage:
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(CREATE_STAGING_SQL)
+
+                for frame in frames:
+                    prepared, skipped = prepare_reviews(frame)
+                    skipped_count += skipped
+                    if prepared.empty:
+                        continue
+                    copy_frame(cursor, prepared)
+                    staged_count += len(prepared)
+                    print(f"  Staged {staged_count} reviews...")
+                stage.rows = staged_count
+
+                cursor.execute(INSERT_BANKS_SQL)
+                cursor.execute(HASH_STAGED_TEXTS_SQL)
+                cursor.execute(INTERN_TEXTS_SQL)
+                conflict_columns = review_conflict_columns(cursor)
+                moved_count = 0
+                if conflict_columns != CONFLICT_COLUMNS:
+                    cursor.execute(MOVE_REVIEWS_SQL)
+                    moved_count = cursor.rowcount
+                cursor.execute(merge_reviews_sql(conflict_columns))
+                inserted_count, updated_count = cursor.fetchone()
+                # Moved reviews were fully updated already, so the merge left them alone
+                updated_count += moved_count
+
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+
+    for outcome, rows in (('inserted', inserted_count), ('updated', updated_count),
+                          ('unchanged', staged_count - inserted_count - updated_count), ('skipped', skipped_count)):
+        metrics.count('db_load_rows', rows, table='reviews', backend='postgres', outcome=outcome)
+
+    return {
+        'inserted': inserted_count,
+        'updated': updated_count,
+        'unchanged': staged_count - inserted_count - updated_count,
+        'skipped': skipped_count
+    }
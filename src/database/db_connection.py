@@ -3,41 +3,179 @@
 PostgreSQL Database Connection Utilities for Task 3
 """
 
-import psycopg2
-from psycopg2 import sql
-from psycopg2.extras import RealDictCursor
-import pandas as pd
 import os
-from dotenv import load_dotenv
 import sys
+import time
 
-# Load environment variables from .env file
-load_dotenv()
+from bulk_load import CONFLICT_COLUMNS, bulk_load_reviews, fallback_review_id, review_conflict_columns
+from db_pool import connection_params, get_pool
+from migrate import migrate
+from parallel_load import parallel_load_reviews
+from partitioning import ensure_partitions_if_partitioned
+from query_cache import QueryCache, is_cacheable, tables_written
+from review_search import build_search_query, enable_trigram_index
+from review_themes import build_theme_breakdown_query, bulk_load_review_themes
+from streaming_export import export_reviews
+
+# Periods the daily rollup can be aggregated to (DATE_TRUNC field names)
+TREND_GRANULARITIES = ('day', 'week', 'month', 'quarter', 'year')
+
+# Columns written by insert_review, in parameter order
+REVIEW_COLUMNS = [
+    'bank_id', 'review_text', 'rating', 'review_date',
+    'sentiment_label', 'sentiment_score', 'source',
+    'thumbs_up_count', 'reviewer_name', 'app_version', 'external_review_id'
+]
+REVIEW_DEFAULTS = {'source': 'Google Play Store', 'thumbs_up_count': 0}
+
+SUMMARY_STATISTICS_SQL = """
+SELECT 
+    (SELECT COUNT(*) FROM banks) as total_banks,
+    COALESCE(SUM(total_reviews), 0) as total_reviews,
+    SUM(rating_sum)::NUMERIC / NULLIF(SUM(rated_reviews), 0) as overall_avg_rating,
+    COUNT(*) FILTER (WHERE total_reviews > 0) as banks_with_reviews
+FROM bank_review_stats;
+"""
+
+def has_external_review_id(review_data):
+    return bool(str(review_data.get('external_review_id') or '').strip())
+
+def with_fallback_review_id(review_data, bank_name):
+    """
+    review_data with the bulk loader's fallback external ID filled in, so
+    single inserts of reviews without a Play Store ID stay idempotent
+    """
+    if has_external_review_id(review_data):
+        return review_data
+    return {**review_data, 'external_review_id': fallback_review_id(
+        bank_name or '', review_data.get('review_date'), review_data.get('review_text'))}
+
+def _placeholder(position, numbered):
+    """psycopg2 (%s) or asyncpg ($1, $2, ...) parameter marker"""
+    return f"${position}" if numbered else "%s"
+
+def upsert_review_sql(conflict_columns, numbered=False, intern_text=True):
+    """
+    Single-review upsert on the external review ID (see review_conflict_columns).
+    With `intern_text` the text is stored in review_texts in the same statement
+    and reviews gets its hash. Parameters are named after REVIEW_COLUMNS
+    (%(column)s), or numbered in that order.
+    """
+    def param(column):
+        return f"${REVIEW_COLUMNS.index(column) + 1}" if numbered else f"%({column})s"
+    
+    columns, values, interned = list(REVIEW_COLUMNS), [param(c) for c in REVIEW_COLUMNS], ""
+    if intern_text:
+        text_hash = f"sha256(convert_to({param('review_text')}, 'UTF8'))"
+        position = REVIEW_COLUMNS.index('review_text')
+        columns[position], values[position] = 'text_hash', text_hash
+        interned = f"""WITH interned AS (
+            INSERT INTO review_texts (text_hash, review_text)
+            VALUES ({text_hash}, {param('review_text')})
+            ON CONFLICT (text_hash) DO NOTHING
+        )"""
+    updates = ',\n            '.join(f"{c} = EXCLUDED.{c}" for c in columns[:-1])
+    return f"""
+        {interned}
+        INSERT INTO reviews (
+            {', '.join(columns)}
+        ) VALUES ({', '.join(values)})
+        ON CONFLICT ({', '.join(conflict_columns)}) DO UPDATE SET
+            {updates}
+        RETURNING review_id;
+        """
+
+def move_review_sql(numbered=False):
+    """
+    Partitioned layout: re-date a stored review in place (keeping its review_id)
+    before the upsert, which would otherwise miss it on the (external ID, date)
+    key. Parameters are named review_date and external_review_id, or
+    numbered in that order.
+    """
+    review_date, external_id = ("$1", "$2") if numbered else ("%(review_date)s", "%(external_review_id)s")
+    return f"""
+        UPDATE reviews SET review_date = {review_date}
+        WHERE external_review_id = {external_id}
+          AND review_date IS DISTINCT FROM {review_date};
+        """
+
+def build_trends_query(granularity='month', bank=None, start_date=None, end_date=None, numbered=False):
+    """
+    Trend query over the daily rollup table (one row per bank and day);
+    returns (query, params)
+    """
+    if granularity not in TREND_GRANULARITIES:
+        raise ValueError(f"granularity must be one of {', '.join(TREND_GRANULARITIES)}")
+    
+    conditions = []
+    params = [granularity]
+    for condition, value in (("b.bank_name = {}", bank), ("d.day >= {}", start_date), ("d.day <= {}", end_date)):
+        if value:
+            params.append(value)
+            conditions.append(condition.format(_placeholder(len(params), numbered)))
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    
+    query = f"""
+    SELECT 
+        b.bank_name,
+        DATE_TRUNC({_placeholder(1, numbered)}, d.day)::DATE as period_start,
+        SUM(d.review_count)::BIGINT as review_count,
+        ROUND(SUM(d.rating_sum)::NUMERIC / NULLIF(SUM(d.rated_reviews), 0), 2) as avg_rating,
+        SUM(d.rating_1)::BIGINT as rating_1,
+        SUM(d.rating_2)::BIGINT as rating_2,
+        SUM(d.rating_3)::BIGINT as rating_3,
+        SUM(d.rating_4)::BIGINT as rating_4,
+        SUM(d.rating_5)::BIGINT as rating_5,
+        SUM(d.positive_count)::BIGINT as positive_count,
+        SUM(d.negative_count)::BIGINT as negative_count,
+        SUM(d.neutral_count)::BIGINT as neutral_count,
+        ROUND(SUM(d.sentiment_score_sum) / NULLIF(SUM(d.scored_reviews), 0), 4) as avg_sentiment_score
+    FROM review_daily_rollup d
+    JOIN banks b ON d.bank_id = b.bank_id
+    {where}
+    GROUP BY b.bank_name, period_start
+    ORDER BY b.bank_name, period_start;
+    """
+    return query, params
 
 class DatabaseManager:
-    """Manage PostgreSQL database operations"""
+    """
+    Manage PostgreSQL database operations.
+    Connections come from a shared pool and every operation uses its own
+    cursor, so one manager can be used from several threads at once.
+    Passing `cache_ttl` (seconds) enables an in-process cache of read results,
+    invalidated by table whenever this manager writes.
+    """
     
-    def __init__(self, dbname=None, user=None, password=None, host=None, port=None):
+    def __init__(self, dbname=None, user=None, password=None, host=None, port=None,
+                 minconn=1, maxconn=10, cache_ttl=None, cache_size=256):
         """Initialize database connection parameters"""
-        self.dbname = dbname or os.getenv('DB_NAME', 'bank_reviews')
-        self.user = user or os.getenv('DB_USER', 'postgres')
-        self.password = password or os.getenv('DB_PASSWORD', '')
-        self.host = host or os.getenv('DB_HOST', 'localhost')
-        self.port = port or os.getenv('DB_PORT', '5432')
-        self.connection = None
-        self.cursor = None
+        params = connection_params(dbname, user, password, host, port)
+        self.dbname = params['dbname']
+        self.user = params['user']
+        self.password = params['password']
+        self.host = params['host']
+        self.port = params['port']
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.pool = None
+        self.cache = QueryCache(ttl=cache_ttl, maxsize=cache_size) if cache_ttl else None
         
     def connect(self):
-        """Establish connection to PostgreSQL database"""
+        """Attach to the connection pool for this database"""
         try:
-            self.connection = psycopg2.connect(
+            self.pool = get_pool(
+                minconn=self.minconn,
+                maxconn=self.maxconn,
                 dbname=self.dbname,
                 user=self.user,
                 password=self.password,
                 host=self.host,
                 port=self.port
             )
-            self.cursor = self.connection.cursor(cursor_factory=RealDictCursor)
+            # Fail fast if the database is unreachable
+            with self.pool.connection():
+                pass
             print(f"✅ Connected to database: {self.dbname}")
             return True
         except Exception as e:
@@ -45,41 +183,66 @@ class DatabaseManager:
             return False
     
     def disconnect(self):
-        """Close database connection"""
-        if self.cursor:
-            self.cursor.close()
-        if self.connection:
-            self.connection.close()
+        """Release this manager's hold on the pool (connections stay pooled for reuse)"""
+        if self.pool:
+            self.pool = None
             print("✅ Database connection closed")
     
+    def connection(self):
+        """Context-managed connection checkout for multi-statement work"""
+        return self.pool.connection()
+    
     def execute_query(self, query, params=None, fetch=False):
-        """Execute SQL query"""
+        """
+        Execute SQL query on a pooled connection with its own cursor.
+        With the cache enabled, read results are served from it and writes
+        invalidate the cached results of the tables they touch.
+        """
+        cacheable = fetch and self.cache is not None and is_cacheable(query)
+        if cacheable:
+            rows = self.cache.get(query, params)
+            if rows is not None:
+                return rows
+        
         try:
-            self.cursor.execute(query, params or ())
-            if fetch:
-                return self.cursor.fetchall()
-            self.connection.commit()
-            return True
+            started = time.perf_counter()
+            with self.pool.cursor(commit=True) as cursor:
+                cursor.execute(query, params or ())
+                result = cursor.fetchall() if fetch else True
+            
+            if cacheable:
+                self.cache.put(query, params, result, time.perf_counter() - started)
+            elif self.cache is not None:
+                self.invalidate_cache(*tables_written(query))
+            return result
         except Exception as e:
-            self.connection.rollback()
             print(f"❌ Query execution failed: {e}")
             return False
     
-    def create_tables(self):
-        """Create database tables from schema.sql"""
+    def invalidate_cache(self, *tables):
+        """Drop cached results reading `tables` (or everything when none are given)"""
+        if self.cache is None:
+            return
+        if tables:
+            self.cache.invalidate(*tables)
+        else:
+            self.cache.clear()
+    
+    def cache_stats(self):
+        """Hit / miss / latency counters of the query cache (None when disabled)"""
+        return self.cache.stats() if self.cache is not None else None
+    
+    def create_tables(self, target=None):
+        """
+        Bring the schema up to date by applying pending migrations.
+        Existing tables and data are never dropped.
+        """
         try:
-            # Read schema file
-            schema_path = os.path.join(os.path.dirname(__file__), 'schema.sql')
-            with open(schema_path, 'r') as f:
-                schema_sql = f.read()
-            
-            # Execute schema
-            self.cursor.execute(schema_sql)
-            self.connection.commit()
-            print("✅ Database tables created successfully")
+            migrate(self.pool, target=target)
+            print("✅ Database schema is up to date")
             return True
         except Exception as e:
-            print(f"❌ Failed to create tables: {e}")
+            print(f"❌ Failed to migrate schema: {e}")
             return False
     
     def insert_bank(self, bank_name, app_name):
@@ -96,28 +259,18 @@ class DatabaseManager:
         return None
     
     def insert_review(self, review_data):
-        """Insert a review record"""
-        query = """
-        INSERT INTO reviews (
-            bank_id, review_text, rating, review_date, 
-            sentiment_label, sentiment_score, source,
-            thumbs_up_count, reviewer_name, app_version
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        RETURNING review_id;
-        """
-        params = (
-            review_data.get('bank_id'),
-            review_data.get('review_text'),
-            review_data.get('rating'),
-            review_data.get('review_date'),
-            review_data.get('sentiment_label'),
-            review_data.get('sentiment_score'),
-            review_data.get('source', 'Google Play Store'),
-            review_data.get('thumbs_up_count', 0),
-            review_data.get('reviewer_name'),
-            review_data.get('app_version')
-        )
-        result = self.execute_query(query, params, fetch=True)
+        """Insert (or update, by external review ID) a review record"""
+        if not has_external_review_id(review_data):
+            bank = self.execute_query("SELECT bank_name FROM banks WHERE bank_id = %s;",
+                                      (review_data.get('bank_id'),), fetch=True)
+            review_data = with_fallback_review_id(review_data, bank[0]['bank_name'] if bank else None)
+        with self.pool.cursor(dict_rows=False) as cursor:
+            conflict_columns = review_conflict_columns(cursor)
+        params = {c: review_data.get(c, REVIEW_DEFAULTS.get(c)) for c in REVIEW_COLUMNS}
+        if conflict_columns != CONFLICT_COLUMNS:
+            self.execute_query(move_review_sql(), params)
+        result = self.execute_query(upsert_review_sql(conflict_columns), params, fetch=True)
+        self.invalidate_cache('reviews')
         if result:
             return result[0]['review_id']
         return None
@@ -128,96 +281,166 @@ class DatabaseManager:
         result = self.execute_query(query, (bank_name,), fetch=True)
         return result[0]['bank_id'] if result else None
     
-    def load_reviews_from_csv(self, csv_path):
-        """Load reviews from CSV file into database"""
+    def load_reviews_from_csv(self, csv_path, chunk_size=100000):
+        """
+        Bulk load reviews from CSV file into database.
+        Rows are streamed with COPY into a staging table and upserted in one
+        statement on the external review ID, so rerunning a load only writes
+        new or changed reviews.
+        Returns the number of reviews inserted or updated (0 when nothing
+        changed), or None if the load failed.
+        """
+        import pandas as pd
+        
         try:
-            # Read CSV file
-            df = pd.read_csv(csv_path)
-            print(f"📊 Loading {len(df)} reviews from {csv_path}")
+            print(f"📊 Bulk loading reviews from {csv_path}")
+            chunks = pd.read_csv(csv_path, chunksize=chunk_size)
+            with self.pool.connection() as conn:
+                ensure_partitions_if_partitioned(conn)
+                counts = bulk_load_reviews(conn, chunks)
+            self.invalidate_cache('reviews', 'banks')
             
-            inserted_count = 0
-            skipped_count = 0
+            print(f"✅ Data loading complete: {counts['inserted']} inserted, {counts['updated']} updated, "
+                  f"{counts['unchanged']} unchanged, {counts['skipped']} skipped")
+            return counts['inserted'] + counts['updated']
             
-            for _, row in df.iterrows():
-                # Get or create bank
-                bank_name = row.get('bank')
-                if not bank_name:
-                    skipped_count += 1
-                    continue
-                
-                bank_id = self.get_bank_id(bank_name)
-                if not bank_id:
-                    # Insert new bank
-                    bank_id = self.insert_bank(bank_name, f"{bank_name} Mobile Banking")
-                
-                # Prepare review data
-                review_data = {
-                    'bank_id': bank_id,
-                    'review_text': row.get('review', ''),
-                    'rating': int(row.get('rating', 0)),
-                    'review_date': row.get('date'),
-                    'sentiment_label': row.get('sentiment_label'),
-                    'sentiment_score': float(row.get('sentiment_score', 0.5)) if pd.notna(row.get('sentiment_score')) else 0.5,
-                    'source': row.get('source', 'Google Play Store'),
-                    'thumbs_up_count': row.get('thumbs_up', 0) if 'thumbs_up' in row else 0,
-                    'reviewer_name': row.get('reviewer_name', 'Anonymous'),
-                    'app_version': row.get('app_version', 'Unknown')
-                }
-                
-                # Insert review
-                if self.insert_review(review_data):
-                    inserted_count += 1
-                else:
-                    skipped_count += 1
-                
-                # Progress indicator
-                if inserted_count % 100 == 0:
-                    print(f"  Processed {inserted_count} reviews...")
+        except Exception as e:
+            print(f"❌ Error loading CSV: {e}")
+            return None
+    
+    def load_reviews_parallel(self, csv_path, workers=4, by='bank', freq='M'):
+        """Load a large CSV as concurrent partitions over pooled connections"""
+        try:
+            summary = parallel_load_reviews(csv_path, workers=workers, by=by, freq=freq, db_pool=self.pool)
+            self.invalidate_cache('reviews', 'banks')
+            return summary['inserted'] + summary['updated']
+        except Exception as e:
+            print(f"❌ Parallel load failed: {e}")
+            return 0
+    
+    def load_review_themes(self, csv_path, chunk_size=100000):
+        """
+        Bulk load review-level theme assignments (review_id, theme, score) from
+        the thematic stage. Each review's stored theme set is replaced by the
+        staged one; rows for reviews not in the database are counted and skipped.
+        """
+        import pandas as pd
+        
+        try:
+            print(f"📊 Bulk loading review themes from {csv_path}")
+            chunks = pd.read_csv(csv_path, chunksize=chunk_size)
+            with self.pool.connection() as conn:
+                counts = bulk_load_review_themes(conn, chunks)
+            self.invalidate_cache('review_themes')
             
-            print(f"✅ Data loading complete: {inserted_count} inserted, {skipped_count} skipped")
-            return inserted_count
+            print(f"✅ Theme loading complete: {counts['written']} written, {counts['removed']} removed, "
+                  f"{counts['unmatched']} unmatched reviews, {counts['skipped']} skipped")
+            return counts['written']
             
         except Exception as e:
-            print(f"❌ Error loading CSV: {e}")
+            print(f"❌ Error loading review themes: {e}")
             return 0
     
+    def get_theme_breakdown(self, theme=None, bank=None, start_date=None, end_date=None):
+        """Theme review counts, negative share and share of the bank's reviews over a date window"""
+        query, params = build_theme_breakdown_query(theme, bank, start_date, end_date)
+        return self.execute_query(query, params, fetch=True)
+    
     def get_summary_statistics(self):
-        """Get summary statistics from database"""
+        """Get summary statistics from the trigger-maintained summary table (O(banks))"""
+        return self.execute_query(SUMMARY_STATISTICS_SQL, fetch=True)
+    
+    def rebuild_summary_tables(self):
+        """Recompute the summary tables from scratch (repair after manual edits)"""
+        result = self.execute_query("SELECT rebuild_review_stats();")
+        self.invalidate_cache('reviews')
+        return result
+    
+    def get_trends(self, granularity='month', bank=None, start_date=None, end_date=None):
+        """
+        Review volume, rating and sentiment per bank and period, aggregated from
+        the daily rollup table (one row per bank and day) rather than from reviews.
+        """
+        query, params = build_trends_query(granularity, bank, start_date, end_date)
+        return self.execute_query(query, params, fetch=True)
+    
+    def get_restated_days(self, since):
+        """(bank, day) buckets changed after `since` - e.g. by late-arriving reviews"""
         query = """
-        SELECT 
-            (SELECT COUNT(*) FROM banks) as total_banks,
-            (SELECT COUNT(*) FROM reviews) as total_reviews,
-            (SELECT AVG(rating) FROM reviews) as overall_avg_rating,
-            (SELECT COUNT(DISTINCT bank_id) FROM reviews) as banks_with_reviews;
+        SELECT b.bank_name, d.day, d.review_count, d.updated_at
+        FROM review_daily_rollup d
+        JOIN banks b ON d.bank_id = b.bank_id
+        WHERE d.updated_at > %s
+        ORDER BY d.day, b.bank_name;
+        """
+        return self.execute_query(query, (since,), fetch=True)
+    
+    def rebuild_daily_rollup(self, start_date=None, end_date=None):
+        """Recompute the daily rollup for a date range (default: all days)"""
+        result = self.execute_query("SELECT rebuild_review_daily_rollup(%s, %s);", (start_date, end_date))
+        self.invalidate_cache('reviews')
+        return result
+    
+    def search_reviews(self, text, mode='websearch', bank=None, start_date=None, end_date=None,
+                       min_rating=None, max_rating=None, sentiment=None, page=1, page_size=20):
+        """
+        Full-text search over review text, best matches first.
+        Returns {'total', 'page', 'page_size', 'results'}; each result has a
+        highlighted snippet. mode='substring' needs enable_substring_search().
         """
-        return self.execute_query(query, fetch=True)
+        query, params = build_search_query(
+            text, mode, bank=bank, start_date=start_date, end_date=end_date,
+            min_rating=min_rating, max_rating=max_rating, sentiment=sentiment,
+            limit=page_size, offset=(page - 1) * page_size
+        )
+        rows = self.execute_query(query, params, fetch=True) or []
+        return {
+            'total': rows[0]['total_matches'] if rows else 0,
+            'page': page,
+            'page_size': page_size,
+            'results': rows
+        }
+    
+    def prune_review_texts(self):
+        """Delete stored texts no review references any more; returns how many"""
+        result = self.execute_query("SELECT prune_review_texts() as removed;", fetch=True)
+        self.invalidate_cache('review_texts')
+        return result[0]['removed'] if result else 0
     
-    def export_to_csv(self, output_path):
-        """Export all reviews to CSV"""
+    def enable_substring_search(self):
+        """Install pg_trgm and the trigram index used by mode='substring'"""
+        return enable_trigram_index(self.pool)
+    
+    def export_to_csv(self, output_path, bank=None, start_date=None, end_date=None,
+                      columns=None, file_format=None):
+        """
+        Export reviews to CSV (or Parquet for a .parquet path).
+        Rows are streamed from the server, so memory use does not grow with the table.
+        """
         try:
-            query = """
-            SELECT 
-                b.bank_name,
-                r.review_text,
-                r.rating,
-                r.review_date,
-                r.sentiment_label,
-                r.sentiment_score,
-                r.source,
-                r.created_at
-            FROM reviews r
-            JOIN banks b ON r.bank_id = b.bank_id
-            ORDER BY r.review_date DESC;
-            """
-            
-            df = pd.read_sql_query(query, self.connection)
-            df.to_csv(output_path, index=False)
-            print(f"✅ Data exported to {output_path} ({len(df)} records)")
+            row_count = export_reviews(
+                self.pool, output_path, file_format=file_format, columns=columns,
+                bank=bank, start_date=start_date, end_date=end_date
+            )
+            print(f"✅ Data exported to {output_path} ({row_count} records)")
             return output_path
         except Exception as e:
             print(f"❌ Export failed: {e}")
             return None
 
+def create_manager(backend=None, **kwargs):
+    """
+    Database manager for the configured backend: 'postgres' (default) or
+    'duckdb' for the embedded engine (DB_BACKEND in .env selects it)
+    """
+    backend = backend or os.getenv('DB_BACKEND', 'postgres')
+    if backend == 'duckdb':
+        from duckdb_backend import DuckDBManager
+        return DuckDBManager(**kwargs)
+    if backend != 'postgres':
+        raise ValueError(f"Unknown database backend: {backend}")
+    return DatabaseManager(**kwargs)
+
 # Helper function for quick setup
 def setup_database():
     """Quick setup function for Task 3"""
@@ -226,13 +449,14 @@ def setup_database():
     print("="*60)
     
     # Create database manager
-    db = DatabaseManager()
+    db = create_manager()
     
     if not db.connect():
         print("\n⚠️  Connection failed. Please check:")
         print("   1. PostgreSQL service is running")
         print("   2. Database 'bank_reviews' exists")
         print("   3. Correct credentials in .env file")
+        print("   (or set DB_BACKEND=duckdb to run without a server)")
         return False
     
     # Create tables
@@ -251,17 +475,18 @@ def setup_database():
         '../../data/raw/reviews.csv'
     ]
     
+    # Load the first file found only: the raw CSV shares the external IDs of
+    # the sentiment output but has no sentiment columns, so falling through to
+    # it would blank the stored sentiment
     data_loaded = False
-    for csv_path in csv_paths:
-        if os.path.exists(csv_path):
-            print(f"Found data file: {csv_path}")
-            inserted = db.load_reviews_from_csv(csv_path)
-            if inserted > 0:
-                data_loaded = True
-                break
+    csv_path = next((path for path in csv_paths if os.path.exists(path)), None)
+    if csv_path:
+        print(f"Found data file: {csv_path}")
+        # 0 is a successful rerun with nothing new; None is a failed load
+        data_loaded = db.load_reviews_from_csv(csv_path) is not None
     
     if not data_loaded:
-        print("⚠️  No data files found. Creating sample data...")
+        print("⚠️  No data loaded. Creating sample data..." if csv_path else "⚠️  No data files found. Creating sample data...")
         # Create minimal sample data
         db.insert_bank('Commercial Bank of Ethiopia', 'CBE Mobile Banking')
         db.insert_bank('Bank of Abyssinia', 'BOA Mobile Banking')
@@ -0,0 +1,133 @@
+# Save as: src/database/db_pool.py
+"""
+Pooled PostgreSQL connections for Task 3
+Thread-safe connection checkout with health checks, shared by every DB entry point
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions, pool as pg_pool
+from psycopg2.extras import RealDictCursor
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+def connection_params(dbname=None, user=None, password=None, host=None, port=None):
+    """Connection parameters, falling back to the .env settings"""
+    return {
+        'dbname': dbname or os.getenv('DB_NAME', 'bank_reviews'),
+        'user': user or os.getenv('DB_USER', 'postgres'),
+        'password': password or os.getenv('DB_PASSWORD', ''),
+        'host': host or os.getenv('DB_HOST', 'localhost'),
+        'port': port or os.getenv('DB_PORT', '5432'),
+    }
+
+class ConnectionPool:
+    """
+    Bounded pool of PostgreSQL connections.
+    Checkouts block (up to `timeout` seconds) when all connections are in use,
+    and stale or broken connections are replaced before being handed out.
+    """
+
+    def __init__(self, minconn=1, maxconn=10, timeout=30, health_check=True, **params):
+        self.params = connection_params(**params)
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.health_check = health_check
+        self._pool = pg_pool.ThreadedConnectionPool(minconn, maxconn, **self.params)
+        self._slots = threading.BoundedSemaphore(maxconn)
+
+    def _healthy(self, conn):
+        """Cheap liveness probe for an idle connection"""
+        if conn.closed:
+            return False
+        if not self.health_check:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1;")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _checkout(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise pg_pool.PoolError(f"No connection available within {self.timeout}s")
+        try:
+            conn = self._pool.getconn()
+            if not self._healthy(conn):
+                # Discard the broken connection and open a fresh one
+                self._pool.putconn(conn, close=True)
+                conn = self._pool.getconn()
+            return conn
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _checkin(self, conn):
+        try:
+            if not conn.closed and conn.status != extensions.STATUS_READY:
+                conn.rollback()
+            self._pool.putconn(conn, close=bool(conn.closed))
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection; uncommitted work is rolled back on return"""
+        conn = self._checkout()
+        try:
+            yield conn
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            self._checkin(conn)
+
+    @contextmanager
+    def cursor(self, dict_rows=True, commit=False):
+        """Check out a connection with its own cursor for one operation"""
+        with self.connection() as conn:
+            cursor_factory = RealDictCursor if dict_rows else None
+            with conn.cursor(cursor_factory=cursor_factory) as cur:
+                yield cur
+            if commit:
+                conn.commit()
+
+    @property
+    def closed(self):
+        return self._pool.closed
+
+    def close(self):
+        """Close every pooled connection"""
+        self._pool.closeall()
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pool(minconn=1, maxconn=10, **params):
+    """
+    Process-wide pool shared by all callers using the same connection
+    parameters and pool size; a caller asking for a different size (e.g. a
+    parallel load sized to its workers) gets its own pool
+    """
+    params = connection_params(**params)
+    key = (minconn, maxconn) + tuple(sorted(params.items()))
+    with _pools_lock:
+        if key not in _pools or _pools[key].closed:
+            _pools[key] = ConnectionPool(minconn=minconn, maxconn=maxconn, **params)
+        return _pools[key]
+
+def close_pools():
+    """Close every shared pool (e.g. at interpreter shutdown)"""
+    with _pools_lock:
+        for db_pool in _pools.values():
+            db_pool.close()
+        _pools.clear()
@@ -0,0 +1,376 @@
+# Save as: src/database/duckdb_backend.py
+"""
+Embedded DuckDB backend for Task 3
+Runs the review schema, views and summary queries in-process on DuckDB's
+columnar engine, either over loaded tables or directly over the Parquet/CSV
+outputs - no PostgreSQL server needed
+"""
+
+import os
+
+from bulk_load import prepare_reviews, STAGING_COLUMNS
+import pipeline_metrics as metrics  # on sys.path via bulk_load
+from db_connection import (
+    REVIEW_COLUMNS, REVIEW_DEFAULTS, SUMMARY_STATISTICS_SQL, build_trends_query, has_external_review_id,
+    upsert_review_sql, with_fallback_review_id
+)
+from streaming_export import DEFAULT_COLUMNS, EXPORT_COLUMNS
+
+DEFAULT_DATABASE = os.getenv('DUCKDB_PATH', ':memory:')
+
+TABLES_SQL = """
+CREATE SEQUENCE IF NOT EXISTS banks_seq;
+CREATE SEQUENCE IF NOT EXISTS reviews_seq;
+
+CREATE TABLE IF NOT EXISTS banks (
+    bank_id INTEGER PRIMARY KEY DEFAULT nextval('banks_seq'),
+    bank_name VARCHAR NOT NULL UNIQUE,
+    app_name VARCHAR,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS reviews (
+    review_id INTEGER PRIMARY KEY DEFAULT nextval('reviews_seq'),
+    bank_id INTEGER,
+    review_text VARCHAR NOT NULL,
+    rating SMALLINT CHECK (rating >= 1 AND rating <= 5),
+    review_date DATE,
+    sentiment_label VARCHAR,
+    sentiment_score DOUBLE,
+    source VARCHAR DEFAULT 'Google Play Store',
+    thumbs_up_count INTEGER DEFAULT 0,
+    reviewer_name VARCHAR,
+    app_version VARCHAR,
+    external_review_id VARCHAR UNIQUE,
+    scraped_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+# Views over reviews with the same names and columns as the PostgreSQL schema.
+# PostgreSQL keeps stats and rollups in trigger-maintained tables; DuckDB
+# aggregates column chunks fast enough to compute them on read. Review text
+# stays inline: DuckDB's dictionary compression already stores repeats once.
+VIEWS_SQL = """
+CREATE OR REPLACE VIEW review_details AS
+SELECT * FROM reviews;
+
+CREATE OR REPLACE VIEW bank_review_stats AS
+SELECT
+    b.bank_id,
+    COUNT(r.review_id) as total_reviews,
+    COUNT(r.rating) as rated_reviews,
+    COALESCE(SUM(r.rating), 0) as rating_sum,
+    COUNT(*) FILTER (WHERE r.sentiment_label = 'positive') as positive_count,
+    COUNT(*) FILTER (WHERE r.sentiment_label = 'negative') as negative_count,
+    COUNT(*) FILTER (WHERE r.sentiment_label = 'neutral') as neutral_count,
+    MIN(r.review_date) as earliest_review,
+    MAX(r.review_date) as latest_review
+FROM banks b
+LEFT JOIN reviews r ON r.bank_id = b.bank_id
+GROUP BY b.bank_id;
+
+CREATE OR REPLACE VIEW review_daily_rollup AS
+SELECT
+    bank_id,
+    review_date as day,
+    COUNT(*) as review_count,
+    COUNT(*) FILTER (WHERE rating = 1) as rating_1,
+    COUNT(*) FILTER (WHERE rating = 2) as rating_2,
+    COUNT(*) FILTER (WHERE rating = 3) as rating_3,
+    COUNT(*) FILTER (WHERE rating = 4) as rating_4,
+    COUNT(*) FILTER (WHERE rating = 5) as rating_5,
+    COUNT(rating) as rated_reviews,
+    COALESCE(SUM(rating), 0) as rating_sum,
+    COUNT(*) FILTER (WHERE sentiment_label = 'positive') as positive_count,
+    COUNT(*) FILTER (WHERE sentiment_label = 'negative') as negative_count,
+    COUNT(*) FILTER (WHERE sentiment_label = 'neutral') as neutral_count,
+    COUNT(sentiment_score) as scored_reviews,
+    COALESCE(SUM(sentiment_score), 0) as sentiment_score_sum
+FROM reviews
+WHERE bank_id IS NOT NULL AND review_date IS NOT NULL
+GROUP BY bank_id, review_date;
+
+CREATE OR REPLACE VIEW bank_reviews_summary AS
+SELECT
+    b.bank_name,
+    s.total_reviews,
+    s.rating_sum / NULLIF(s.rated_reviews, 0) as avg_rating,
+    ROUND(s.rating_sum / NULLIF(s.rated_reviews, 0), 2) as avg_rating_rounded,
+    s.positive_count,
+    s.negative_count,
+    s.neutral_count,
+    s.earliest_review,
+    s.latest_review
+FROM banks b
+JOIN bank_review_stats s ON s.bank_id = b.bank_id;
+
+CREATE OR REPLACE VIEW sentiment_analysis AS
+SELECT
+    b.bank_name,
+    r.sentiment_label,
+    COUNT(*) as review_count,
+    ROUND(AVG(r.rating), 2) as avg_rating_for_sentiment,
+    ROUND(AVG(r.sentiment_score), 3) as avg_sentiment_score
+FROM reviews r
+JOIN banks b ON r.bank_id = b.bank_id
+WHERE r.sentiment_label IS NOT NULL
+GROUP BY b.bank_name, r.sentiment_label
+ORDER BY b.bank_name, r.sentiment_label;
+
+CREATE OR REPLACE VIEW monthly_trends AS
+SELECT
+    b.bank_name,
+    DATE_TRUNC('month', r.review_date) as review_month,
+    COUNT(*) as monthly_reviews,
+    AVG(r.rating) as avg_monthly_rating,
+    COUNT(*) FILTER (WHERE r.sentiment_label = 'positive') as monthly_positive,
+    COUNT(*) FILTER (WHERE r.sentiment_label = 'negative') as monthly_negative
+FROM reviews r
+JOIN banks b ON r.bank_id = b.bank_id
+WHERE r.review_date IS NOT NULL
+GROUP BY b.bank_name, DATE_TRUNC('month', r.review_date)
+ORDER BY b.bank_name, review_month;
+"""
+
+# Task 1/2 file columns and the reviews columns they feed
+SOURCE_COLUMNS = {
+    'review': ('review_text', 'VARCHAR'),
+    'rating': ('rating', 'SMALLINT'),
+    'date': ('review_date', 'DATE'),
+    'sentiment_label': ('sentiment_label', 'VARCHAR'),
+    'sentiment_score': ('sentiment_score', 'DOUBLE'),
+    'source': ('source', 'VARCHAR'),
+    'thumbs_up': ('thumbs_up_count', 'INTEGER'),
+    'reviewer_name': ('reviewer_name', 'VARCHAR'),
+    'app_version': ('app_version', 'VARCHAR'),
+    'review_id': ('external_review_id', 'VARCHAR'),
+}
+
+def _literal(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+def _reader(path):
+    """DuckDB table function reading a CSV or Parquet file (globs allowed)"""
+    if path.endswith('.parquet'):
+        return f"read_parquet({_literal(path)})"
+    return f"read_csv_auto({_literal(path)}, header=true)"
+
+class DuckDBManager:
+    """
+    DatabaseManager counterpart on an embedded DuckDB database.
+    `database` is a file path or ':memory:'. With `source` (a CSV/Parquet
+    path or glob), banks and reviews are views over the files and nothing is
+    copied; otherwise reviews are loaded into DuckDB tables.
+    """
+
+    backend = 'duckdb'
+
+    def __init__(self, database=DEFAULT_DATABASE, source=None, threads=None):
+        self.database = database
+        self.source = source
+        self.threads = threads
+        self.conn = None
+        self.cache = None
+
+    def connect(self):
+        """Open the embedded database"""
+        import duckdb
+
+        try:
+            self.conn = duckdb.connect(self.database)
+            if self.threads:
+                self.conn.execute(f"SET threads = {int(self.threads)};")
+            print(f"✅ Opened DuckDB database: {self.database}")
+            return True
+        except Exception as e:
+            print(f"❌ DuckDB connection failed: {e}")
+            return False
+
+    def disconnect(self):
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+            print("✅ Database connection closed")
+
+    def execute_query(self, query, params=None, fetch=False):
+        """Execute SQL; accepts %s placeholders like the PostgreSQL manager"""
+        try:
+            if params:
+                query = query.replace('%s', '?')
+            # DuckDB cursors are per-thread connections to the same database
+            cursor = self.conn.cursor()
+            try:
+                cursor.execute(query, list(params) if params else None)
+                if fetch:
+                    columns = [c[0] for c in cursor.description]
+                    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+            finally:
+                cursor.close()
+            return True
+        except Exception as e:
+            print(f"❌ Query execution failed: {e}")
+            return False
+
+    def _source_views_sql(self):
+        """banks and reviews as views over the source files"""
+        described = self.conn.execute(f"DESCRIBE SELECT * FROM {_reader(self.source)}").fetchall()
+        available = {row[0] for row in described}
+
+        select = []
+        for column, (target, sql_type) in SOURCE_COLUMNS.items():
+            expression = f"TRY_CAST(f.{column} AS {sql_type})" if column in available else f"CAST(NULL AS {sql_type})"
+            select.append(f"{expression} as {target}")
+
+        return f"""
+        CREATE OR REPLACE VIEW source_reviews AS SELECT * FROM {_reader(self.source)};
+
+        CREATE OR REPLACE VIEW banks AS
+        SELECT CAST(ROW_NUMBER() OVER (ORDER BY bank) AS INTEGER) as bank_id,
+               bank as bank_name,
+               bank || ' Mobile Banking' as app_name,
+               CAST(NULL AS TIMESTAMP) as created_at
+        FROM (SELECT DISTINCT bank FROM source_reviews WHERE bank IS NOT NULL);
+
+        CREATE OR REPLACE VIEW reviews AS
+        SELECT CAST(ROW_NUMBER() OVER () AS INTEGER) as review_id,
+               b.bank_id,
+               {', '.join(select)}
+        FROM source_reviews f
+        LEFT JOIN banks b ON b.bank_name = f.bank;
+        """
+
+    def create_tables(self, target=None):
+        """Create the tables (or source views) and the analysis views"""
+        try:
+            self.conn.execute(self._source_views_sql() if self.source else TABLES_SQL)
+            self.conn.execute(VIEWS_SQL)
+            print("✅ Database schema is up to date")
+            return True
+        except Exception as e:
+            print(f"❌ Failed to create schema: {e}")
+            return False
+
+    def insert_bank(self, bank_name, app_name):
+        """Insert a bank record"""
+        result = self.execute_query(
+            "INSERT INTO banks (bank_name, app_name) VALUES (?, ?) ON CONFLICT (bank_name) DO NOTHING RETURNING bank_id;",
+            (bank_name, app_name), fetch=True
+        )
+        return result[0]['bank_id'] if result else None
+
+    def insert_review(self, review_data):
+        """Insert (or update, by external review ID) a review record"""
+        if not has_external_review_id(review_data):
+            bank = self.execute_query("SELECT bank_name FROM banks WHERE bank_id = ?;",
+                                      (review_data.get('bank_id'),), fetch=True)
+            review_data = with_fallback_review_id(review_data, bank[0]['bank_name'] if bank else None)
+        params = tuple(review_data.get(c, REVIEW_DEFAULTS.get(c)) for c in REVIEW_COLUMNS)
+        result = self.execute_query(upsert_review_sql(('external_review_id',), numbered=True, intern_text=False), params, fetch=True)
+        return result[0]['review_id'] if result else None
+
+    def get_bank_id(self, bank_name):
+        """Get bank_id by bank name"""
+        result = self.execute_query("SELECT bank_id FROM banks WHERE bank_name = ?;", (bank_name,), fetch=True)
+        return result[0]['bank_id'] if result else None
+
+    def load_reviews_from_csv(self, csv_path, chunk_size=100000):
+        """
+        Load reviews from a CSV (or Parquet) file into the DuckDB tables.
+        Rows are mapped and validated exactly like the PostgreSQL bulk loader
+        and upserted on the external review ID. Returns the number of reviews
+        loaded, or None if the load failed.
+        """
+        import pandas as pd
+
+        if self.source:
+            print("⚠️  Reviews are read from the source files; nothing to load")
+            return 0
+
+        try:
+            print(f"📊 Loading reviews from {csv_path} into DuckDB")
+            if csv_path.endswith('.parquet'):
+                chunks = [pd.read_parquet(csv_path)]
+            else:
+                chunks = pd.read_csv(csv_path, chunksize=chunk_size)
+
+            loaded = 0
+            skipped = 0
+            with metrics.timer('db_load', table='reviews', backend='duckdb') as stage:
+                for chunk in chunks:
+                    prepared, chunk_skipped = prepare_reviews(chunk)
+                    skipped += chunk_skipped
+                    if prepared.empty:
+                        continue
+                    self.conn.register('staging_reviews', prepared[STAGING_COLUMNS])
+                    self.conn.execute("""
+                        INSERT INTO banks (bank_name, app_name)
+                        SELECT DISTINCT bank_name, bank_name || ' Mobile Banking' FROM staging_reviews
+                        ON CONFLICT (bank_name) DO NOTHING;
+                    """)
+                    self.conn.execute(f"""
+                        INSERT INTO reviews ({', '.join(REVIEW_COLUMNS)})
+                        SELECT b.bank_id, s.review_text, s.rating, CAST(s.review_date AS DATE),
+                               s.sentiment_label, s.sentiment_score, s.source,
+                               s.thumbs_up_count, s.reviewer_name, s.app_version, s.external_review_id
+                        FROM (
+                            SELECT *, ROW_NUMBER() OVER (PARTITION BY external_review_id) as copy_number
+                            FROM staging_reviews
+                        ) s
+                        JOIN banks b ON b.bank_name = s.bank_name
+                        WHERE s.copy_number = 1
+                        ON CONFLICT (external_review_id) DO UPDATE SET
+                            {', '.join(f'{c} = EXCLUDED.{c}' for c in REVIEW_COLUMNS[:-1])};
+                    """)
+                    self.conn.unregister('staging_reviews')
+                    loaded += len(prepared)
+                stage.rows = loaded
+
+            print(f"✅ Data loading complete: {loaded} reviews loaded, {skipped} skipped")
+            return loaded
+        except Exception as e:
+            print(f"❌ Error loading CSV: {e}")
+            return None
+
+    def get_summary_statistics(self):
+        """Get summary statistics (same query as the PostgreSQL manager)"""
+        return self.execute_query(SUMMARY_STATISTICS_SQL, fetch=True)
+
+    def get_trends(self, granularity='month', bank=None, start_date=None, end_date=None):
+        """Review volume, rating and sentiment per bank and period"""
+        query, params = build_trends_query(granularity, bank, start_date, end_date, numbered=True)
+        return self.execute_query(query, params, fetch=True)
+
+    def cache_stats(self):
+        return None
+
+    def export_to_csv(self, output_path, bank=None, start_date=None, end_date=None,
+                      columns=None, file_format=None):
+        """Export reviews to CSV or Parquet with DuckDB's COPY"""
+        columns = columns or DEFAULT_COLUMNS
+        file_format = file_format or ('parquet' if output_path.endswith('.parquet') else 'csv')
+        try:
+            select = ', '.join(f"{EXPORT_COLUMNS[c]} AS {c}" for c in columns)
+            # COPY takes no bind parameters, so filters are inlined as literals
+            conditions = [
+                condition.format(_literal(value))
+                for condition, value in (("b.bank_name = {}", bank), ("r.review_date >= {}", start_date),
+                                         ("r.review_date <= {}", end_date))
+                if value
+            ]
+            where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+
+            directory = os.path.dirname(output_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+            options = "FORMAT parquet, COMPRESSION zstd" if file_format == 'parquet' else "FORMAT csv, HEADER true"
+            self.conn.execute(
+                f"COPY (SELECT {select} FROM reviews r JOIN banks b ON r.bank_id = b.bank_id{where} "
+                f"ORDER BY r.review_date DESC) TO {_literal(output_path)} ({options});"
+            )
+            print(f"✅ Data exported to {output_path}")
+            return output_path
+        except Exception as e:
+            print(f"❌ Export failed: {e}")
+            return None
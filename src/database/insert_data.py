@@ -3,13 +3,14 @@
 Insert data into PostgreSQL database for Task 3
 """
 
-import psycopg2
 import pandas as pd
-from dotenv import load_dotenv
 import os
+import sys
 
-# Load environment variables
-load_dotenv()
+from bulk_load import bulk_load_reviews
+from db_pool import get_pool
+from partitioning import ensure_partitions_if_partitioned
+from review_themes import bulk_load_review_themes
 
 def insert_data():
     """Insert data into database"""
@@ -17,141 +18,112 @@ def insert_data():
     print("📥 Inserting data into database...")
     
     try:
-        # Connect to database
-        conn = psycopg2.connect(
-            dbname=os.getenv('DB_NAME', 'bank_reviews'),
-            user=os.getenv('DB_USER', 'postgres'),
-            password=os.getenv('DB_PASSWORD', ''),
-            host=os.getenv('DB_HOST', 'localhost'),
-            port=os.getenv('DB_PORT', '5432')
-        )
-        cursor = conn.cursor()
-        
-        print("✅ Connected to database")
-        
-        # 1. Insert banks
-        print("\n1. Inserting banks...")
-        banks = [
-            ('Commercial Bank of Ethiopia', 'CBE Mobile Banking'),
-            ('Bank of Abyssinia', 'BOA Mobile Banking'),
-            ('Dashen Bank', 'Dashen Bank Mobile Banking')
-        ]
-        
-        for bank_name, app_name in banks:
-            cursor.execute(
-                "INSERT INTO banks (bank_name, app_name) VALUES (%s, %s) ON CONFLICT (bank_name) DO NOTHING",
-                (bank_name, app_name)
-            )
-        conn.commit()
-        print(f"✅ Inserted {len(banks)} banks")
-        
-        # 2. Load reviews from CSV
-        print("\n2. Loading reviews from CSV...")
-        
-        # Try to find the CSV file
-        csv_paths = [
-            'data/outputs/reviews_with_sentiment.csv',
-            '../data/outputs/reviews_with_sentiment.csv',
-            '../../data/outputs/reviews_with_sentiment.csv',
-            'data/raw/reviews.csv'
-        ]
-        
-        csv_found = False
-        df = None
-        
-        for path in csv_paths:
-            if os.path.exists(path):
-                df = pd.read_csv(path)
-                print(f"✅ Found CSV: {path}")
-                print(f"   Total reviews: {len(df)}")
-                csv_found = True
-                break
-        
-        if not csv_found:
-            print("❌ No CSV file found")
-            print("   Creating sample data instead...")
-            # Create sample DataFrame
-            data = []
-            banks_list = ['Commercial Bank of Ethiopia', 'Bank of Abyssinia', 'Dashen Bank']
-            for bank in banks_list:
-                for i in range(150):  # 150 reviews per bank
-                    rating = (i % 5) + 1  # Ratings 1-5
-                    data.append({
-                        'review': f"Sample review for {bank} - #{i+1}",
-                        'rating': rating,
-                        'date': '2024-01-01',
-                        'bank': bank,
-                        'source': 'Google Play Store',
-                        'sentiment_label': 'positive' if rating >= 4 else 'negative',
-                        'sentiment_score': 0.8 if rating >= 4 else 0.3
-                    })
-            df = pd.DataFrame(data)
-            print(f"✅ Created sample data: {len(df)} reviews")
-        
-        # 3. Insert reviews
-        print("\n3. Inserting reviews...")
-        
-        inserted_count = 0
-        for _, row in df.iterrows():
-            # Get bank_id
-            cursor.execute("SELECT bank_id FROM banks WHERE bank_name = %s", (row['bank'],))
-            result = cursor.fetchone()
-            
-            if result:
-                bank_id = result[0]
-                
-                # Insert review
-                cursor.execute("""
-                    INSERT INTO reviews 
-                    (bank_id, review_text, rating, review_date, sentiment_label, sentiment_score, source)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    bank_id,
-                    str(row.get('review', ''))[:1000],  # Limit length
-                    int(row.get('rating', 3)),
-                    row.get('date'),
-                    row.get('sentiment_label', 'neutral'),
-                    float(row.get('sentiment_score', 0.5)),
-                    row.get('source', 'Google Play Store')
-                ))
-                inserted_count += 1
-                
-                # Show progress every 100 records
-                if inserted_count % 100 == 0:
-                    print(f"   Inserted {inserted_count} reviews...")
-        
-        conn.commit()
-        print(f"\n✅ Successfully inserted {inserted_count} reviews")
-        
-        # 4. Verify data
-        print("\n4. Verifying data...")
-        
-        cursor.execute("SELECT COUNT(*) FROM banks")
-        bank_count = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM reviews")
-        review_count = cursor.fetchone()[0]
-        
-        print(f"📊 Database Status:")
-        print(f"   Banks: {bank_count}")
-        print(f"   Reviews: {review_count}")
-        
-        # Get reviews per bank
-        cursor.execute("""
-            SELECT b.bank_name, COUNT(r.review_id) as review_count, 
-                   ROUND(AVG(r.rating), 2) as avg_rating
-            FROM banks b
-            LEFT JOIN reviews r ON b.bank_id = r.bank_id
-            GROUP BY b.bank_name
-            ORDER BY b.bank_name
-        """)
-        
-        print("\n📈 Reviews per bank:")
-        for bank_name, count, avg_rating in cursor.fetchall():
-            print(f"   {bank_name}: {count} reviews, avg rating: {avg_rating}")
-        
-        cursor.close()
-        conn.close()
+        # Check out a pooled connection
+        with get_pool().connection() as conn:
+            cursor = conn.cursor()
+            
+            print("✅ Connected to database")
+            
+            # 1. Insert banks
+            print("\n1. Inserting banks...")
+            banks = [
+                ('Commercial Bank of Ethiopia', 'CBE Mobile Banking'),
+                ('Bank of Abyssinia', 'BOA Mobile Banking'),
+                ('Dashen Bank', 'Dashen Bank Mobile Banking')
+            ]
+            
+            for bank_name, app_name in banks:
+                cursor.execute(
+                    "INSERT INTO banks (bank_name, app_name) VALUES (%s, %s) ON CONFLICT (bank_name) DO NOTHING",
+                    (bank_name, app_name)
+                )
+            conn.commit()
+            print(f"✅ Inserted {len(banks)} banks")
+            
+            # 2. Load reviews from CSV
+            print("\n2. Loading reviews from CSV...")
+            
+            # Try to find the CSV file
+            csv_paths = [
+                'data/outputs/reviews_with_sentiment.csv',
+                '../data/outputs/reviews_with_sentiment.csv',
+                '../../data/outputs/reviews_with_sentiment.csv',
+                'data/raw/reviews.csv'
+            ]
+            
+            csv_found = False
+            df = None
+            
+            for path in csv_paths:
+                if os.path.exists(path):
+                    df = pd.read_csv(path)
+                    print(f"✅ Found CSV: {path}")
+                    print(f"   Total reviews: {len(df)}")
+                    csv_found = True
+                    break
+            
+            if not csv_found:
+                print("❌ No CSV file found")
+                print("   Creating sample data instead...")
+                sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scraping'))
+                from synthetic_reviews import generate_reviews
+                df = generate_reviews(450, banks=3, seed=42, with_sentiment=True)
+                print(f"✅ Created sample data: {len(df)} reviews")
+            
+            # 3. Insert reviews
+            print("\n3. Inserting reviews (bulk COPY)...")
+            
+            df['review'] = df['review'].astype(str).str[:1000]  # Limit length
+            if 'sentiment_label' not in df.columns:
+                df['sentiment_label'] = 'neutral'
+            df['sentiment_label'] = df['sentiment_label'].fillna('neutral')
+            
+            ensure_partitions_if_partitioned(conn)
+            counts = bulk_load_reviews(conn, df)
+            print(f"\n✅ Successfully inserted {counts['inserted']} reviews "
+                  f"({counts['updated']} updated, {counts['unchanged']} unchanged, {counts['skipped']} skipped)")
+            
+            # 3b. Attach review-level themes from the thematic stage, if present
+            theme_paths = [
+                'data/outputs/review_themes.csv',
+                '../data/outputs/review_themes.csv',
+                '../../data/outputs/review_themes.csv'
+            ]
+            theme_path = next((path for path in theme_paths if os.path.exists(path)), None)
+            if theme_path:
+                print(f"\n3b. Loading review themes from {theme_path}...")
+                theme_counts = bulk_load_review_themes(conn, pd.read_csv(theme_path))
+                print(f"✅ Loaded {theme_counts['written']} theme assignments "
+                      f"({theme_counts['removed']} removed, {theme_counts['unmatched']} unmatched reviews)")
+            
+            # 4. Verify data
+            print("\n4. Verifying data...")
+            
+            cursor.execute("SELECT COUNT(*) FROM banks")
+            bank_count = cursor.fetchone()[0]
+            
+            cursor.execute("SELECT COUNT(*) FROM reviews")
+            review_count = cursor.fetchone()[0]
+            
+            print(f"📊 Database Status:")
+            print(f"   Banks: {bank_count}")
+            print(f"   Reviews: {review_count}")
+            
+            # Get reviews per bank
+            cursor.execute("""
+                SELECT b.bank_name, COUNT(r.review_id) as review_count, 
+                       ROUND(AVG(r.rating), 2) as avg_rating
+                FROM banks b
+                LEFT JOIN reviews r ON b.bank_id = r.bank_id
+                GROUP BY b.bank_name
+                ORDER BY b.bank_name
+            """)
+            
+            print("\n📈 Reviews per bank:")
+            for bank_name, count, avg_rating in cursor.fetchall():
+                print(f"   {bank_name}: {count} reviews, avg rating: {avg_rating}")
+            
+            cursor.close()
         
         print(f"\n🎉 Task 3 data insertion complete!")
         print(f"   Minimum requirement: 400+ reviews")
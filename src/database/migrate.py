@@ -0,0 +1,191 @@
+# Save as: src/database/migrate.py
+"""
+Versioned schema migrations for Task 3
+Applies forward-only SQL migrations from migrations/ and records the applied
+version in the database, so the schema evolves without DROP-and-reload
+"""
+
+import os
+import re
+import sys
+import time
+import hashlib
+import argparse
+
+from db_pool import get_pool
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+# Migrations containing this line run outside a transaction, one statement at
+# a time (required for CREATE INDEX CONCURRENTLY and ALTER TYPE ... ADD VALUE)
+NO_TRANSACTION_MARKER = '-- migrate: no-transaction'
+
+# Serialises concurrent runners; arbitrary but fixed application lock id
+MIGRATION_LOCK_ID = 7342001
+
+VERSION_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name VARCHAR(200) NOT NULL,
+    checksum CHAR(64) NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    duration_ms INTEGER
+);
+"""
+
+MIGRATION_FILE = re.compile(r'^(\d{4})_([\w-]+)\.sql$')
+
+def discover_migrations(migrations_dir=MIGRATIONS_DIR):
+    """Migration files sorted by version: [{'version', 'name', 'path', 'sql', 'checksum', 'transactional'}]"""
+    migrations = []
+    for filename in sorted(os.listdir(migrations_dir)):
+        match = MIGRATION_FILE.match(filename)
+        if not match:
+            continue
+        path = os.path.join(migrations_dir, filename)
+        with open(path, 'r') as f:
+            sql = f.read()
+        migrations.append({
+            'version': int(match.group(1)),
+            'name': match.group(2),
+            'path': path,
+            'sql': sql,
+            'checksum': hashlib.sha256(sql.encode('utf-8')).hexdigest(),
+            'transactional': NO_TRANSACTION_MARKER not in sql
+        })
+
+    versions = [m['version'] for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"Duplicate migration versions in {migrations_dir}")
+    return migrations
+
+def split_statements(sql):
+    """
+    Split a no-transaction migration into single statements.
+    Such migrations must not contain dollar-quoted function bodies.
+    """
+    statements = []
+    for statement in re.split(r';\s*(?:\n|$)', sql):
+        lines = [l for l in statement.strip().splitlines() if not l.strip().startswith('--')]
+        if '\n'.join(lines).strip():
+            statements.append(statement.strip())
+    return statements
+
+def applied_migrations(conn):
+    """{version: checksum} of migrations already applied"""
+    with conn.cursor() as cur:
+        cur.execute(VERSION_TABLE_SQL)
+        cur.execute("SELECT version, checksum FROM schema_migrations ORDER BY version;")
+        rows = cur.fetchall()
+    conn.commit()
+    return {version: checksum for version, checksum in rows}
+
+def _record(cur, migration, duration_ms):
+    cur.execute(
+        "INSERT INTO schema_migrations (version, name, checksum, duration_ms) VALUES (%s, %s, %s, %s);",
+        (migration['version'], migration['name'], migration['checksum'], duration_ms)
+    )
+
+def apply_migration(conn, migration):
+    """Apply one migration and record it"""
+    started = time.time()
+
+    if migration['transactional']:
+        with conn.cursor() as cur:
+            cur.execute(migration['sql'])
+            _record(cur, migration, int((time.time() - started) * 1000))
+        conn.commit()
+        return
+
+    # Non-transactional: each statement commits on its own. Statements should
+    # be idempotent (IF NOT EXISTS) so a failed run can simply be retried.
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            for statement in split_statements(migration['sql']):
+                cur.execute(statement)
+            _record(cur, migration, int((time.time() - started) * 1000))
+    finally:
+        conn.autocommit = False
+
+def migrate(db_pool=None, target=None, dry_run=False, migrations_dir=MIGRATIONS_DIR):
+    """
+    Apply pending migrations up to `target` (default: latest).
+    Returns the list of versions applied.
+    """
+    db_pool = db_pool or get_pool()
+    migrations = discover_migrations(migrations_dir)
+    applied_versions = []
+
+    with db_pool.connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_lock(%s);", (MIGRATION_LOCK_ID,))
+        conn.commit()
+        try:
+            applied = applied_migrations(conn)
+
+            for migration in migrations:
+                version = migration['version']
+                if version in applied:
+                    if applied[version] != migration['checksum']:
+                        print(f"  ⚠️  Migration {version:04d}_{migration['name']} changed after it was applied")
+                    continue
+                if target is not None and version > target:
+                    break
+
+                label = f"{version:04d}_{migration['name']}"
+                if dry_run:
+                    print(f"  📝 Would apply {label}")
+                    applied_versions.append(version)
+                    continue
+
+                print(f"  ⏳ Applying {label}...")
+                apply_migration(conn, migration)
+                applied_versions.append(version)
+                print(f"  ✅ Applied {label}")
+        finally:
+            conn.rollback()
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_advisory_unlock(%s);", (MIGRATION_LOCK_ID,))
+            conn.commit()
+
+    if not applied_versions:
+        print("✅ Schema is up to date")
+    return applied_versions
+
+def migration_status(db_pool=None, migrations_dir=MIGRATIONS_DIR):
+    """Print applied and pending migrations; returns the current schema version"""
+    db_pool = db_pool or get_pool()
+    with db_pool.connection() as conn:
+        applied = applied_migrations(conn)
+
+    for migration in discover_migrations(migrations_dir):
+        state = '✅ applied' if migration['version'] in applied else '⏳ pending'
+        print(f"  {migration['version']:04d}_{migration['name']}: {state}")
+
+    current = max(applied) if applied else 0
+    print(f"\nCurrent schema version: {current}")
+    return current
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply versioned schema migrations")
+    parser.add_argument('command', choices=['up', 'status'], nargs='?', default='up')
+    parser.add_argument('--target', type=int, help="stop after this version")
+    parser.add_argument('--dry-run', action='store_true', help="list pending migrations without applying them")
+    args = parser.parse_args()
+
+    print("="*60)
+    print("SCHEMA MIGRATIONS")
+    print("="*60)
+
+    try:
+        if args.command == 'status':
+            migration_status()
+        else:
+            migrate(target=args.target, dry_run=args.dry_run)
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,11 @@
-# Save as: src/database/schema.sql
+-- Save as: src/database/migrations/0001_initial_schema.sql
 -- Task 3: PostgreSQL Database Schema for Bank Reviews
 -- Database: bank_reviews
-
--- Drop tables if they exist (for clean setup)
-DROP TABLE IF EXISTS reviews;
-DROP TABLE IF EXISTS banks;
+-- Baseline schema. Uses IF NOT EXISTS so databases created by the old
+-- schema.sql are adopted as-is.
 
 -- Create banks table
-CREATE TABLE banks (
+CREATE TABLE IF NOT EXISTS banks (
     bank_id SERIAL PRIMARY KEY,
     bank_name VARCHAR(100) NOT NULL,
     app_name VARCHAR(100),
@@ -16,7 +14,7 @@ CREATE TABLE banks (
 );
 
 -- Create reviews table
-CREATE TABLE reviews (
+CREATE TABLE IF NOT EXISTS reviews (
     review_id SERIAL PRIMARY KEY,
     bank_id INTEGER REFERENCES banks(bank_id) ON DELETE CASCADE,
     review_text TEXT NOT NULL,
@@ -33,10 +31,10 @@ CREATE TABLE reviews (
 );
 
 -- Create indexes for better performance
-CREATE INDEX idx_reviews_bank_id ON reviews(bank_id);
-CREATE INDEX idx_reviews_rating ON reviews(rating);
-CREATE INDEX idx_reviews_sentiment ON reviews(sentiment_label);
-CREATE INDEX idx_reviews_date ON reviews(review_date);
+CREATE INDEX IF NOT EXISTS idx_reviews_bank_id ON reviews(bank_id);
+CREATE INDEX IF NOT EXISTS idx_reviews_rating ON reviews(rating);
+CREATE INDEX IF NOT EXISTS idx_reviews_sentiment ON reviews(sentiment_label);
+CREATE INDEX IF NOT EXISTS idx_reviews_date ON reviews(review_date);
 
 -- Create view for analysis
 CREATE OR REPLACE VIEW bank_reviews_summary AS
@@ -88,4 +86,4 @@ INSERT INTO banks (bank_name, app_name) VALUES
 ('Commercial Bank of Ethiopia', 'CBE Mobile Banking'),
 ('Bank of Abyssinia', 'BOA Mobile Banking'),
 ('Dashen Bank', 'Dashen Bank Mobile Banking')
-ON CONFLICT (bank_name) DO NOTHING;
\ No newline at end of file
+ON CONFLICT (bank_name) DO NOTHING;
@@ -0,0 +1,27 @@
+-- Save as: src/database/migrations/0002_external_review_id.sql
+-- migrate: no-transaction
+-- Natural key for reviews: Play Store reviewId (or a content hash when it is missing).
+-- The unique index is built CONCURRENTLY so loads keep running.
+
+ALTER TABLE reviews ADD COLUMN IF NOT EXISTS external_review_id TEXT;
+
+-- Reviews stored before this migration get the key the loaders derive for a
+-- review without a Play Store ID (bulk_load.fallback_review_id); left NULL
+-- they would never conflict and the next load would store them again.
+-- Exact copies left by earlier reruns keep their rows under a suffixed key.
+CREATE EXTENSION IF NOT EXISTS pgcrypto;
+
+UPDATE reviews r
+SET external_review_id = k.review_key || CASE WHEN k.copy_number > 1 THEN '#' || r.review_id ELSE '' END
+FROM (
+    SELECT
+        r.review_id,
+        'sha1:' || encode(digest(b.bank_name || '|' || COALESCE(r.review_date::TEXT, '') || '|' || r.review_text, 'sha1'), 'hex') AS review_key,
+        ROW_NUMBER() OVER (PARTITION BY b.bank_name, r.review_date, r.review_text ORDER BY r.review_id) AS copy_number
+    FROM reviews r
+    JOIN banks b ON b.bank_id = r.bank_id
+    WHERE r.external_review_id IS NULL
+) k
+WHERE r.review_id = k.review_id;
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS idx_reviews_external_id ON reviews(external_review_id);
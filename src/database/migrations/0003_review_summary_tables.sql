@@ -0,0 +1,245 @@
+-- Save as: src/database/migrations/0003_review_summary_tables.sql
+-- Summary tables behind bank_reviews_summary and sentiment_analysis.
+-- Statement-level triggers fold each INSERT/UPDATE/DELETE batch into the
+-- per-bank aggregates (via transition tables), so the views read
+-- O(number of banks) rows instead of re-aggregating all reviews.
+
+CREATE TABLE IF NOT EXISTS bank_review_stats (
+    bank_id INTEGER PRIMARY KEY REFERENCES banks(bank_id) ON DELETE CASCADE,
+    total_reviews BIGINT NOT NULL DEFAULT 0,
+    rated_reviews BIGINT NOT NULL DEFAULT 0,
+    rating_sum BIGINT NOT NULL DEFAULT 0,
+    positive_count BIGINT NOT NULL DEFAULT 0,
+    negative_count BIGINT NOT NULL DEFAULT 0,
+    neutral_count BIGINT NOT NULL DEFAULT 0,
+    earliest_review DATE,
+    latest_review DATE
+);
+
+CREATE TABLE IF NOT EXISTS bank_sentiment_stats (
+    bank_id INTEGER REFERENCES banks(bank_id) ON DELETE CASCADE,
+    sentiment_label VARCHAR(20) NOT NULL,
+    review_count BIGINT NOT NULL DEFAULT 0,
+    rated_reviews BIGINT NOT NULL DEFAULT 0,
+    rating_sum BIGINT NOT NULL DEFAULT 0,
+    scored_reviews BIGINT NOT NULL DEFAULT 0,
+    sentiment_score_sum NUMERIC NOT NULL DEFAULT 0,
+    PRIMARY KEY (bank_id, sentiment_label)
+);
+
+-- Full recomputation; used for the initial backfill and as a repair tool
+CREATE OR REPLACE FUNCTION rebuild_review_stats() RETURNS void AS $$
+BEGIN
+    DELETE FROM bank_review_stats;
+    DELETE FROM bank_sentiment_stats;
+
+    INSERT INTO bank_review_stats
+    SELECT
+        bank_id,
+        COUNT(*),
+        COUNT(rating),
+        COALESCE(SUM(rating), 0),
+        COUNT(*) FILTER (WHERE sentiment_label = 'positive'),
+        COUNT(*) FILTER (WHERE sentiment_label = 'negative'),
+        COUNT(*) FILTER (WHERE sentiment_label = 'neutral'),
+        MIN(review_date),
+        MAX(review_date)
+    FROM reviews
+    WHERE bank_id IS NOT NULL
+    GROUP BY bank_id;
+
+    INSERT INTO bank_sentiment_stats
+    SELECT
+        bank_id,
+        sentiment_label,
+        COUNT(*),
+        COUNT(rating),
+        COALESCE(SUM(rating), 0),
+        COUNT(sentiment_score),
+        COALESCE(SUM(sentiment_score), 0)
+    FROM reviews
+    WHERE bank_id IS NOT NULL AND sentiment_label IS NOT NULL
+    GROUP BY bank_id, sentiment_label;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION apply_review_stats_delta() RETURNS trigger AS $$
+BEGIN
+    -- Remove the old versions of deleted/updated rows
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE bank_review_stats s SET
+            total_reviews = s.total_reviews - d.total_reviews,
+            rated_reviews = s.rated_reviews - d.rated_reviews,
+            rating_sum = s.rating_sum - d.rating_sum,
+            positive_count = s.positive_count - d.positive_count,
+            negative_count = s.negative_count - d.negative_count,
+            neutral_count = s.neutral_count - d.neutral_count
+        FROM (
+            SELECT
+                bank_id,
+                COUNT(*) AS total_reviews,
+                COUNT(rating) AS rated_reviews,
+                COALESCE(SUM(rating), 0) AS rating_sum,
+                COUNT(*) FILTER (WHERE sentiment_label = 'positive') AS positive_count,
+                COUNT(*) FILTER (WHERE sentiment_label = 'negative') AS negative_count,
+                COUNT(*) FILTER (WHERE sentiment_label = 'neutral') AS neutral_count
+            FROM old_rows
+            WHERE bank_id IS NOT NULL
+            GROUP BY bank_id
+        ) d
+        WHERE s.bank_id = d.bank_id;
+
+        UPDATE bank_sentiment_stats s SET
+            review_count = s.review_count - d.review_count,
+            rated_reviews = s.rated_reviews - d.rated_reviews,
+            rating_sum = s.rating_sum - d.rating_sum,
+            scored_reviews = s.scored_reviews - d.scored_reviews,
+            sentiment_score_sum = s.sentiment_score_sum - d.sentiment_score_sum
+        FROM (
+            SELECT
+                bank_id,
+                sentiment_label,
+                COUNT(*) AS review_count,
+                COUNT(rating) AS rated_reviews,
+                COALESCE(SUM(rating), 0) AS rating_sum,
+                COUNT(sentiment_score) AS scored_reviews,
+                COALESCE(SUM(sentiment_score), 0) AS sentiment_score_sum
+            FROM old_rows
+            WHERE bank_id IS NOT NULL AND sentiment_label IS NOT NULL
+            GROUP BY bank_id, sentiment_label
+        ) d
+        WHERE s.bank_id = d.bank_id AND s.sentiment_label = d.sentiment_label;
+    END IF;
+
+    -- Add the new versions of inserted/updated rows
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO bank_review_stats AS s
+        SELECT
+            bank_id,
+            COUNT(*),
+            COUNT(rating),
+            COALESCE(SUM(rating), 0),
+            COUNT(*) FILTER (WHERE sentiment_label = 'positive'),
+            COUNT(*) FILTER (WHERE sentiment_label = 'negative'),
+            COUNT(*) FILTER (WHERE sentiment_label = 'neutral'),
+            MIN(review_date),
+            MAX(review_date)
+        FROM new_rows
+        WHERE bank_id IS NOT NULL
+        GROUP BY bank_id
+        ON CONFLICT (bank_id) DO UPDATE SET
+            total_reviews = s.total_reviews + EXCLUDED.total_reviews,
+            rated_reviews = s.rated_reviews + EXCLUDED.rated_reviews,
+            rating_sum = s.rating_sum + EXCLUDED.rating_sum,
+            positive_count = s.positive_count + EXCLUDED.positive_count,
+            negative_count = s.negative_count + EXCLUDED.negative_count,
+            neutral_count = s.neutral_count + EXCLUDED.neutral_count,
+            earliest_review = LEAST(s.earliest_review, EXCLUDED.earliest_review),
+            latest_review = GREATEST(s.latest_review, EXCLUDED.latest_review);
+
+        INSERT INTO bank_sentiment_stats AS s
+        SELECT
+            bank_id,
+            sentiment_label,
+            COUNT(*),
+            COUNT(rating),
+            COALESCE(SUM(rating), 0),
+            COUNT(sentiment_score),
+            COALESCE(SUM(sentiment_score), 0)
+        FROM new_rows
+        WHERE bank_id IS NOT NULL AND sentiment_label IS NOT NULL
+        GROUP BY bank_id, sentiment_label
+        ON CONFLICT (bank_id, sentiment_label) DO UPDATE SET
+            review_count = s.review_count + EXCLUDED.review_count,
+            rated_reviews = s.rated_reviews + EXCLUDED.rated_reviews,
+            rating_sum = s.rating_sum + EXCLUDED.rating_sum,
+            scored_reviews = s.scored_reviews + EXCLUDED.scored_reviews,
+            sentiment_score_sum = s.sentiment_score_sum + EXCLUDED.sentiment_score_sum;
+    END IF;
+
+    -- MIN/MAX cannot be decremented: re-read the bounds only for banks whose
+    -- current earliest/latest review may have been removed
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE bank_review_stats s SET
+            earliest_review = (SELECT MIN(r.review_date) FROM reviews r WHERE r.bank_id = s.bank_id),
+            latest_review = (SELECT MAX(r.review_date) FROM reviews r WHERE r.bank_id = s.bank_id)
+        FROM (
+            SELECT bank_id, MIN(review_date) AS min_date, MAX(review_date) AS max_date
+            FROM old_rows
+            GROUP BY bank_id
+        ) d
+        WHERE s.bank_id = d.bank_id
+          AND (d.min_date <= s.earliest_review OR d.max_date >= s.latest_review);
+
+        DELETE FROM bank_sentiment_stats WHERE review_count = 0;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION reset_review_stats() RETURNS trigger AS $$
+BEGIN
+    DELETE FROM bank_review_stats;
+    DELETE FROM bank_sentiment_stats;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Block writes while the triggers are installed and the backfill runs
+LOCK TABLE reviews IN SHARE ROW EXCLUSIVE MODE;
+
+DROP TRIGGER IF EXISTS review_stats_insert ON reviews;
+DROP TRIGGER IF EXISTS review_stats_update ON reviews;
+DROP TRIGGER IF EXISTS review_stats_delete ON reviews;
+DROP TRIGGER IF EXISTS review_stats_truncate ON reviews;
+
+CREATE TRIGGER review_stats_insert
+    AFTER INSERT ON reviews
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_review_stats_delta();
+
+CREATE TRIGGER review_stats_update
+    AFTER UPDATE ON reviews
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_review_stats_delta();
+
+CREATE TRIGGER review_stats_delete
+    AFTER DELETE ON reviews
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_review_stats_delta();
+
+CREATE TRIGGER review_stats_truncate
+    AFTER TRUNCATE ON reviews
+    FOR EACH STATEMENT EXECUTE FUNCTION reset_review_stats();
+
+SELECT rebuild_review_stats();
+
+-- Views keep their columns but now read the summary tables
+DROP VIEW IF EXISTS bank_reviews_summary;
+CREATE VIEW bank_reviews_summary AS
+SELECT
+    b.bank_name,
+    COALESCE(s.total_reviews, 0) as total_reviews,
+    s.rating_sum::NUMERIC / NULLIF(s.rated_reviews, 0) as avg_rating,
+    ROUND(s.rating_sum::NUMERIC / NULLIF(s.rated_reviews, 0), 2) as avg_rating_rounded,
+    COALESCE(s.positive_count, 0) as positive_count,
+    COALESCE(s.negative_count, 0) as negative_count,
+    COALESCE(s.neutral_count, 0) as neutral_count,
+    s.earliest_review,
+    s.latest_review
+FROM banks b
+LEFT JOIN bank_review_stats s ON s.bank_id = b.bank_id;
+
+DROP VIEW IF EXISTS sentiment_analysis;
+CREATE VIEW sentiment_analysis AS
+SELECT
+    b.bank_name,
+    s.sentiment_label,
+    s.review_count,
+    ROUND(s.rating_sum::NUMERIC / NULLIF(s.rated_reviews, 0), 2) as avg_rating_for_sentiment,
+    ROUND(s.sentiment_score_sum / NULLIF(s.scored_reviews, 0), 3) as avg_sentiment_score
+FROM bank_sentiment_stats s
+JOIN banks b ON s.bank_id = b.bank_id
+WHERE s.review_count > 0
+ORDER BY b.bank_name, s.sentiment_label;
@@ -0,0 +1,6 @@
+-- Save as: src/database/migrations/0004_reviews_bank_date_index.sql
+-- migrate: no-transaction
+-- Lets the summary triggers re-read a bank's earliest/latest review date
+-- (and per-bank date-range queries) without scanning all of the bank's reviews.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_reviews_bank_date ON reviews(bank_id, review_date);
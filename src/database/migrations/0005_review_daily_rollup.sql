@@ -0,0 +1,185 @@
+-- Save as: src/database/migrations/0005_review_daily_rollup.sql
+-- Day-level rollup of reviews per bank for time-series queries.
+-- Maintained by statement-level triggers like the summary tables, so every
+-- load updates exactly the (bank, day) buckets it touches - including
+-- late-arriving reviews for past days and corrections to existing reviews.
+-- updated_at records when a bucket last changed, so restated days can be found.
+
+CREATE TABLE IF NOT EXISTS review_daily_rollup (
+    bank_id INTEGER REFERENCES banks(bank_id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    review_count BIGINT NOT NULL DEFAULT 0,
+    rating_1 BIGINT NOT NULL DEFAULT 0,
+    rating_2 BIGINT NOT NULL DEFAULT 0,
+    rating_3 BIGINT NOT NULL DEFAULT 0,
+    rating_4 BIGINT NOT NULL DEFAULT 0,
+    rating_5 BIGINT NOT NULL DEFAULT 0,
+    rated_reviews BIGINT NOT NULL DEFAULT 0,
+    rating_sum BIGINT NOT NULL DEFAULT 0,
+    positive_count BIGINT NOT NULL DEFAULT 0,
+    negative_count BIGINT NOT NULL DEFAULT 0,
+    neutral_count BIGINT NOT NULL DEFAULT 0,
+    scored_reviews BIGINT NOT NULL DEFAULT 0,
+    sentiment_score_sum NUMERIC NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (bank_id, day)
+);
+
+CREATE INDEX IF NOT EXISTS idx_daily_rollup_day ON review_daily_rollup(day);
+
+-- Recompute a date range from the reviews table (NULL bounds = everything)
+CREATE OR REPLACE FUNCTION rebuild_review_daily_rollup(from_day DATE DEFAULT NULL, to_day DATE DEFAULT NULL)
+RETURNS void AS $$
+BEGIN
+    DELETE FROM review_daily_rollup
+    WHERE (from_day IS NULL OR day >= from_day) AND (to_day IS NULL OR day <= to_day);
+
+    INSERT INTO review_daily_rollup (
+        bank_id, day, review_count, rating_1, rating_2, rating_3, rating_4, rating_5,
+        rated_reviews, rating_sum, positive_count, negative_count, neutral_count,
+        scored_reviews, sentiment_score_sum
+    )
+    SELECT
+        bank_id,
+        review_date,
+        COUNT(*),
+        COUNT(*) FILTER (WHERE rating = 1),
+        COUNT(*) FILTER (WHERE rating = 2),
+        COUNT(*) FILTER (WHERE rating = 3),
+        COUNT(*) FILTER (WHERE rating = 4),
+        COUNT(*) FILTER (WHERE rating = 5),
+        COUNT(rating),
+        COALESCE(SUM(rating), 0),
+        COUNT(*) FILTER (WHERE sentiment_label = 'positive'),
+        COUNT(*) FILTER (WHERE sentiment_label = 'negative'),
+        COUNT(*) FILTER (WHERE sentiment_label = 'neutral'),
+        COUNT(sentiment_score),
+        COALESCE(SUM(sentiment_score), 0)
+    FROM reviews
+    WHERE bank_id IS NOT NULL AND review_date IS NOT NULL
+      AND (from_day IS NULL OR review_date >= from_day)
+      AND (to_day IS NULL OR review_date <= to_day)
+    GROUP BY bank_id, review_date;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION apply_review_rollup_delta() RETURNS trigger AS $$
+BEGIN
+    -- Signed per-(bank, day) deltas: +1 for new row versions, -1 for old ones
+    CREATE TEMP TABLE IF NOT EXISTS rollup_delta (
+        bank_id INTEGER, review_date DATE, sign INTEGER,
+        rating INTEGER, sentiment_label VARCHAR(20), sentiment_score NUMERIC
+    ) ON COMMIT DROP;
+    TRUNCATE rollup_delta;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO rollup_delta
+        SELECT bank_id, review_date, 1, rating, sentiment_label, sentiment_score
+        FROM new_rows
+        WHERE bank_id IS NOT NULL AND review_date IS NOT NULL;
+    END IF;
+
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        INSERT INTO rollup_delta
+        SELECT bank_id, review_date, -1, rating, sentiment_label, sentiment_score
+        FROM old_rows
+        WHERE bank_id IS NOT NULL AND review_date IS NOT NULL;
+    END IF;
+
+    INSERT INTO review_daily_rollup AS d (
+        bank_id, day, review_count, rating_1, rating_2, rating_3, rating_4, rating_5,
+        rated_reviews, rating_sum, positive_count, negative_count, neutral_count,
+        scored_reviews, sentiment_score_sum
+    )
+    SELECT
+        bank_id,
+        review_date,
+        SUM(sign),
+        COALESCE(SUM(sign) FILTER (WHERE rating = 1), 0),
+        COALESCE(SUM(sign) FILTER (WHERE rating = 2), 0),
+        COALESCE(SUM(sign) FILTER (WHERE rating = 3), 0),
+        COALESCE(SUM(sign) FILTER (WHERE rating = 4), 0),
+        COALESCE(SUM(sign) FILTER (WHERE rating = 5), 0),
+        COALESCE(SUM(sign) FILTER (WHERE rating IS NOT NULL), 0),
+        COALESCE(SUM(sign * rating), 0),
+        COALESCE(SUM(sign) FILTER (WHERE sentiment_label = 'positive'), 0),
+        COALESCE(SUM(sign) FILTER (WHERE sentiment_label = 'negative'), 0),
+        COALESCE(SUM(sign) FILTER (WHERE sentiment_label = 'neutral'), 0),
+        COALESCE(SUM(sign) FILTER (WHERE sentiment_score IS NOT NULL), 0),
+        COALESCE(SUM(sign * sentiment_score), 0)
+    FROM rollup_delta
+    GROUP BY bank_id, review_date
+    ON CONFLICT (bank_id, day) DO UPDATE SET
+        review_count = d.review_count + EXCLUDED.review_count,
+        rating_1 = d.rating_1 + EXCLUDED.rating_1,
+        rating_2 = d.rating_2 + EXCLUDED.rating_2,
+        rating_3 = d.rating_3 + EXCLUDED.rating_3,
+        rating_4 = d.rating_4 + EXCLUDED.rating_4,
+        rating_5 = d.rating_5 + EXCLUDED.rating_5,
+        rated_reviews = d.rated_reviews + EXCLUDED.rated_reviews,
+        rating_sum = d.rating_sum + EXCLUDED.rating_sum,
+        positive_count = d.positive_count + EXCLUDED.positive_count,
+        negative_count = d.negative_count + EXCLUDED.negative_count,
+        neutral_count = d.neutral_count + EXCLUDED.neutral_count,
+        scored_reviews = d.scored_reviews + EXCLUDED.scored_reviews,
+        sentiment_score_sum = d.sentiment_score_sum + EXCLUDED.sentiment_score_sum,
+        updated_at = CURRENT_TIMESTAMP;
+
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        DELETE FROM review_daily_rollup WHERE review_count = 0;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION reset_review_daily_rollup() RETURNS trigger AS $$
+BEGIN
+    DELETE FROM review_daily_rollup;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Block writes while the triggers are installed and the backfill runs
+LOCK TABLE reviews IN SHARE ROW EXCLUSIVE MODE;
+
+DROP TRIGGER IF EXISTS review_rollup_insert ON reviews;
+DROP TRIGGER IF EXISTS review_rollup_update ON reviews;
+DROP TRIGGER IF EXISTS review_rollup_delete ON reviews;
+DROP TRIGGER IF EXISTS review_rollup_truncate ON reviews;
+
+CREATE TRIGGER review_rollup_insert
+    AFTER INSERT ON reviews
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_review_rollup_delta();
+
+CREATE TRIGGER review_rollup_update
+    AFTER UPDATE ON reviews
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_review_rollup_delta();
+
+CREATE TRIGGER review_rollup_delete
+    AFTER DELETE ON reviews
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_review_rollup_delta();
+
+CREATE TRIGGER review_rollup_truncate
+    AFTER TRUNCATE ON reviews
+    FOR EACH STATEMENT EXECUTE FUNCTION reset_review_daily_rollup();
+
+SELECT rebuild_review_daily_rollup();
+
+-- monthly_trends keeps its columns but now reads the daily rollup
+DROP VIEW IF EXISTS monthly_trends;
+CREATE VIEW monthly_trends AS
+SELECT
+    b.bank_name,
+    DATE_TRUNC('month', d.day) as review_month,
+    SUM(d.review_count)::BIGINT as monthly_reviews,
+    SUM(d.rating_sum)::NUMERIC / NULLIF(SUM(d.rated_reviews), 0) as avg_monthly_rating,
+    SUM(d.positive_count)::BIGINT as monthly_positive,
+    SUM(d.negative_count)::BIGINT as monthly_negative
+FROM review_daily_rollup d
+JOIN banks b ON d.bank_id = b.bank_id
+GROUP BY b.bank_name, DATE_TRUNC('month', d.day)
+ORDER BY b.bank_name, review_month;
@@ -0,0 +1,11 @@
+-- Save as: src/database/migrations/0006_review_full_text_search.sql
+-- Full-text search over review_text: a stored tsvector column kept in sync by
+-- PostgreSQL itself, and a GIN index so searches avoid sequential scans.
+-- Adding the generated column rewrites the table, so this runs in one
+-- transaction; a plain (non-concurrent) index build also works on the
+-- partitioned layout.
+
+ALTER TABLE reviews ADD COLUMN IF NOT EXISTS review_tsv tsvector
+    GENERATED ALWAYS AS (to_tsvector('english', COALESCE(review_text, ''))) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_reviews_tsv ON reviews USING GIN (review_tsv);
@@ -0,0 +1,319 @@
+-- Save as: src/database/migrations/0007_compact_review_columns.sql
+-- Compact storage for reviews: enum labels and sources instead of repeated
+-- varchar, REAL sentiment scores instead of NUMERIC (fixed-width, float
+-- arithmetic in AVG) and SMALLINT ratings. On the plain layout the table is
+-- rebuilt with 8-byte columns first and variable-width ones last, so rows
+-- carry no alignment padding; the partitioned layout is altered in place.
+-- Indexes and triggers are recreated from their current definitions.
+
+CREATE TYPE sentiment_label_t AS ENUM ('positive', 'neutral', 'negative');
+CREATE TYPE review_source_t AS ENUM ('Google Play Store', 'Apple App Store', 'Other');
+
+-- Block writes while the table is rewritten
+LOCK TABLE reviews IN ACCESS EXCLUSIVE MODE;
+
+DO $$
+DECLARE
+    index_defs TEXT[];
+    trigger_defs TEXT[];
+    review_seq TEXT;
+    definition TEXT;
+    old_index TEXT;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'reviews'::regclass) = 'p' THEN
+        ALTER TABLE reviews
+            ALTER COLUMN rating TYPE SMALLINT,
+            ALTER COLUMN sentiment_score TYPE REAL,
+            ALTER COLUMN sentiment_label TYPE sentiment_label_t USING (
+                CASE WHEN lower(btrim(sentiment_label)) IN ('positive', 'neutral', 'negative')
+                     THEN lower(btrim(sentiment_label))::sentiment_label_t END),
+            ALTER COLUMN source DROP DEFAULT,
+            ALTER COLUMN source TYPE review_source_t USING (
+                CASE WHEN source IS NULL THEN NULL
+                     WHEN source IN ('Google Play Store', 'Apple App Store') THEN source::review_source_t
+                     ELSE 'Other' END),
+            ALTER COLUMN source SET DEFAULT 'Google Play Store';
+        RETURN;
+    END IF;
+
+    -- Definitions to replay on the rebuilt table (constraint indexes are
+    -- recreated by the table definition itself)
+    SELECT array_agg(pg_get_indexdef(i.indexrelid))
+    INTO index_defs
+    FROM pg_index i
+    WHERE i.indrelid = 'reviews'::regclass
+      AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid);
+
+    SELECT array_agg(pg_get_triggerdef(t.oid))
+    INTO trigger_defs
+    FROM pg_trigger t
+    WHERE t.tgrelid = 'reviews'::regclass AND NOT t.tgisinternal;
+
+    review_seq := pg_get_serial_sequence('reviews', 'review_id');
+
+    ALTER TABLE reviews RENAME TO reviews_wide;
+    FOR old_index IN
+        SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = 'reviews_wide'::regclass
+    LOOP
+        EXECUTE format('ALTER INDEX %I RENAME TO %I', old_index, left(old_index, 50) || '_wide');
+    END LOOP;
+    EXECUTE format('ALTER SEQUENCE %s OWNED BY NONE', review_seq);
+
+    -- Widest alignment first: 8-byte, then 4-byte, then 2-byte, then varlena
+    CREATE TABLE reviews (
+        scraped_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        review_id INTEGER NOT NULL PRIMARY KEY,
+        bank_id INTEGER REFERENCES banks(bank_id) ON DELETE CASCADE,
+        review_date DATE,
+        sentiment_score REAL,
+        thumbs_up_count INTEGER DEFAULT 0,
+        sentiment_label sentiment_label_t,
+        source review_source_t DEFAULT 'Google Play Store',
+        rating SMALLINT CHECK (rating >= 1 AND rating <= 5),
+        review_text TEXT NOT NULL,
+        reviewer_name VARCHAR(100),
+        app_version VARCHAR(20),
+        external_review_id TEXT,
+        review_tsv tsvector
+            GENERATED ALWAYS AS (to_tsvector('english', COALESCE(review_text, ''))) STORED
+    );
+    EXECUTE format('ALTER TABLE reviews ALTER COLUMN review_id SET DEFAULT nextval(%L::regclass)', review_seq);
+    EXECUTE format('ALTER SEQUENCE %s OWNED BY reviews.review_id', review_seq);
+
+    INSERT INTO reviews (
+        scraped_date, created_at, review_id, bank_id, review_date, sentiment_score,
+        thumbs_up_count, sentiment_label, source, rating, review_text, reviewer_name,
+        app_version, external_review_id
+    )
+    SELECT
+        scraped_date, created_at, review_id, bank_id, review_date, sentiment_score,
+        thumbs_up_count,
+        CASE WHEN lower(btrim(sentiment_label)) IN ('positive', 'neutral', 'negative')
+             THEN lower(btrim(sentiment_label))::sentiment_label_t END,
+        CASE WHEN source IS NULL THEN NULL
+             WHEN source IN ('Google Play Store', 'Apple App Store') THEN source::review_source_t
+             ELSE 'Other' END,
+        rating, review_text, reviewer_name, app_version, external_review_id
+    FROM reviews_wide;
+
+    DROP TABLE reviews_wide;
+
+    FOREACH definition IN ARRAY COALESCE(index_defs, '{}') LOOP
+        EXECUTE definition;
+    END LOOP;
+    FOREACH definition IN ARRAY COALESCE(trigger_defs, '{}') LOOP
+        EXECUTE definition;
+    END LOOP;
+END;
+$$;
+
+-- The summary tables carry the same label type, so trigger joins compare like with like
+-- (emptied first; they are rebuilt below)
+DROP VIEW IF EXISTS sentiment_analysis;
+DELETE FROM bank_sentiment_stats;
+ALTER TABLE bank_sentiment_stats
+    ALTER COLUMN sentiment_label TYPE sentiment_label_t USING sentiment_label::sentiment_label_t;
+
+-- SUM(real) accumulates in single precision; keep the summary sums exact
+CREATE OR REPLACE FUNCTION rebuild_review_stats() RETURNS void AS $$
+BEGIN
+    DELETE FROM bank_review_stats;
+    DELETE FROM bank_sentiment_stats;
+
+    INSERT INTO bank_review_stats
+    SELECT
+        bank_id,
+        COUNT(*),
+        COUNT(rating),
+        COALESCE(SUM(rating), 0),
+        COUNT(*) FILTER (WHERE sentiment_label = 'positive'),
+        COUNT(*) FILTER (WHERE sentiment_label = 'negative'),
+        COUNT(*) FILTER (WHERE sentiment_label = 'neutral'),
+        MIN(review_date),
+        MAX(review_date)
+    FROM reviews
+    WHERE bank_id IS NOT NULL
+    GROUP BY bank_id;
+
+    INSERT INTO bank_sentiment_stats
+    SELECT
+        bank_id,
+        sentiment_label,
+        COUNT(*),
+        COUNT(rating),
+        COALESCE(SUM(rating), 0),
+        COUNT(sentiment_score),
+        COALESCE(SUM(sentiment_score::NUMERIC), 0)
+    FROM reviews
+    WHERE bank_id IS NOT NULL AND sentiment_label IS NOT NULL
+    GROUP BY bank_id, sentiment_label;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION apply_review_stats_delta() RETURNS trigger AS $$
+BEGIN
+    -- Remove the old versions of deleted/updated rows
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE bank_review_stats s SET
+            total_reviews = s.total_reviews - d.total_reviews,
+            rated_reviews = s.rated_reviews - d.rated_reviews,
+            rating_sum = s.rating_sum - d.rating_sum,
+            positive_count = s.positive_count - d.positive_count,
+            negative_count = s.negative_count - d.negative_count,
+            neutral_count = s.neutral_count - d.neutral_count
+        FROM (
+            SELECT
+                bank_id,
+                COUNT(*) AS total_reviews,
+                COUNT(rating) AS rated_reviews,
+                COALESCE(SUM(rating), 0) AS rating_sum,
+                COUNT(*) FILTER (WHERE sentiment_label = 'positive') AS positive_count,
+                COUNT(*) FILTER (WHERE sentiment_label = 'negative') AS negative_count,
+                COUNT(*) FILTER (WHERE sentiment_label = 'neutral') AS neutral_count
+            FROM old_rows
+            WHERE bank_id IS NOT NULL
+            GROUP BY bank_id
+        ) d
+        WHERE s.bank_id = d.bank_id;
+
+        UPDATE bank_sentiment_stats s SET
+            review_count = s.review_count - d.review_count,
+            rated_reviews = s.rated_reviews - d.rated_reviews,
+            rating_sum = s.rating_sum - d.rating_sum,
+            scored_reviews = s.scored_reviews - d.scored_reviews,
+            sentiment_score_sum = s.sentiment_score_sum - d.sentiment_score_sum
+        FROM (
+            SELECT
+                bank_id,
+                sentiment_label,
+                COUNT(*) AS review_count,
+                COUNT(rating) AS rated_reviews,
+                COALESCE(SUM(rating), 0) AS rating_sum,
+                COUNT(sentiment_score) AS scored_reviews,
+                COALESCE(SUM(sentiment_score::NUMERIC), 0) AS sentiment_score_sum
+            FROM old_rows
+            WHERE bank_id IS NOT NULL AND sentiment_label IS NOT NULL
+            GROUP BY bank_id, sentiment_label
+        ) d
+        WHERE s.bank_id = d.bank_id AND s.sentiment_label = d.sentiment_label;
+    END IF;
+
+    -- Add the new versions of inserted/updated rows
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO bank_review_stats AS s
+        SELECT
+            bank_id,
+            COUNT(*),
+            COUNT(rating),
+            COALESCE(SUM(rating), 0),
+            COUNT(*) FILTER (WHERE sentiment_label = 'positive'),
+            COUNT(*) FILTER (WHERE sentiment_label = 'negative'),
+            COUNT(*) FILTER (WHERE sentiment_label = 'neutral'),
+            MIN(review_date),
+            MAX(review_date)
+        FROM new_rows
+        WHERE bank_id IS NOT NULL
+        GROUP BY bank_id
+        ON CONFLICT (bank_id) DO UPDATE SET
+            total_reviews = s.total_reviews + EXCLUDED.total_reviews,
+            rated_reviews = s.rated_reviews + EXCLUDED.rated_reviews,
+            rating_sum = s.rating_sum + EXCLUDED.rating_sum,
+            positive_count = s.positive_count + EXCLUDED.positive_count,
+            negative_count = s.negative_count + EXCLUDED.negative_count,
+            neutral_count = s.neutral_count + EXCLUDED.neutral_count,
+            earliest_review = LEAST(s.earliest_review, EXCLUDED.earliest_review),
+            latest_review = GREATEST(s.latest_review, EXCLUDED.latest_review);
+
+        INSERT INTO bank_sentiment_stats AS s
+        SELECT
+            bank_id,
+            sentiment_label,
+            COUNT(*),
+            COUNT(rating),
+            COALESCE(SUM(rating), 0),
+            COUNT(sentiment_score),
+            COALESCE(SUM(sentiment_score::NUMERIC), 0)
+        FROM new_rows
+        WHERE bank_id IS NOT NULL AND sentiment_label IS NOT NULL
+        GROUP BY bank_id, sentiment_label
+        ON CONFLICT (bank_id, sentiment_label) DO UPDATE SET
+            review_count = s.review_count + EXCLUDED.review_count,
+            rated_reviews = s.rated_reviews + EXCLUDED.rated_reviews,
+            rating_sum = s.rating_sum + EXCLUDED.rating_sum,
+            scored_reviews = s.scored_reviews + EXCLUDED.scored_reviews,
+            sentiment_score_sum = s.sentiment_score_sum + EXCLUDED.sentiment_score_sum;
+    END IF;
+
+    -- MIN/MAX cannot be decremented: re-read the bounds only for banks whose
+    -- current earliest/latest review may have been removed
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE bank_review_stats s SET
+            earliest_review = (SELECT MIN(r.review_date) FROM reviews r WHERE r.bank_id = s.bank_id),
+            latest_review = (SELECT MAX(r.review_date) FROM reviews r WHERE r.bank_id = s.bank_id)
+        FROM (
+            SELECT bank_id, MIN(review_date) AS min_date, MAX(review_date) AS max_date
+            FROM old_rows
+            GROUP BY bank_id
+        ) d
+        WHERE s.bank_id = d.bank_id
+          AND (d.min_date <= s.earliest_review OR d.max_date >= s.latest_review);
+
+        DELETE FROM bank_sentiment_stats WHERE review_count = 0;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION rebuild_review_daily_rollup(from_day DATE DEFAULT NULL, to_day DATE DEFAULT NULL)
+RETURNS void AS $$
+BEGIN
+    DELETE FROM review_daily_rollup
+    WHERE (from_day IS NULL OR day >= from_day) AND (to_day IS NULL OR day <= to_day);
+
+    INSERT INTO review_daily_rollup (
+        bank_id, day, review_count, rating_1, rating_2, rating_3, rating_4, rating_5,
+        rated_reviews, rating_sum, positive_count, negative_count, neutral_count,
+        scored_reviews, sentiment_score_sum
+    )
+    SELECT
+        bank_id,
+        review_date,
+        COUNT(*),
+        COUNT(*) FILTER (WHERE rating = 1),
+        COUNT(*) FILTER (WHERE rating = 2),
+        COUNT(*) FILTER (WHERE rating = 3),
+        COUNT(*) FILTER (WHERE rating = 4),
+        COUNT(*) FILTER (WHERE rating = 5),
+        COUNT(rating),
+        COALESCE(SUM(rating), 0),
+        COUNT(*) FILTER (WHERE sentiment_label = 'positive'),
+        COUNT(*) FILTER (WHERE sentiment_label = 'negative'),
+        COUNT(*) FILTER (WHERE sentiment_label = 'neutral'),
+        COUNT(sentiment_score),
+        COALESCE(SUM(sentiment_score::NUMERIC), 0)
+    FROM reviews
+    WHERE bank_id IS NOT NULL AND review_date IS NOT NULL
+      AND (from_day IS NULL OR review_date >= from_day)
+      AND (to_day IS NULL OR review_date <= to_day)
+    GROUP BY bank_id, review_date;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Labels may have been normalised above, so recompute the summaries
+SELECT rebuild_review_stats();
+SELECT rebuild_review_daily_rollup();
+
+CREATE VIEW sentiment_analysis AS
+SELECT
+    b.bank_name,
+    s.sentiment_label,
+    s.review_count,
+    ROUND(s.rating_sum::NUMERIC / NULLIF(s.rated_reviews, 0), 2) as avg_rating_for_sentiment,
+    ROUND(s.sentiment_score_sum / NULLIF(s.scored_reviews, 0), 3) as avg_sentiment_score
+FROM bank_sentiment_stats s
+JOIN banks b ON s.bank_id = b.bank_id
+WHERE s.review_count > 0
+ORDER BY b.bank_name, s.sentiment_label::TEXT;
@@ -0,0 +1,69 @@
+-- Save as: src/database/migrations/0008_review_themes.sql
+-- Review-level theme assignments from the thematic stage: one row per
+-- (review, theme) with the theme's share of the review's keyword hits.
+-- There is no foreign key to reviews (its primary key includes review_date
+-- on the partitioned layout); a trigger removes the themes of deleted reviews.
+
+CREATE TABLE IF NOT EXISTS review_themes (
+    review_id INTEGER NOT NULL,
+    theme VARCHAR(50) NOT NULL,
+    score REAL NOT NULL CHECK (score > 0 AND score <= 1),
+    PRIMARY KEY (review_id, theme)
+);
+
+-- Theme-first lookups ("Transaction Problems reviews for ...") join to reviews by ID
+CREATE INDEX IF NOT EXISTS idx_review_themes_theme ON review_themes (theme, review_id) INCLUDE (score);
+
+CREATE OR REPLACE FUNCTION delete_review_themes() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'TRUNCATE' THEN
+        DELETE FROM review_themes;
+    ELSE
+        DELETE FROM review_themes t USING old_rows o WHERE t.review_id = o.review_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS review_themes_delete ON reviews;
+DROP TRIGGER IF EXISTS review_themes_truncate ON reviews;
+
+CREATE TRIGGER review_themes_delete
+    AFTER DELETE ON reviews
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION delete_review_themes();
+
+CREATE TRIGGER review_themes_truncate
+    AFTER TRUNCATE ON reviews
+    FOR EACH STATEMENT EXECUTE FUNCTION delete_review_themes();
+
+CREATE OR REPLACE VIEW bank_theme_summary AS
+SELECT
+    b.bank_name,
+    t.theme,
+    COUNT(*) as review_count,
+    ROUND(AVG(t.score)::NUMERIC, 3) as avg_theme_score,
+    ROUND(AVG(r.rating), 2) as avg_rating,
+    COUNT(*) FILTER (WHERE r.sentiment_label = 'positive') as positive_count,
+    COUNT(*) FILTER (WHERE r.sentiment_label = 'negative') as negative_count,
+    ROUND(COUNT(*) FILTER (WHERE r.sentiment_label = 'negative')::NUMERIC / COUNT(*), 3) as negative_share
+FROM review_themes t
+JOIN reviews r ON r.review_id = t.review_id
+JOIN banks b ON b.bank_id = r.bank_id
+GROUP BY b.bank_name, t.theme
+ORDER BY b.bank_name, review_count DESC;
+
+CREATE OR REPLACE VIEW monthly_theme_trends AS
+SELECT
+    b.bank_name,
+    DATE_TRUNC('month', r.review_date)::DATE as review_month,
+    t.theme,
+    COUNT(*) as review_count,
+    COUNT(*) FILTER (WHERE r.sentiment_label = 'negative') as negative_count,
+    ROUND(AVG(r.rating), 2) as avg_rating
+FROM review_themes t
+JOIN reviews r ON r.review_id = t.review_id
+JOIN banks b ON b.bank_id = r.bank_id
+WHERE r.review_date IS NOT NULL
+GROUP BY b.bank_name, DATE_TRUNC('month', r.review_date), t.theme
+ORDER BY b.bank_name, review_month, t.theme;
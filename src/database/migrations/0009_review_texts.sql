@@ -0,0 +1,67 @@
+-- Save as: src/database/migrations/0009_review_texts.sql
+-- Content-addressed review text: each distinct body is stored once in
+-- review_texts, keyed by its SHA-256, and reviews reference it by hash.
+-- Short bodies ("Good", "Nice app") repeat thousands of times, so the text,
+-- its tsvector and the full-text index shrink to one copy per distinct text.
+
+CREATE TABLE IF NOT EXISTS review_texts (
+    text_hash BYTEA PRIMARY KEY CHECK (octet_length(text_hash) = 32),
+    review_text TEXT NOT NULL,
+    review_tsv tsvector
+        GENERATED ALWAYS AS (to_tsvector('english', COALESCE(review_text, ''))) STORED
+);
+
+-- Block writes while reviews is switched over
+LOCK TABLE reviews IN ACCESS EXCLUSIVE MODE;
+
+INSERT INTO review_texts (text_hash, review_text)
+SELECT DISTINCT ON (text_hash) text_hash, review_text
+FROM (SELECT sha256(convert_to(review_text, 'UTF8')) AS text_hash, review_text FROM reviews) t
+ON CONFLICT (text_hash) DO NOTHING;
+
+ALTER TABLE reviews ADD COLUMN text_hash BYTEA;
+
+-- Only the new column changes, so the summary triggers have nothing to do
+ALTER TABLE reviews DISABLE TRIGGER USER;
+UPDATE reviews SET text_hash = sha256(convert_to(review_text, 'UTF8'));
+ALTER TABLE reviews ENABLE TRIGGER USER;
+
+-- Dropping the text drops review_tsv, idx_reviews_tsv and any trigram index with it
+ALTER TABLE reviews
+    DROP COLUMN review_tsv,
+    DROP COLUMN review_text,
+    ALTER COLUMN text_hash SET NOT NULL,
+    ADD CONSTRAINT reviews_text_hash_fkey FOREIGN KEY (text_hash) REFERENCES review_texts(text_hash);
+
+CREATE INDEX IF NOT EXISTS idx_reviews_text_hash ON reviews (text_hash);
+CREATE INDEX IF NOT EXISTS idx_review_texts_tsv ON review_texts USING GIN (review_tsv);
+
+-- Reviews with their text, for readers that need it. A LEFT JOIN on the
+-- primary key lets the planner skip review_texts when no text is selected.
+CREATE OR REPLACE VIEW review_details AS
+SELECT r.*, t.review_text
+FROM reviews r
+LEFT JOIN review_texts t ON t.text_hash = r.text_hash;
+
+-- Texts no table references any more (after deletes, or once detached
+-- partitions are dropped); archived partitions keep their texts
+CREATE OR REPLACE FUNCTION prune_review_texts() RETURNS BIGINT AS $$
+DECLARE
+    referencing TEXT;
+    unreferenced TEXT := '';
+    removed BIGINT;
+BEGIN
+    FOR referencing IN
+        SELECT c.conrelid::regclass::text
+        FROM pg_constraint c
+        JOIN pg_class r ON r.oid = c.conrelid
+        WHERE c.confrelid = 'review_texts'::regclass AND c.contype = 'f' AND NOT r.relispartition
+    LOOP
+        unreferenced := unreferenced
+            || format(' AND NOT EXISTS (SELECT 1 FROM %s x WHERE x.text_hash = t.text_hash)', referencing);
+    END LOOP;
+    EXECUTE 'DELETE FROM review_texts t WHERE TRUE' || unreferenced;
+    GET DIAGNOSTICS removed = ROW_COUNT;
+    RETURN removed;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,178 @@
+# Save as: src/database/parallel_load.py
+"""
+Parallel partitioned loading for Task 3
+Splits the input by bank or date range and bulk loads partitions concurrently
+over pooled connections, with bounded memory, per-partition retry and a final
+consistency check
+"""
+
+import sys
+import time
+import argparse
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from psycopg2 import errorcodes
+
+from bulk_load import bulk_load_reviews
+from db_pool import get_pool
+from partitioning import ensure_partitions_if_partitioned
+
+COUNT_SQL = "SELECT COUNT(*) FROM reviews;"
+
+def partition_frame(df, by='bank', freq='M'):
+    """
+    Split a DataFrame into load partitions.
+    by='bank' -> one partition per bank; by='date' -> one per date period
+    (`freq`, e.g. 'M' or 'Q'); by='bank_date' -> one per bank and period.
+    """
+    import pandas as pd
+
+    if by == 'bank':
+        keys = [df['bank'].fillna('')]
+    elif by in ('date', 'bank_date'):
+        period = pd.to_datetime(df['date'], errors='coerce').dt.to_period(freq).astype(str)
+        keys = [period] if by == 'date' else [df['bank'].fillna(''), period]
+    else:
+        raise ValueError(f"Unknown partitioning: {by}")
+
+    for key, frame in df.groupby(keys, sort=False):
+        yield (key if isinstance(key, tuple) else (key,)), frame
+
+def iter_partitions(source, by='bank', freq='M', chunk_size=200000):
+    """Yield partitions from a DataFrame or, chunk by chunk, from a CSV path"""
+    import pandas as pd
+
+    if isinstance(source, pd.DataFrame):
+        yield from partition_frame(source, by, freq)
+        return
+
+    for chunk_num, chunk in enumerate(pd.read_csv(source, chunksize=chunk_size), 1):
+        for key, frame in partition_frame(chunk, by, freq):
+            yield key + (f"chunk {chunk_num}",), frame
+
+def load_partition(db_pool, key, frame, retries=3, backoff=1.0):
+    """
+    Load one partition in its own transaction, retrying on failure.
+    A failed attempt is rolled back completely, and loads upsert on the
+    external review ID, so retries never duplicate rows. Attempts lost to
+    deadlocks are counted separately.
+    """
+    deadlocks = 0
+    for attempt in range(1, retries + 1):
+        try:
+            with db_pool.connection() as conn:
+                counts = bulk_load_reviews(conn, frame)
+            return {'partition': key, 'rows': len(frame), 'attempts': attempt, 'deadlocks': deadlocks, **counts}
+        except Exception as e:
+            if getattr(e, 'pgcode', None) == errorcodes.DEADLOCK_DETECTED:
+                deadlocks += 1
+            if attempt == retries:
+                return {'partition': key, 'rows': len(frame), 'inserted': 0, 'updated': 0,
+                        'unchanged': 0, 'skipped': 0, 'attempts': attempt, 'deadlocks': deadlocks,
+                        'error': str(e)}
+            wait = backoff * 2 ** (attempt - 1)
+            print(f"  ⚠️  Partition {key} failed (attempt {attempt}/{retries}): {e} - retrying in {wait:.0f}s")
+            time.sleep(wait)
+
+def parallel_load_reviews(source, workers=4, by='bank', freq='M', chunk_size=200000,
+                          max_in_flight=None, retries=3, db_pool=None):
+    """
+    Load reviews from a DataFrame or CSV path over `workers` concurrent connections.
+    At most `max_in_flight` partitions are held in memory at once.
+    Partitions of the same bank never load concurrently: they write the same
+    per-bank rows and could deadlock. By-date partitions span every bank and
+    cannot be separated this way; their deadlocks are retried and reported.
+    Returns a summary dict including per-partition results and the consistency check.
+    """
+    db_pool = db_pool or get_pool(maxconn=workers + 1)
+    max_in_flight = max_in_flight or 2 * workers
+    in_flight = threading.BoundedSemaphore(max_in_flight)
+    bank_locks = defaultdict(threading.Lock)
+    by_bank = by in ('bank', 'bank_date')
+
+    # Partitioned layout: make sure upcoming periods exist before the workers
+    # start, so they never contend on partition DDL
+    with db_pool.connection() as conn:
+        ensure_partitions_if_partitioned(conn)
+
+    with db_pool.cursor(dict_rows=False) as cursor:
+        cursor.execute(COUNT_SQL)
+        count_before = cursor.fetchone()[0]
+
+    print(f"🚀 Parallel load: {workers} workers, partitioned by {by}, "
+          f"max {max_in_flight} partitions in flight")
+    started = time.time()
+    results = []
+
+    def run(key, frame):
+        try:
+            if not by_bank:
+                return load_partition(db_pool, key, frame, retries)
+            with bank_locks[key[0]]:
+                return load_partition(db_pool, key, frame, retries)
+        finally:
+            in_flight.release()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = []
+        for key, frame in iter_partitions(source, by, freq, chunk_size):
+            # Block the reader until a partition slot frees up
+            in_flight.acquire()
+            futures.append(executor.submit(run, key, frame))
+
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            status = '❌' if 'error' in result else '✅'
+            print(f"  {status} {' / '.join(map(str, result['partition']))}: "
+                  f"{result['inserted']} inserted, {result['updated']} updated "
+                  f"({result['attempts']} attempt(s))")
+
+    elapsed = time.time() - started
+
+    # Consistency check: the table must have grown by exactly what we inserted
+    # (updates to existing reviews do not add rows)
+    with db_pool.cursor(dict_rows=False) as cursor:
+        cursor.execute(COUNT_SQL)
+        count_after = cursor.fetchone()[0]
+
+    inserted = sum(r['inserted'] for r in results)
+    failed = [r for r in results if 'error' in r]
+    deadlocks = sum(r['deadlocks'] for r in results)
+    consistent = (count_after - count_before) == inserted
+
+    print(f"\n📊 Loaded {inserted} reviews in {elapsed:.1f}s "
+          f"({inserted / elapsed if elapsed else 0:.0f} rows/sec)")
+    print(f"   Partitions: {len(results)} ({len(failed)} failed, {deadlocks} deadlock retries)")
+    print(f"   Consistency check: {count_before} -> {count_after} rows "
+          f"{'✅' if consistent else '❌ (concurrent writers or lost rows)'}")
+
+    return {
+        'inserted': inserted,
+        'updated': sum(r['updated'] for r in results),
+        'skipped': sum(r['skipped'] for r in results),
+        'partitions': results,
+        'failed': failed,
+        'deadlocks': deadlocks,
+        'count_before': count_before,
+        'count_after': count_after,
+        'consistent': consistent,
+        'seconds': round(elapsed, 2)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Load reviews into PostgreSQL in parallel partitions")
+    parser.add_argument('csv_path', help="reviews CSV (Task 1/2 layout)")
+    parser.add_argument('--workers', type=int, default=4, help="concurrent connections")
+    parser.add_argument('--by', choices=['bank', 'date', 'bank_date'], default='bank')
+    parser.add_argument('--freq', default='M', help="date partition period (e.g. M, Q, Y)")
+    parser.add_argument('--chunk-size', type=int, default=200000, help="CSV rows read at a time")
+    args = parser.parse_args()
+
+    summary = parallel_load_reviews(args.csv_path, args.workers, args.by, args.freq, args.chunk_size)
+    sys.exit(0 if summary['consistent'] and not summary['failed'] else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,429 @@
+# Save as: src/database/partitioning.py
+"""
+Optional range-partitioned reviews layout for Task 3
+Converts `reviews` into a table partitioned by review_date (optionally
+sub-partitioned by bank), keeps partitions created ahead of the data, and
+detaches or archives old partitions. Date columns use BRIN indexes, which
+stay tiny and cheap to maintain because reviews arrive roughly in date order.
+"""
+
+import re
+import sys
+import argparse
+from datetime import date, timedelta
+
+from db_pool import get_pool
+
+INTERVALS = ('month', 'quarter', 'year')
+
+# Layout settings written by the conversion; its presence marks the
+# partitioned layout for loaders and maintenance commands
+CONFIG_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS review_partitioning (
+    singleton BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (singleton),
+    partition_interval VARCHAR(10) NOT NULL,
+    by_bank BOOLEAN NOT NULL DEFAULT FALSE,
+    converted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+DEFAULT_PARTITION = 'reviews_default'
+
+PARTITION_NAME = re.compile(r'^reviews_p(\d{4})(?:_(\d{2})|_q([1-4]))?$')
+
+# Indexes on the partitioned parent; they cascade to every partition.
+# BRIN replaces the per-column B-trees on dates; rating and sentiment filters
+# are served by the summary tables and partition pruning instead.
+# The upsert key is NULLS NOT DISTINCT (PostgreSQL 15+), or reviews without a
+# date would never conflict and every reload would store them again.
+PARTITIONED_INDEXES = [
+    "CREATE UNIQUE INDEX idx_reviews_id_date ON reviews (review_id, review_date);",
+    "CREATE UNIQUE INDEX idx_reviews_external_id ON reviews (external_review_id, review_date) NULLS NOT DISTINCT;",
+    "CREATE INDEX idx_reviews_date_brin ON reviews USING BRIN (review_date);",
+    "CREATE INDEX idx_reviews_created_brin ON reviews USING BRIN (created_at);",
+]
+BANK_DATE_INDEX = "CREATE INDEX idx_reviews_bank_date ON reviews (bank_id, review_date);"
+
+# Indexes of the plain layout that the partitioned layout replaces; any other
+# non-unique index (e.g. full-text search) is recreated on the new table
+REPLACED_INDEXES = {
+    'idx_reviews_bank_id', 'idx_reviews_rating', 'idx_reviews_sentiment',
+    'idx_reviews_date', 'idx_reviews_bank_date'
+}
+
+def _add_months(day, months):
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+def period_start(day, interval):
+    """First day of the partition period containing `day`"""
+    if interval == 'month':
+        return date(day.year, day.month, 1)
+    if interval == 'quarter':
+        return date(day.year, 3 * ((day.month - 1) // 3) + 1, 1)
+    return date(day.year, 1, 1)
+
+def period_end(start, interval):
+    """Exclusive upper bound of the period beginning at `start`"""
+    return _add_months(start, {'month': 1, 'quarter': 3, 'year': 12}[interval])
+
+def partition_name(start, interval):
+    if interval == 'month':
+        return f"reviews_p{start.year}_{start.month:02d}"
+    if interval == 'quarter':
+        return f"reviews_p{start.year}_q{(start.month - 1) // 3 + 1}"
+    return f"reviews_p{start.year}"
+
+def parse_partition_name(name):
+    """(start, interval) for a partition named by partition_name(), else None"""
+    match = PARTITION_NAME.match(name)
+    if not match:
+        return None
+    year, month, quarter = match.groups()
+    if month:
+        return date(int(year), int(month), 1), 'month'
+    if quarter:
+        return date(int(year), 3 * (int(quarter) - 1) + 1, 1), 'quarter'
+    return date(int(year), 1, 1), 'year'
+
+def partitioning_config(cursor):
+    """{'interval', 'by_bank'} when reviews is partitioned, else None"""
+    cursor.execute("SELECT to_regclass('review_partitioning') IS NOT NULL;")
+    if not cursor.fetchone()[0]:
+        return None
+    cursor.execute("SELECT partition_interval, by_bank FROM review_partitioning;")
+    row = cursor.fetchone()
+    return {'interval': row[0], 'by_bank': row[1]} if row else None
+
+def stored_columns(cursor, table='reviews'):
+    """Column names of `table` in order, excluding generated columns (which cannot be inserted)"""
+    cursor.execute("""
+        SELECT attname FROM pg_attribute
+        WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped AND attgenerated = ''
+        ORDER BY attnum;
+    """, (table,))
+    return [row[0] for row in cursor.fetchall()]
+
+def _table_exists(cursor, name):
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL;", (name,))
+    return cursor.fetchone()[0]
+
+def _bank_ids(cursor):
+    cursor.execute("SELECT bank_id FROM banks ORDER BY bank_id;")
+    return [row[0] for row in cursor.fetchall()]
+
+def _create_bank_subpartitions(cursor, parent, bank_ids):
+    for bank_id in bank_ids:
+        cursor.execute(f"CREATE TABLE {parent}_b{bank_id} PARTITION OF {parent} FOR VALUES IN ({bank_id});")
+    cursor.execute(f"CREATE TABLE {parent}_bdefault PARTITION OF {parent} DEFAULT;")
+
+def create_partition(cursor, start, interval, by_bank=False):
+    """
+    Create the partition for the period starting at `start`.
+    Rows already routed to the default partition for that period are moved
+    into it, since a new range may not overlap rows held by the default.
+    """
+    name = partition_name(start, interval)
+    end = period_end(start, interval)
+    bounds = f"FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    subpartition = " PARTITION BY LIST (bank_id)" if by_bank else ""
+
+    cursor.execute(
+        f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE review_date >= %s AND review_date < %s);",
+        (start, end)
+    )
+    if not cursor.fetchone()[0]:
+        cursor.execute(f"CREATE TABLE {name} PARTITION OF reviews FOR VALUES {bounds}{subpartition};")
+        if by_bank:
+            _create_bank_subpartitions(cursor, name, _bank_ids(cursor))
+        return name
+
+    # Build the partition standalone, move the rows in, then attach it.
+    # Writing to partitions directly does not fire the statement triggers on
+    # reviews, so the summary tables see no change - the rows only move.
+    cursor.execute(
+        f"CREATE TABLE {name} (LIKE reviews INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING GENERATED){subpartition};"
+    )
+    if by_bank:
+        _create_bank_subpartitions(cursor, name, _bank_ids(cursor))
+    columns = ', '.join(stored_columns(cursor))
+    cursor.execute(f"""
+        WITH moved AS (
+            DELETE FROM {DEFAULT_PARTITION}
+            WHERE review_date >= %s AND review_date < %s
+            RETURNING {columns}
+        )
+        INSERT INTO {name} ({columns}) SELECT {columns} FROM moved;
+    """, (start, end))
+    cursor.execute(f"ALTER TABLE reviews ATTACH PARTITION {name} FOR VALUES {bounds};")
+    return name
+
+def list_partitions(cursor):
+    """[(name, start, end)] of the date partitions of reviews, oldest first"""
+    cursor.execute("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'reviews'::regclass;
+    """)
+    partitions = []
+    for (name,) in cursor.fetchall():
+        parsed = parse_partition_name(name)
+        if parsed:
+            start, interval = parsed
+            partitions.append((name, start, period_end(start, interval)))
+    return sorted(partitions, key=lambda p: p[1])
+
+def ensure_partitions(conn, ahead=3, today=None):
+    """
+    Create missing partitions from the current period through `ahead` periods
+    into the future, plus any period with rows waiting in the default
+    partition (late-arriving or back-dated reviews). Returns the names created.
+    """
+    today = today or date.today()
+    with conn.cursor() as cur:
+        config = partitioning_config(cur)
+        if not config:
+            raise RuntimeError("reviews is not partitioned; run `partitioning.py convert` first")
+        interval, by_bank = config['interval'], config['by_bank']
+
+        periods = set()
+        start = period_start(today, interval)
+        for _ in range(ahead + 1):
+            periods.add(start)
+            start = period_end(start, interval)
+
+        cur.execute(f"SELECT DISTINCT review_date FROM {DEFAULT_PARTITION} WHERE review_date IS NOT NULL;")
+        periods.update(period_start(row[0], interval) for row in cur.fetchall())
+
+        created = []
+        for start in sorted(periods):
+            if not _table_exists(cur, partition_name(start, interval)):
+                created.append(create_partition(cur, start, interval, by_bank))
+    conn.commit()
+    return created
+
+def ensure_partitions_if_partitioned(conn, ahead=3):
+    """ensure_partitions() for loaders, which run against either layout"""
+    with conn.cursor() as cur:
+        partitioned = partitioning_config(cur) is not None
+    conn.rollback()
+    return ensure_partitions(conn, ahead) if partitioned else []
+
+def _dependent_views(cursor):
+    """[(view name, definition)] of views selecting from reviews"""
+    cursor.execute("""
+        SELECT DISTINCT v.oid::regclass::text, pg_get_viewdef(v.oid)
+        FROM pg_depend d
+        JOIN pg_rewrite r ON r.oid = d.objid
+        JOIN pg_class v ON v.oid = r.ev_class
+        WHERE d.refobjid = 'reviews'::regclass AND v.oid <> 'reviews'::regclass;
+    """)
+    return cursor.fetchall()
+
+def _extra_index_definitions(cursor):
+    """Non-unique indexes on reviews beyond the ones the partitioned layout replaces"""
+    cursor.execute("""
+        SELECT c.relname, pg_get_indexdef(i.indexrelid)
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = 'reviews'::regclass AND NOT i.indisunique;
+    """)
+    return [(name, definition) for name, definition in cursor.fetchall() if name not in REPLACED_INDEXES]
+
+def _trigger_definitions(cursor):
+    cursor.execute("""
+        SELECT tgname, pg_get_triggerdef(oid)
+        FROM pg_trigger
+        WHERE tgrelid = 'reviews'::regclass AND NOT tgisinternal;
+    """)
+    return cursor.fetchall()
+
+def convert_to_partitioned(db_pool=None, interval='month', by_bank=False, ahead=3, keep_old=False):
+    """
+    Rebuild reviews as a table range-partitioned on review_date, in one
+    transaction. Data, triggers, dependent views and the review_id sequence
+    carry over. Writers are blocked for the duration of the copy.
+    The old table is kept as reviews_unpartitioned when `keep_old` is set.
+    """
+    if interval not in INTERVALS:
+        raise ValueError(f"interval must be one of {', '.join(INTERVALS)}")
+    db_pool = db_pool or get_pool()
+
+    with db_pool.connection() as conn:
+        with conn.cursor() as cur:
+            if partitioning_config(cur):
+                raise RuntimeError("reviews is already partitioned")
+
+            cur.execute("LOCK TABLE reviews IN ACCESS EXCLUSIVE MODE;")
+            triggers = _trigger_definitions(cur)
+            views = _dependent_views(cur)
+            extra_indexes = _extra_index_definitions(cur)
+            columns = ', '.join(stored_columns(cur))
+            cur.execute("SELECT pg_get_serial_sequence('reviews', 'review_id');")
+            sequence = cur.fetchone()[0]
+            cur.execute("SELECT MIN(review_date), MAX(review_date) FROM reviews;")
+            first_day, last_day = cur.fetchone()
+
+            # Move the old table and its index names out of the way
+            cur.execute("ALTER TABLE reviews RENAME TO reviews_unpartitioned;")
+            cur.execute("SELECT indexname FROM pg_indexes WHERE tablename = 'reviews_unpartitioned';")
+            for (index,) in cur.fetchall():
+                cur.execute(f"ALTER INDEX {index} RENAME TO {index[:40]}_unpartitioned;")
+            for name, _ in triggers:
+                cur.execute(f"DROP TRIGGER {name} ON reviews_unpartitioned;")
+            if sequence:
+                cur.execute(f"ALTER SEQUENCE {sequence} OWNED BY NONE;")
+
+            # review_date NULLs are allowed and land in the default partition,
+            # so there is no primary key; uniqueness is enforced per date instead
+            cur.execute("""
+                CREATE TABLE reviews (
+                    LIKE reviews_unpartitioned INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING GENERATED,
+                    FOREIGN KEY (bank_id) REFERENCES banks(bank_id) ON DELETE CASCADE,
+                    FOREIGN KEY (text_hash) REFERENCES review_texts(text_hash)
+                ) PARTITION BY RANGE (review_date);
+            """)
+            cur.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF reviews DEFAULT;")
+
+            today = date.today()
+            start = period_start(first_day or today, interval)
+            last = period_start(max(last_day or today, today), interval)
+            for _ in range(ahead):
+                last = period_end(last, interval)
+            while start <= last:
+                create_partition(cur, start, interval, by_bank)
+                start = period_end(start, interval)
+
+            cur.execute(f"INSERT INTO reviews ({columns}) SELECT {columns} FROM reviews_unpartitioned;")
+            copied = cur.rowcount
+
+            # Index after the copy: one sorted build per partition beats
+            # maintaining every index row by row
+            for statement in PARTITIONED_INDEXES + ([] if by_bank else [BANK_DATE_INDEX]):
+                cur.execute(statement)
+            for _, definition in extra_indexes:
+                cur.execute(definition)
+
+            # Triggers are recreated only now, so the copy does not count twice
+            for _, definition in triggers:
+                cur.execute(definition)
+            for view, definition in views:
+                cur.execute(f"CREATE OR REPLACE VIEW {view} AS {definition}")
+            if sequence:
+                cur.execute(f"ALTER SEQUENCE {sequence} OWNED BY reviews.review_id;")
+
+            if not keep_old:
+                cur.execute("DROP TABLE reviews_unpartitioned;")
+
+            cur.execute(CONFIG_TABLE_SQL)
+            cur.execute(
+                "INSERT INTO review_partitioning (partition_interval, by_bank) VALUES (%s, %s);",
+                (interval, by_bank)
+            )
+        conn.commit()
+
+    print(f"✅ reviews partitioned by {interval}{' and bank' if by_bank else ''} ({copied} rows copied)")
+    return copied
+
+def detach_partitions(db_pool=None, before=None, archive_schema=None, drop=False):
+    """
+    Detach every date partition that ends on or before `before`.
+    Detached partitions are kept as standalone tables, moved to
+    `archive_schema` if given, or dropped when `drop` is set (along with
+    texts no other review uses). The summary tables and daily rollup are
+    recomputed for the removed rows.
+    Returns the names of the partitions removed from reviews.
+    """
+    db_pool = db_pool or get_pool()
+    before = before or date.today()
+    detached = []
+
+    with db_pool.connection() as conn:
+        with conn.cursor() as cur:
+            if not partitioning_config(cur):
+                raise RuntimeError("reviews is not partitioned")
+            if archive_schema:
+                cur.execute(f"CREATE SCHEMA IF NOT EXISTS {archive_schema};")
+
+            old = [(name, start, end) for name, start, end in list_partitions(cur) if end <= before]
+            for name, start, end in old:
+                cur.execute(f"ALTER TABLE reviews DETACH PARTITION {name};")
+                if drop:
+                    cur.execute(f"DROP TABLE {name};")
+                elif archive_schema:
+                    cur.execute(f"ALTER TABLE {name} SET SCHEMA {archive_schema};")
+                cur.execute("SELECT rebuild_review_daily_rollup(%s, %s);", (start, end - timedelta(days=1)))
+                detached.append(name)
+
+            if detached:
+                # Detaching bypasses the triggers, so refresh the per-bank totals
+                cur.execute("SELECT rebuild_review_stats();")
+                if drop:
+                    cur.execute("SELECT prune_review_texts();")
+        conn.commit()
+
+    return detached
+
+def partition_report(db_pool=None):
+    """Print each partition with its row estimate and size"""
+    db_pool = db_pool or get_pool()
+    with db_pool.cursor(dict_rows=False) as cur:
+        config = partitioning_config(cur)
+        if not config:
+            print("reviews is not partitioned")
+            return []
+        cur.execute("""
+            SELECT c.relname, c.reltuples::BIGINT, pg_size_pretty(pg_total_relation_size(c.oid))
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'reviews'::regclass
+            ORDER BY c.relname;
+        """)
+        rows = cur.fetchall()
+
+    print(f"Partitioned by {config['interval']}{' and bank' if config['by_bank'] else ''}")
+    for name, estimate, size in rows:
+        print(f"  {name}: ~{max(estimate, 0)} rows, {size}")
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the partitioned reviews layout")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    convert = commands.add_parser('convert', help="convert reviews to the partitioned layout")
+    convert.add_argument('--interval', choices=INTERVALS, default='month')
+    convert.add_argument('--by-bank', action='store_true', help="sub-partition each period by bank")
+    convert.add_argument('--ahead', type=int, default=3, help="future periods to create")
+    convert.add_argument('--keep-old', action='store_true', help="keep the old table as reviews_unpartitioned")
+
+    ensure = commands.add_parser('ensure', help="create upcoming partitions (run before loads or from cron)")
+    ensure.add_argument('--ahead', type=int, default=3)
+
+    detach = commands.add_parser('detach', help="detach partitions older than a date")
+    detach.add_argument('--before', type=date.fromisoformat, required=True, help="YYYY-MM-DD")
+    detach.add_argument('--archive-schema', help="move detached partitions into this schema")
+    detach.add_argument('--drop', action='store_true', help="drop detached partitions")
+
+    commands.add_parser('status', help="list partitions")
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'convert':
+            convert_to_partitioned(interval=args.interval, by_bank=args.by_bank,
+                                   ahead=args.ahead, keep_old=args.keep_old)
+        elif args.command == 'ensure':
+            with get_pool().connection() as conn:
+                created = ensure_partitions(conn, ahead=args.ahead)
+            print(f"✅ Created {len(created)} partition(s): {', '.join(created) or '-'}")
+        elif args.command == 'detach':
+            detached = detach_partitions(before=args.before, archive_schema=args.archive_schema, drop=args.drop)
+            print(f"✅ Detached {len(detached)} partition(s): {', '.join(detached) or '-'}")
+        else:
+            partition_report()
+    except Exception as e:
+        print(f"❌ Partitioning failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
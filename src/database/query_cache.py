@@ -0,0 +1,152 @@
+# Save as: src/database/query_cache.py
+"""
+Query-result cache for Task 3
+In-process TTL + LRU cache for read queries, keyed by SQL text and parameters,
+with invalidation by table when data is written
+"""
+
+import re
+import time
+import threading
+from collections import OrderedDict
+
+# Relations whose contents change when a base table is written (summary
+# tables and rollups are trigger-maintained from reviews; review loads and
+# inserts also intern their texts in review_texts)
+TABLE_DEPENDENTS = {
+    'reviews': {
+        'reviews', 'bank_review_stats', 'bank_sentiment_stats', 'review_daily_rollup',
+        'bank_reviews_summary', 'sentiment_analysis', 'monthly_trends',
+        'review_themes', 'bank_theme_summary', 'monthly_theme_trends', 'review_details',
+        'review_texts'
+    },
+    'banks': {
+        'banks', 'bank_review_stats', 'bank_sentiment_stats', 'review_daily_rollup',
+        'bank_reviews_summary', 'sentiment_analysis', 'monthly_trends',
+        'bank_theme_summary', 'monthly_theme_trends'
+    },
+    'review_themes': {'review_themes', 'bank_theme_summary', 'monthly_theme_trends'},
+    'review_texts': {'review_texts', 'review_details'},
+}
+
+READ_TABLES = re.compile(r'\b(?:FROM|JOIN)\s+([a-z_][\w.]*)', re.IGNORECASE)
+WRITE_TABLES = re.compile(r'\b(?:INSERT\s+INTO|(?<!DO\s)UPDATE|DELETE\s+FROM|TRUNCATE(?:\s+TABLE)?)\s+([a-z_][\w.]*)', re.IGNORECASE)
+WRITE_KEYWORDS = re.compile(r'\b(?:INSERT|UPDATE|DELETE|TRUNCATE|CREATE|ALTER|DROP|COPY|CALL)\b', re.IGNORECASE)
+
+def _bare(name):
+    return name.split('.')[-1].lower()
+
+def tables_read(query):
+    """Relations a query reads from"""
+    return {_bare(name) for name in READ_TABLES.findall(query)}
+
+def tables_written(query):
+    """Tables a statement writes to"""
+    return {_bare(name) for name in WRITE_TABLES.findall(query)}
+
+def is_cacheable(query):
+    """Only plain reads are cached; anything that writes or calls a function is not"""
+    stripped = query.lstrip().upper()
+    if not (stripped.startswith('SELECT') or stripped.startswith('WITH')):
+        return False
+    if WRITE_KEYWORDS.search(query):
+        return False
+    # SELECT some_function(...) without a FROM may have side effects (e.g. rebuilds)
+    return bool(tables_read(query))
+
+class QueryCache:
+    """
+    Thread-safe TTL + LRU cache of query results.
+    Entries expire after `ttl` seconds, the least recently used entry is
+    evicted beyond `maxsize`, and invalidate() drops every entry that read a
+    written table. Writes made by other processes are only picked up when
+    entries expire, so `ttl` bounds staleness.
+    """
+
+    def __init__(self, ttl=60, maxsize=256):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.miss_seconds = 0.0
+        self.saved_seconds = 0.0
+
+    @staticmethod
+    def key(query, params=None):
+        if isinstance(params, dict):
+            params = sorted(params.items())
+        return (' '.join(query.split()), tuple(params) if params else ())
+
+    def get(self, query, params=None):
+        """Cached rows (copied) or None"""
+        key = self.key(query, params)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            rows, tables, expires, latency = entry
+            if time.monotonic() >= expires:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.saved_seconds += latency
+        return [dict(row) for row in rows]
+
+    def put(self, query, params, rows, latency):
+        """Store the rows of a miss along with how long the database took"""
+        key = self.key(query, params)
+        with self._lock:
+            self.miss_seconds += latency
+            self._entries[key] = (
+                [dict(row) for row in rows], tables_read(query),
+                time.monotonic() + self.ttl, latency
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *tables):
+        """Drop entries reading any of `tables` or relations derived from them"""
+        affected = set()
+        for table in tables:
+            affected |= TABLE_DEPENDENTS.get(_bare(table), {_bare(table)})
+        with self._lock:
+            stale = [key for key, entry in self._entries.items() if entry[1] & affected]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        """Hit / miss counters and the database time the cache has saved"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+                'avg_miss_ms': round(1000 * self.miss_seconds / self.misses, 3) if self.misses else 0.0,
+                'saved_ms': round(1000 * self.saved_seconds, 1),
+            }
@@ -0,0 +1,104 @@
+# Save as: src/database/review_search.py
+"""
+Review search for Task 3
+Builds ranked, paginated searches over the full-text index of the distinct
+review texts, with an optional trigram index for substring matches
+(misspellings, partial words)
+"""
+
+SEARCH_MODES = ('websearch', 'phrase', 'substring')
+
+TRIGRAM_INDEX = 'idx_review_texts_trgm'
+
+def escape_like(text):
+    """Escape LIKE wildcards so `text` matches literally (with ESCAPE '\\')"""
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def build_search_query(text, mode='websearch', bank=None, start_date=None, end_date=None,
+                       min_rating=None, max_rating=None, sentiment=None, limit=20, offset=0):
+    """
+    Search query over reviews; returns (query, params).
+    websearch: Google-style syntax ("app crash" -login), ranked with ts_rank_cd.
+    phrase: words in order. substring: ILIKE via the trigram index, ranked by similarity.
+    Each row carries total_matches so callers can paginate.
+    """
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"mode must be one of {', '.join(SEARCH_MODES)}")
+
+    params = []
+    if mode == 'substring':
+        # '%' and '_' in user input are literal characters, not wildcards
+        match = "t.review_text ILIKE %s ESCAPE '\\'"
+        rank = "similarity(t.review_text, %s)"
+        params += [text, f"%{escape_like(text)}%"]
+    else:
+        function = 'websearch_to_tsquery' if mode == 'websearch' else 'phraseto_tsquery'
+        match = f"t.review_tsv @@ {function}('english', %s)"
+        rank = f"ts_rank_cd(t.review_tsv, {function}('english', %s))"
+        params += [text, text]
+
+    conditions = [match]
+    for condition, value in (
+        ("b.bank_name = %s", bank),
+        ("r.review_date >= %s", start_date),
+        ("r.review_date <= %s", end_date),
+        ("r.rating >= %s", min_rating),
+        ("r.rating <= %s", max_rating),
+        ("r.sentiment_label = %s", sentiment),
+    ):
+        if value is not None:
+            conditions.append(condition)
+            params.append(value)
+
+    # Rank and count every match, then build snippets for the returned page only
+    headline = ("LEFT(page.review_text, 200)" if mode == 'substring' else
+                f"ts_headline('english', page.review_text, "
+                f"{'websearch_to_tsquery' if mode == 'websearch' else 'phraseto_tsquery'}('english', %s), "
+                "'MaxFragments=2, MaxWords=20, MinWords=5')")
+    query = f"""
+    SELECT page.*, {headline} as snippet
+    FROM (
+        SELECT
+            r.review_id,
+            b.bank_name,
+            t.review_text,
+            r.rating,
+            r.review_date,
+            r.sentiment_label,
+            {rank} as rank,
+            COUNT(*) OVER () as total_matches
+        FROM review_texts t
+        JOIN reviews r ON r.text_hash = t.text_hash
+        JOIN banks b ON r.bank_id = b.bank_id
+        WHERE {' AND '.join(conditions)}
+        ORDER BY rank DESC, r.review_date DESC NULLS LAST
+        LIMIT %s OFFSET %s
+    ) page
+    ORDER BY page.rank DESC, page.review_date DESC NULLS LAST;
+    """
+    # Parameters in textual order: headline, rank, filters, paging
+    ordered = ([] if mode == 'substring' else [text]) + params + [limit, offset]
+    return query, ordered
+
+def enable_trigram_index(db_pool):
+    """
+    Install pg_trgm and index the distinct review texts for substring search.
+    Built CONCURRENTLY so loads keep running.
+    Returns False when the extension cannot be installed.
+    """
+    with db_pool.connection() as conn:
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cur:
+                try:
+                    cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+                except Exception as e:
+                    print(f"⚠️  pg_trgm unavailable, substring search disabled: {e}")
+                    return False
+                cur.execute(
+                    f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {TRIGRAM_INDEX} "
+                    "ON review_texts USING GIN (review_text gin_trgm_ops);"
+                )
+        finally:
+            conn.autocommit = False
+    return True
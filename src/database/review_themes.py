@@ -0,0 +1,167 @@
+# Save as: src/database/review_themes.py
+"""
+Review themes for Task 3
+Bulk loads the thematic stage's review-level theme assignments into
+review_themes (matched to reviews on the external review ID) and builds
+per-bank theme breakdowns over them
+"""
+
+from bulk_load import copy_frame
+
+CREATE_THEME_STAGING_SQL = """
+CREATE TEMP TABLE IF NOT EXISTS staging_review_themes (
+    external_review_id TEXT,
+    theme VARCHAR(50),
+    score REAL
+) ON COMMIT DROP;
+"""
+
+THEME_STAGING_COLUMNS = ['external_review_id', 'theme', 'score']
+
+COPY_THEME_STAGING_SQL = (
+    f"COPY staging_review_themes ({', '.join(THEME_STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+)
+
+# A staged review's theme set replaces the stored one: drop themes it no longer has...
+DELETE_STALE_THEMES_SQL = """
+DELETE FROM review_themes t
+USING reviews r
+WHERE t.review_id = r.review_id
+  AND r.external_review_id IN (SELECT external_review_id FROM staging_review_themes)
+  AND NOT EXISTS (
+      SELECT 1 FROM staging_review_themes s
+      WHERE s.external_review_id = r.external_review_id AND s.theme = t.theme
+  );
+"""
+
+# ...then upsert the rest, writing only new or changed scores
+MERGE_THEMES_SQL = """
+INSERT INTO review_themes (review_id, theme, score)
+SELECT r.review_id, s.theme, MAX(s.score)
+FROM staging_review_themes s
+JOIN reviews r ON r.external_review_id = s.external_review_id
+GROUP BY r.review_id, s.theme
+ON CONFLICT (review_id, theme) DO UPDATE SET score = EXCLUDED.score
+WHERE review_themes.score IS DISTINCT FROM EXCLUDED.score;
+"""
+
+UNMATCHED_THEMES_SQL = """
+SELECT COUNT(DISTINCT s.external_review_id)
+FROM staging_review_themes s
+WHERE NOT EXISTS (SELECT 1 FROM reviews r WHERE r.external_review_id = s.external_review_id);
+"""
+
+def prepare_review_themes(df):
+    """
+    Map a review themes DataFrame (review_id, theme, score as written by the
+    thematic stage) onto the staging columns.
+    Returns (prepared DataFrame, number of rows skipped).
+    """
+    import pandas as pd
+
+    prepared = pd.DataFrame({
+        'external_review_id': df['review_id'].where(df['review_id'].notna(), '').astype(str).str.strip(),
+        'theme': df['theme'].astype(str).str.strip().str[:50],
+        'score': pd.to_numeric(df['score'], errors='coerce'),
+    })
+    valid = (
+        (prepared['external_review_id'] != '')
+        & (prepared['theme'] != '')
+        & (prepared['score'] > 0) & (prepared['score'] <= 1)
+    )
+    return prepared[valid], int((~valid).sum())
+
+def bulk_load_review_themes(connection, frames):
+    """
+    Load theme assignments in one transaction: COPY every frame into a staging
+    table, then replace the theme set of each staged review. `frames` is a
+    DataFrame or an iterable of DataFrames.
+    Returns a dict of written / removed / unmatched (reviews not in the
+    database) / skipped counts.
+    """
+    import pandas as pd
+
+    if isinstance(frames, pd.DataFrame):
+        frames = [frames]
+
+    skipped_count = 0
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(CREATE_THEME_STAGING_SQL)
+            for frame in frames:
+                prepared, skipped = prepare_review_themes(frame)
+                skipped_count += skipped
+                if not prepared.empty:
+                    copy_frame(cursor, prepared, COPY_THEME_STAGING_SQL)
+
+            cursor.execute(DELETE_STALE_THEMES_SQL)
+            removed_count = cursor.rowcount
+            cursor.execute(MERGE_THEMES_SQL)
+            written_count = cursor.rowcount
+            cursor.execute(UNMATCHED_THEMES_SQL)
+            unmatched_count = cursor.fetchone()[0]
+
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+
+    return {
+        'written': written_count,
+        'removed': removed_count,
+        'unmatched': unmatched_count,
+        'skipped': skipped_count
+    }
+
+def build_theme_breakdown_query(theme=None, bank=None, start_date=None, end_date=None):
+    """
+    Per-bank theme breakdown over a date window; returns (query, params).
+    negative_share is the share of a theme's reviews that are negative;
+    theme_share is the share of the bank's reviews in the window (counted from
+    review_daily_rollup) that carry the theme.
+    """
+    theme_conditions, theme_params = [], []
+    window_conditions, window_params = [], []
+    for column, operator, value in (
+        ('review_date', '>=', start_date),
+        ('review_date', '<=', end_date),
+    ):
+        if value is not None:
+            theme_conditions.append(f"r.{column} {operator} %s")
+            theme_params.append(value)
+            window_conditions.append(f"d.day {operator} %s")
+            window_params.append(value)
+    if bank is not None:
+        theme_conditions.append("b.bank_name = %s")
+        theme_params.append(bank)
+        window_conditions.append("d.bank_id IN (SELECT bank_id FROM banks WHERE bank_name = %s)")
+        window_params.append(bank)
+    if theme is not None:
+        theme_conditions.append("t.theme = %s")
+        theme_params.append(theme)
+
+    query = f"""
+    WITH window_totals AS (
+        SELECT d.bank_id, SUM(d.review_count) as bank_reviews
+        FROM review_daily_rollup d
+        {'WHERE ' + ' AND '.join(window_conditions) if window_conditions else ''}
+        GROUP BY d.bank_id
+    )
+    SELECT
+        b.bank_name,
+        t.theme,
+        COUNT(*) as theme_reviews,
+        COUNT(*) FILTER (WHERE r.sentiment_label = 'negative') as negative_reviews,
+        ROUND(COUNT(*) FILTER (WHERE r.sentiment_label = 'negative')::NUMERIC / COUNT(*), 4) as negative_share,
+        ROUND(COUNT(*)::NUMERIC / NULLIF(MAX(w.bank_reviews), 0), 4) as theme_share,
+        ROUND(AVG(t.score)::NUMERIC, 4) as avg_theme_score,
+        ROUND(AVG(r.rating), 2) as avg_rating
+    FROM review_themes t
+    JOIN reviews r ON r.review_id = t.review_id
+    JOIN banks b ON b.bank_id = r.bank_id
+    LEFT JOIN window_totals w ON w.bank_id = r.bank_id
+    {'WHERE ' + ' AND '.join(theme_conditions) if theme_conditions else ''}
+    GROUP BY b.bank_name, t.theme
+    ORDER BY b.bank_name, theme_reviews DESC;
+    """
+    return query, window_params + theme_params
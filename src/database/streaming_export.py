@@ -0,0 +1,161 @@
+# Save as: src/database/streaming_export.py
+"""
+Streaming review export for Task 3
+Writes CSV via COPY (query) TO STDOUT and Parquet via a named server-side
+cursor fetched in chunks, so exports run at constant client memory
+"""
+
+import io
+import os
+from decimal import Decimal
+
+from psycopg2 import sql
+
+# Exportable columns and the expressions that produce them
+EXPORT_COLUMNS = {
+    'bank_name': 'b.bank_name',
+    'review_text': 'r.review_text',
+    'rating': 'r.rating',
+    'review_date': 'r.review_date',
+    'sentiment_label': 'r.sentiment_label',
+    'sentiment_score': 'r.sentiment_score',
+    'source': 'r.source',
+    'created_at': 'r.created_at',
+    'external_review_id': 'r.external_review_id',
+}
+
+DEFAULT_COLUMNS = [
+    'bank_name', 'review_text', 'rating', 'review_date',
+    'sentiment_label', 'sentiment_score', 'source', 'created_at'
+]
+
+def build_export_query(columns=None, bank=None, start_date=None, end_date=None, order_by_date=True):
+    """Build the export SELECT with optional bank / date-range filters; returns (query, params)"""
+    columns = columns or DEFAULT_COLUMNS
+    unknown = [c for c in columns if c not in EXPORT_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown export columns: {', '.join(unknown)}")
+
+    select_list = sql.SQL(', ').join(
+        sql.SQL(f"{EXPORT_COLUMNS[c]} AS ") + sql.Identifier(c) for c in columns
+    )
+
+    conditions = []
+    params = []
+    if bank:
+        conditions.append(sql.SQL("b.bank_name = %s"))
+        params.append(bank)
+    if start_date:
+        conditions.append(sql.SQL("r.review_date >= %s"))
+        params.append(start_date)
+    if end_date:
+        conditions.append(sql.SQL("r.review_date <= %s"))
+        params.append(end_date)
+
+    query = sql.SQL("SELECT {} FROM review_details r JOIN banks b ON r.bank_id = b.bank_id").format(select_list)
+    if conditions:
+        query += sql.SQL(" WHERE ") + sql.SQL(" AND ").join(conditions)
+    if order_by_date:
+        query += sql.SQL(" ORDER BY r.review_date DESC")
+
+    return query, params
+
+class _CsvRecordCounter(io.TextIOBase):
+    """
+    Text file wrapper counting the CSV records written through it: newlines
+    outside quoted fields (review texts may contain line breaks). A TextIOBase,
+    so copy_expert writes decoded text to it.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.records = 0
+        self.quoted = False
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        parts = data.split('"')
+        for i, part in enumerate(parts):
+            if not self.quoted:
+                self.records += part.count('\n')
+            if i < len(parts) - 1:
+                self.quoted = not self.quoted
+        return self.f.write(data)
+
+def export_csv(conn, output_path, query, params):
+    """Stream query results to CSV with COPY ... TO STDOUT; returns the row count"""
+    with conn.cursor() as cur:
+        # COPY takes no bind parameters, so inline them safely first
+        select_sql = cur.mogrify(query, params).decode('utf-8')
+        with open(output_path, 'w', encoding='utf-8', newline='') as f:
+            counter = _CsvRecordCounter(f)
+            cur.copy_expert(f"COPY ({select_sql}) TO STDOUT WITH (FORMAT csv, HEADER true)", counter)
+    # Count what was written; cursor.rowcount is not reliable after copy_expert
+    return max(counter.records - 1, 0)
+
+def _parquet_schema(columns):
+    import pyarrow as pa
+
+    types = {
+        'bank_name': pa.string(),
+        'review_text': pa.string(),
+        'rating': pa.int16(),
+        'review_date': pa.date32(),
+        'sentiment_label': pa.string(),
+        'sentiment_score': pa.float32(),
+        'source': pa.string(),
+        'created_at': pa.timestamp('us'),
+        'external_review_id': pa.string(),
+    }
+    return pa.schema([(c, types[c]) for c in columns])
+
+def export_parquet(conn, output_path, query, params, columns, chunk_size=50000):
+    """Stream query results to Parquet through a named server-side cursor; returns the row count"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _parquet_schema(columns)
+    row_count = 0
+
+    with conn.cursor(name='review_export') as cur:
+        cur.itersize = chunk_size
+        cur.execute(query, params)
+
+        with pq.ParquetWriter(output_path, schema, compression='zstd') as writer:
+            while True:
+                rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    break
+                data = list(zip(*rows))
+                arrays = [
+                    pa.array([float(v) if isinstance(v, Decimal) else v for v in values], type=field.type)
+                    for values, field in zip(data, schema)
+                ]
+                writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+                row_count += len(rows)
+
+    conn.commit()
+    return row_count
+
+def export_reviews(db_pool, output_path, file_format=None, columns=None, bank=None,
+                   start_date=None, end_date=None, order_by_date=True, chunk_size=50000):
+    """
+    Export reviews to CSV or Parquet without materialising them client-side.
+    The format is taken from the file extension unless given explicitly.
+    """
+    columns = columns or DEFAULT_COLUMNS
+    file_format = file_format or ('parquet' if output_path.endswith('.parquet') else 'csv')
+    if file_format not in ('csv', 'parquet'):
+        raise ValueError(f"Unsupported export format: {file_format}")
+    query, params = build_export_query(columns, bank, start_date, end_date, order_by_date)
+
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with db_pool.connection() as conn:
+        if file_format == 'parquet':
+            return export_parquet(conn, output_path, query, params, columns, chunk_size)
+        return export_csv(conn, output_path, query, params)
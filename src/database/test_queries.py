@@ -3,7 +3,34 @@
 Test SQL queries to verify database functionality
 """
 
-from db_connection import DatabaseManager
+from db_connection import create_manager
+
+# Keyword scan over negative reviews, shared with the query plan benchmark
+COMMON_COMPLAINTS_SQL = """
+    SELECT 
+        b.bank_name,
+        COUNT(*) as complaint_count,
+        STRING_AGG(DISTINCT 
+            CASE 
+                WHEN LOWER(r.review_text) LIKE '%crash%' THEN 'crash'
+                WHEN LOWER(r.review_text) LIKE '%slow%' THEN 'slow'
+                WHEN LOWER(r.review_text) LIKE '%error%' THEN 'error'
+                WHEN LOWER(r.review_text) LIKE '%login%' THEN 'login'
+                WHEN LOWER(r.review_text) LIKE '%transfer%' THEN 'transfer'
+            END, ', ') as issue_types
+    FROM review_details r
+    JOIN banks b ON r.bank_id = b.bank_id
+    WHERE r.sentiment_label = 'negative'
+    AND (
+        LOWER(r.review_text) LIKE '%crash%'
+        OR LOWER(r.review_text) LIKE '%slow%'
+        OR LOWER(r.review_text) LIKE '%error%'
+        OR LOWER(r.review_text) LIKE '%login%'
+        OR LOWER(r.review_text) LIKE '%transfer%'
+    )
+    GROUP BY b.bank_name
+    ORDER BY complaint_count DESC;
+"""
 
 def test_database():
     """Run test queries to verify database setup"""
@@ -11,7 +38,7 @@ def test_database():
     print("🧪 Testing Database Queries")
     print("="*60)
     
-    db = DatabaseManager()
+    db = create_manager()
     
     if not db.connect():
         print("❌ Cannot connect to database")
@@ -47,7 +74,7 @@ def test_database():
         print("\n4. Sample reviews:")
         reviews = db.execute_query("""
             SELECT b.bank_name, r.review_text, r.rating, r.sentiment_label
-            FROM reviews r
+            FROM review_details r
             JOIN banks b ON r.bank_id = b.bank_id
             LIMIT 3;
         """, fetch=True)
@@ -58,31 +85,7 @@ def test_database():
         
         # Test 5: Advanced query - Find common complaints
         print("\n5. Common negative keywords:")
-        complaints = db.execute_query("""
-            SELECT 
-                b.bank_name,
-                COUNT(*) as complaint_count,
-                STRING_AGG(DISTINCT 
-                    CASE 
-                        WHEN LOWER(r.review_text) LIKE '%crash%' THEN 'crash'
-                        WHEN LOWER(r.review_text) LIKE '%slow%' THEN 'slow'
-                        WHEN LOWER(r.review_text) LIKE '%error%' THEN 'error'
-                        WHEN LOWER(r.review_text) LIKE '%login%' THEN 'login'
-                        WHEN LOWER(r.review_text) LIKE '%transfer%' THEN 'transfer'
-                    END, ', ') as issue_types
-            FROM reviews r
-            JOIN banks b ON r.bank_id = b.bank_id
-            WHERE r.sentiment_label = 'negative'
-            AND (
-                LOWER(r.review_text) LIKE '%crash%'
-                OR LOWER(r.review_text) LIKE '%slow%'
-                OR LOWER(r.review_text) LIKE '%error%'
-                OR LOWER(r.review_text) LIKE '%login%'
-                OR LOWER(r.review_text) LIKE '%transfer%'
-            )
-            GROUP BY b.bank_name
-            ORDER BY complaint_count DESC;
-        """, fetch=True)
+        complaints = db.execute_query(COMMON_COMPLAINTS_SQL, fetch=True)
         
         for complaint in complaints:
             if complaint['issue_types']:
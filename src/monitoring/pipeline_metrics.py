@@ -0,0 +1,414 @@
+# Save as: src/monitoring/pipeline_metrics.py
+"""
+Pipeline metrics
+Stage timers, counters and memory figures that every pipeline stage
+(scrape, clean, sentiment, TF-IDF, DB load) reports into, written to
+pluggable sinks: JSON lines for run logs and a Prometheus textfile for
+node_exporter. Timed stages can also be profiled with cProfile or a
+lightweight stack sampler.
+
+Configured from the environment on first use:
+    PIPELINE_METRICS_JSONL   append one JSON event per line to this file
+    PIPELINE_METRICS_PROM    keep this Prometheus textfile up to date
+    PIPELINE_PROFILE         'cprofile' or 'sample' to profile timed stages
+    PIPELINE_PROFILE_STAGES  comma-separated stages to profile (default: all)
+    PIPELINE_PROFILE_DIR     where profiles are written (default: data/profiles)
+With none set, stages are still timed and aggregated in memory, which costs
+a few microseconds per stage.
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import atexit
+import socket
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_PROFILE_DIR = os.path.join(ROOT_DIR, 'data', 'profiles')
+
+def peak_rss_bytes():
+    """Peak resident set size of this process so far (None where unsupported)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def current_rss_bytes():
+    """Current resident set size (Linux only; None elsewhere)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+class JsonLinesSink:
+    """Appends every event as one JSON object per line"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.file = open(path, 'a', encoding='utf-8', buffering=1)
+
+    def write(self, event, metrics):
+        line = json.dumps(event, default=str)
+        with self.lock:
+            self.file.write(line + '\n')
+
+    def close(self, metrics):
+        with self.lock:
+            if not self.file.closed:
+                self.file.close()
+
+class PrometheusTextfileSink:
+    """
+    Rewrites a Prometheus text-format file (for node_exporter's textfile
+    collector) from the running totals after every stage, atomically so the
+    collector never reads a partial file
+    """
+
+    def __init__(self, path, prefix='pipeline'):
+        self.path = path
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def write(self, event, metrics):
+        # Counters change too often to rewrite the file for each one
+        if event['type'] == 'timer':
+            self.flush(metrics)
+
+    def close(self, metrics):
+        self.flush(metrics)
+
+    @staticmethod
+    def _labels(labels):
+        if not labels:
+            return ''
+        escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for v in labels.values())
+        return '{' + ','.join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + '}'
+
+    def render(self, metrics):
+        p = self.prefix
+        lines = []
+        stages, counters, gauges = metrics.snapshot()
+
+        for name, kind, help_text, value_of in (
+            ('stage_seconds_total', 'counter', 'Wall time spent in each stage', lambda s: s['seconds']),
+            ('stage_runs_total', 'counter', 'Completed runs of each stage', lambda s: s['runs']),
+            ('stage_errors_total', 'counter', 'Stage runs that raised', lambda s: s['errors']),
+            ('stage_rows_total', 'counter', 'Rows processed by each stage', lambda s: s['rows']),
+            ('stage_rows_per_second', 'gauge', 'Throughput of the latest run of each stage', lambda s: s['last_rows_per_sec']),
+            ('stage_last_seconds', 'gauge', 'Duration of the latest run of each stage', lambda s: s['last_seconds']),
+        ):
+            lines += [f"# HELP {p}_{name} {help_text}", f"# TYPE {p}_{name} {kind}"]
+            for key, stage in stages.items():
+                value = value_of(stage)
+                if value is not None:
+                    lines.append(f"{p}_{name}{self._labels(dict(key))} {value}")
+
+        # One TYPE line per metric family, followed by all of its label sets
+        for values, kind, suffix in ((counters, 'counter', '_total'), (gauges, 'gauge', '')):
+            family = None
+            for (name, key), value in sorted(values.items()):
+                if name != family:
+                    family = name
+                    lines.append(f"# TYPE {p}_{name}{suffix} {kind}")
+                lines.append(f"{p}_{name}{suffix}{self._labels(dict(key))} {value}")
+
+        peak = peak_rss_bytes()
+        if peak is not None:
+            lines += [f"# HELP {p}_peak_rss_bytes Peak resident set size of the process",
+                      f"# TYPE {p}_peak_rss_bytes gauge",
+                      f"{p}_peak_rss_bytes{self._labels({'run_id': metrics.run_id})} {peak}"]
+        return '\n'.join(lines) + '\n'
+
+    def flush(self, metrics):
+        text = self.render(metrics)
+        with self.lock:
+            partial = f"{self.path}.{os.getpid()}.tmp"
+            with open(partial, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(partial, self.path)
+
+class StackSampler:
+    """
+    py-spy-style sampling profiler for one thread: a background thread
+    records the target's Python stack every `interval` seconds, and the
+    counts are written as folded stacks (flamegraph.pl / speedscope input)
+    """
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def _run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def write(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+class StageTimer:
+    """Handle yielded by Metrics.timer; set `rows` (or add labels) inside the block"""
+
+    def __init__(self, stage, rows, labels):
+        self.stage = stage
+        self.rows = rows
+        self.labels = labels
+        self.seconds = None
+
+class Metrics:
+    """
+    Collects stage timings, counters and gauges for one run and forwards
+    each event to the configured sinks. Safe to use from several threads.
+    """
+
+    def __init__(self, sinks=None, profile=None, profile_stages=None, profile_dir=DEFAULT_PROFILE_DIR, run_id=None):
+        if profile not in (None, 'cprofile', 'sample'):
+            raise ValueError(f"Unknown profiler: {profile}")
+        self.sinks = list(sinks or [])
+        self.profile = profile
+        self.profile_stages = set(profile_stages) if profile_stages else None
+        self.profile_dir = profile_dir
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.lock = threading.Lock()
+        self.stages = defaultdict(lambda: {'runs': 0, 'errors': 0, 'seconds': 0.0, 'rows': 0,
+                                           'last_seconds': None, 'last_rows_per_sec': None})
+        self.counters = Counter()
+        self.gauges = {}
+        self.profile_count = 0
+        self.profiling = threading.local()
+        self.host = socket.gethostname()
+        self.closed = False
+
+    def _emit(self, event):
+        event = {'ts': round(time.time(), 3), 'run_id': self.run_id, 'host': self.host,
+                 'pid': os.getpid(), **event}
+        for sink in self.sinks:
+            try:
+                sink.write(event, self)
+            except Exception as e:
+                # Metrics must never take a pipeline run down
+                print(f"⚠️  Metrics sink {type(sink).__name__} failed: {e}", file=sys.stderr)
+
+    def _profiling(self, stage):
+        return self.profile and (self.profile_stages is None or stage in self.profile_stages)
+
+    @contextmanager
+    def _profiler(self, stage):
+        """Profile the block if profiling is on for this stage; yields the output path or None"""
+        # Nested stages (a batch inside a stage) are covered by the outer profile
+        if not self._profiling(stage) or getattr(self.profiling, 'active', False):
+            yield None
+            return
+        self.profiling.active = True
+
+        with self.lock:
+            self.profile_count += 1
+            number = self.profile_count
+        os.makedirs(self.profile_dir, exist_ok=True)
+        base = os.path.join(self.profile_dir, f"{stage}-{self.run_id}-{number}")
+
+        if self.profile == 'cprofile':
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield base + '.prof'
+            finally:
+                profiler.disable()
+                self.profiling.active = False
+                profiler.dump_stats(base + '.prof')
+        else:
+            sampler = StackSampler(threading.get_ident())
+            sampler.start()
+            try:
+                yield base + '.folded'
+            finally:
+                sampler.stop()
+                self.profiling.active = False
+                sampler.write(base + '.folded')
+
+    @contextmanager
+    def timer(self, stage, rows=None, **labels):
+        """
+        Time a block as one run of `stage`. Rows can be given up front or set
+        on the yielded handle once known; throughput and memory are recorded
+        when the block exits, also when it raises.
+        """
+        handle = StageTimer(stage, rows, labels)
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+        error = None
+        profile_path = None
+        try:
+            with self._profiler(stage) as profile_path:
+                yield handle
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            seconds = time.perf_counter() - started
+            handle.seconds = seconds
+            rows_per_sec = round(handle.rows / seconds, 1) if handle.rows and seconds > 0 else None
+
+            key = (('stage', stage), *sorted(handle.labels.items()))
+            with self.lock:
+                totals = self.stages[key]
+                totals['runs'] += 1
+                totals['errors'] += error is not None
+                totals['seconds'] += seconds
+                totals['rows'] += handle.rows or 0
+                totals['last_seconds'] = round(seconds, 6)
+                totals['last_rows_per_sec'] = rows_per_sec
+
+            self._emit({
+                'type': 'timer',
+                'stage': stage,
+                'labels': handle.labels,
+                'seconds': round(seconds, 6),
+                'cpu_seconds': round(time.process_time() - cpu_started, 6),
+                'rows': handle.rows,
+                'rows_per_sec': rows_per_sec,
+                'rss_bytes': current_rss_bytes(),
+                'peak_rss_bytes': peak_rss_bytes(),
+                'error': error,
+                'profile': profile_path,
+            })
+
+    def count(self, name, value=1, **labels):
+        """Add `value` to a counter"""
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] += value
+        self._emit({'type': 'counter', 'name': name, 'labels': labels, 'value': value})
+
+    def gauge(self, name, value, **labels):
+        """Record the current value of a gauge"""
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.gauges[key] = value
+        self._emit({'type': 'gauge', 'name': name, 'labels': labels, 'value': value})
+
+    def snapshot(self):
+        """Copies of the stage totals, counters and gauges"""
+        with self.lock:
+            return ({key: dict(totals) for key, totals in self.stages.items()},
+                    dict(self.counters), dict(self.gauges))
+
+    def summary(self):
+        """Per-stage totals: runs, seconds, rows and overall rows/sec"""
+        stages, _, _ = self.snapshot()
+        summary = []
+        for key, totals in stages.items():
+            labels = dict(key)
+            summary.append({
+                'stage': labels.pop('stage'),
+                'labels': labels,
+                'runs': totals['runs'],
+                'errors': totals['errors'],
+                'seconds': round(totals['seconds'], 4),
+                'rows': totals['rows'],
+                'rows_per_sec': round(totals['rows'] / totals['seconds'], 1) if totals['rows'] and totals['seconds'] else None,
+            })
+        return sorted(summary, key=lambda s: s['seconds'], reverse=True)
+
+    def close(self):
+        """Emit the run summary and close the sinks"""
+        if self.closed:
+            return
+        self.closed = True
+        if self.stages or self.counters:
+            self._emit({'type': 'summary', 'stages': self.summary(), 'peak_rss_bytes': peak_rss_bytes()})
+        for sink in self.sinks:
+            try:
+                sink.close(self)
+            except Exception as e:
+                print(f"⚠️  Metrics sink {type(sink).__name__} failed: {e}", file=sys.stderr)
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+def _build_metrics(jsonl_path=None, prometheus_path=None, profile=None, profile_stages=None,
+                   profile_dir=None, run_id=None):
+    sinks = []
+    if jsonl_path:
+        sinks.append(JsonLinesSink(jsonl_path))
+    if prometheus_path:
+        sinks.append(PrometheusTextfileSink(prometheus_path))
+    return Metrics(sinks, profile or None, profile_stages, profile_dir or DEFAULT_PROFILE_DIR, run_id)
+
+def configure(jsonl_path=None, prometheus_path=None, profile=None, profile_stages=None,
+              profile_dir=None, run_id=None):
+    """Replace the process-wide metrics with explicitly configured sinks and profiling"""
+    global _metrics
+    metrics = _build_metrics(jsonl_path, prometheus_path, profile, profile_stages, profile_dir, run_id)
+    with _metrics_lock:
+        previous, _metrics = _metrics, metrics
+    if previous is not None:
+        previous.close()
+    return metrics
+
+def get_metrics():
+    """Process-wide metrics, configured from the PIPELINE_* environment variables on first use"""
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                stages = os.getenv('PIPELINE_PROFILE_STAGES')
+                _metrics = _build_metrics(
+                    jsonl_path=os.getenv('PIPELINE_METRICS_JSONL'),
+                    prometheus_path=os.getenv('PIPELINE_METRICS_PROM'),
+                    profile=os.getenv('PIPELINE_PROFILE'),
+                    profile_stages=[s.strip() for s in stages.split(',') if s.strip()] if stages else None,
+                    profile_dir=os.getenv('PIPELINE_PROFILE_DIR'),
+                    run_id=os.getenv('PIPELINE_RUN_ID'),
+                )
+    return _metrics
+
+def timer(stage, rows=None, **labels):
+    """get_metrics().timer(...)"""
+    return get_metrics().timer(stage, rows, **labels)
+
+def count(name, value=1, **labels):
+    """get_metrics().count(...)"""
+    get_metrics().count(name, value, **labels)
+
+def gauge(name, value, **labels):
+    """get_metrics().gauge(...)"""
+    get_metrics().gauge(name, value, **labels)
+
+@atexit.register
+def _close_metrics():
+    if _metrics is not None:
+        _metrics.close()
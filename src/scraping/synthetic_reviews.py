@@ -0,0 +1,286 @@
+# Save as: src/scraping/synthetic_reviews.py
+"""
+Synthetic review generator
+Produces reproducible Play Store-style reviews in the Task 1 CSV layout for
+sample data and load tests: per-bank rating mixes, recency-weighted dates,
+short duplicated bodies and longer composed ones. Rows are built a chunk at a
+time with vectorized numpy, so tens of millions of reviews stream to Parquet,
+CSV or the database in bounded memory.
+"""
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+# Banks with their Play Store average rating; further banks are named
+# "Bank N" and drawn a rating from RATING_RANGE
+KNOWN_BANKS = [
+    ("Commercial Bank of Ethiopia", 4.2),
+    ("Bank of Abyssinia", 3.4),
+    ("Dashen Bank", 4.1),
+    ("Awash Bank", 3.9),
+    ("Abay Bank", 3.6),
+    ("Wegagen Bank", 3.3),
+]
+RATING_RANGE = (2.8, 4.4)
+
+# Star mixes for satisfied and frustrated user bases; each bank blends the two
+# to hit its average rating
+HIGH_MIX = np.array([0.02, 0.05, 0.13, 0.35, 0.45])
+LOW_MIX = np.array([0.25, 0.25, 0.20, 0.20, 0.10])
+
+# Short bodies that real stores repeat thousands of times, most common first
+SHORT_REVIEWS = {
+    'negative': ["Bad", "Not working", "Worst app", "Very bad app", "Useless",
+                 "It's not working", "Always crashing", "Poor service"],
+    'neutral': ["Ok", "Fair", "Not bad", "Average", "Good but slow",
+                "Needs improvement", "It's ok"],
+    'positive': ["Good", "Nice app", "Excellent", "Very good", "Best app",
+                 "Wow", "Good app", "Nice", "Great", "Amazing"],
+}
+
+# Sentences are prefix + feature + suffix, so the vocabulary combines into
+# many distinct bodies
+FEATURES = [
+    "transfer", "login", "app", "OTP", "balance check", "airtime top up",
+    "fingerprint login", "bill payment", "update", "customer support",
+    "account statement", "QR payment", "password reset", "notification", "UI",
+]
+SENTENCES = {
+    'negative': [
+        ("The ", " keeps failing."), ("", " crashes every time I open it."),
+        ("Since the last ", " nothing works."), ("", " is too slow, takes forever."),
+        ("I can't use the ", " at all."), ("Error on ", " again and again."),
+        ("Please fix the ", ", it is frustrating!"), ("Why does the ", " never work?"),
+        ("Money was deducted but the ", " failed."), ("The ", " stopped working after the update."),
+    ],
+    'neutral': [
+        ("The ", " works but could be better."), ("", " is okay most of the time."),
+        ("Sometimes the ", " is slow."), ("Please add more options to the ", "."),
+        ("The ", " needs improvement."), ("", " works fine, nothing special."),
+        ("Hope the next version improves the ", "."),
+    ],
+    'positive': [
+        ("The ", " is fast and reliable."), ("I love the ", "!"),
+        ("", " works perfectly."), ("Very easy ", ", thank you."),
+        ("The new ", " is great."), ("Best ", " of any bank in Ethiopia."),
+        ("", " is simple and convenient."), ("Smooth ", " every time."),
+        ("Really happy with the ", "."), ("Clean and intuitive ", "."),
+    ],
+}
+SENTIMENTS = ['negative', 'neutral', 'positive']
+
+# Sentences per composed review (1-6); most reviews are a line or two
+SENTENCE_COUNT_MIX = np.array([0.45, 0.25, 0.14, 0.08, 0.05, 0.03])
+
+# Share of reviews whose wording disagrees with the stars
+MISMATCH_RATE = 0.08
+
+APP_VERSIONS = np.array(["4.1.0", "4.2.3", "4.3.1", "5.0.0", "5.0.2", "5.1.0", "5.2.4"])
+
+COLUMNS = ['review', 'rating', 'date', 'bank', 'source', 'review_id', 'thumbs_up', 'app_version']
+
+DEFAULT_END_DATE = '2024-12-31'
+
+def make_banks(banks=3, seed=0):
+    """
+    Resolve `banks` (a count, or a list of names / (name, avg_rating) pairs)
+    into a list of (name, avg_rating)
+    """
+    if isinstance(banks, int):
+        rng = np.random.default_rng([seed, banks])
+        extra = rng.uniform(*RATING_RANGE, size=max(banks - len(KNOWN_BANKS), 0))
+        return KNOWN_BANKS[:banks] + [
+            (f"Bank {len(KNOWN_BANKS) + i + 1}", round(float(avg), 1)) for i, avg in enumerate(extra)
+        ]
+
+    known = dict(KNOWN_BANKS)
+    return [bank if isinstance(bank, tuple) else (bank, known.get(bank, 3.8)) for bank in banks]
+
+def rating_mixes(avg_ratings):
+    """One cumulative star distribution per bank, blended to the bank's average rating"""
+    high, low = (HIGH_MIX * np.arange(1, 6)).sum(), (LOW_MIX * np.arange(1, 6)).sum()
+    weight = np.clip((np.asarray(avg_ratings, dtype=float) - low) / (high - low), 0, 1)[:, None]
+    return np.cumsum(weight * HIGH_MIX + (1 - weight) * LOW_MIX, axis=1)
+
+def compose_texts(rng, sentiment, n):
+    """Vectorized bodies of 1-6 sentences in the given sentiment"""
+    prefixes = np.array([prefix for prefix, _ in SENTENCES[sentiment]], dtype=object)
+    suffixes = np.array([suffix for _, suffix in SENTENCES[sentiment]], dtype=object)
+    features = np.array(FEATURES, dtype=object)
+    openers = np.array([feature[:1].upper() + feature[1:] for feature in FEATURES], dtype=object)
+
+    counts = np.searchsorted(np.cumsum(SENTENCE_COUNT_MIX), rng.random(n), side='right') + 1
+    texts = np.full(n, '', dtype=object)
+    for position in range(len(SENTENCE_COUNT_MIX)):
+        sentence = rng.integers(len(prefixes), size=n)
+        feature = rng.integers(len(features), size=n)
+        # Capitalise sentences that open on the feature
+        feature = np.where(prefixes[sentence] == '', openers[feature], features[feature])
+        part = prefixes[sentence] + feature + suffixes[sentence]
+        separator = '' if position == 0 else ' '
+        texts = np.where(counts > position, texts + separator + part, texts)
+    return texts
+
+def generate_chunk(rng, banks, mixes, first, n, end_date, days, duplicate_rate, id_prefix, with_sentiment):
+    """Build rows first .. first + n - 1 of a corpus"""
+    bank = rng.integers(len(banks), size=n)
+    rating = np.minimum((rng.random(n)[:, None] > mixes[bank]).sum(axis=1), 4) + 1
+
+    # Stars set the wording, with some reviews saying one thing and rating another
+    sentiment = np.select([rating <= 2, rating == 3], [0, 1], 2)
+    mismatched = rng.random(n) < MISMATCH_RATE
+    sentiment = np.where(mismatched, rng.integers(3, size=n), sentiment)
+
+    texts = np.empty(n, dtype=object)
+    duplicated = rng.random(n) < duplicate_rate
+    for code, name in enumerate(SENTIMENTS):
+        short = np.array(SHORT_REVIEWS[name], dtype=object)
+        # Zipf-like popularity: "Good" is far more common than "Amazing"
+        popularity = 1 / np.arange(1, len(short) + 1)
+        rows = np.flatnonzero(duplicated & (sentiment == code))
+        texts[rows] = short[rng.choice(len(short), size=len(rows), p=popularity / popularity.sum())]
+        rows = np.flatnonzero(~duplicated & (sentiment == code))
+        texts[rows] = compose_texts(rng, name, len(rows))
+
+    # Recent reviews are more common; ages beyond the window wrap back into it
+    age = np.floor(rng.exponential(days / 3, size=n)).astype(np.int64) % days
+    dates = (np.datetime64(end_date, 'D') - age).astype(str)
+
+    names = np.array([name for name, _ in banks], dtype=object)
+    df = pd.DataFrame({
+        'review': texts,
+        'rating': rating,
+        'date': dates,
+        'bank': names[bank],
+        'source': 'Google Play Store',
+        'review_id': id_prefix + pd.Series(np.arange(first, first + n)).astype(str),
+        'thumbs_up': rng.geometric(0.6, size=n) - 1,
+        'app_version': APP_VERSIONS[rng.integers(len(APP_VERSIONS), size=n)],
+    })
+
+    if with_sentiment:
+        # Labels follow the wording, scores its confidence
+        df['sentiment_label'] = np.array(SENTIMENTS, dtype=object)[sentiment]
+        confidence = rng.uniform(0.55, 1.0, size=n)
+        df['sentiment_score'] = np.round(np.select(
+            [sentiment == 0, sentiment == 1], [1 - confidence, rng.uniform(0.4, 0.6, size=n)], confidence
+        ), 4)
+    return df
+
+def iter_reviews(rows, banks=3, seed=0, chunk_size=500000, end_date=DEFAULT_END_DATE, days=365,
+                 duplicate_rate=0.3, id_prefix=None, with_sentiment=False):
+    """
+    Yield `rows` synthetic reviews as DataFrames of up to `chunk_size` rows.
+    The same arguments always produce the same rows; each chunk draws from
+    its own seed, so chunks can be regenerated independently.
+    """
+    banks = make_banks(banks, seed)
+    mixes = rating_mixes([avg for _, avg in banks])
+    if id_prefix is None:
+        id_prefix = f"synthetic:{seed}:"
+
+    for index, first in enumerate(range(0, rows, chunk_size)):
+        rng = np.random.default_rng([seed, index])
+        n = min(chunk_size, rows - first)
+        yield generate_chunk(rng, banks, mixes, first, n, end_date, days, duplicate_rate, id_prefix, with_sentiment)
+
+def generate_reviews(rows, banks=3, seed=0, **kwargs):
+    """`rows` synthetic reviews as one DataFrame (see iter_reviews for the options)"""
+    chunks = list(iter_reviews(rows, banks, seed, **kwargs))
+    if not chunks:
+        return pd.DataFrame(columns=COLUMNS)
+    return pd.concat(chunks, ignore_index=True)
+
+def write_reviews(path, rows, banks=3, seed=0, **kwargs):
+    """
+    Stream synthetic reviews to a .parquet or .csv file chunk by chunk.
+    Returns the number of rows written.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    written = 0
+
+    if path.endswith('.parquet'):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            for chunk in iter_reviews(rows, banks, seed, **kwargs):
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+                written += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        for chunk in iter_reviews(rows, banks, seed, **kwargs):
+            chunk.to_csv(path, mode='w' if written == 0 else 'a', header=written == 0,
+                         index=False, encoding='utf-8')
+            written += len(chunk)
+
+    return written
+
+def load_reviews(rows, banks=3, seed=0, db_pool=None, **kwargs):
+    """
+    Stream synthetic reviews (with sentiment) into the database, one bulk load
+    per chunk so each transaction stays bounded.
+    Returns the summed bulk load counts.
+    """
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database'))
+    from bulk_load import bulk_load_reviews
+    from db_pool import get_pool
+    from partitioning import ensure_partitions_if_partitioned
+
+    kwargs.setdefault('with_sentiment', True)
+    totals = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0}
+    with (db_pool or get_pool()).connection() as conn:
+        ensure_partitions_if_partitioned(conn)
+        for chunk in iter_reviews(rows, banks, seed, **kwargs):
+            counts = bulk_load_reviews(conn, chunk)
+            for key in totals:
+                totals[key] += counts[key]
+    return totals
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate reproducible synthetic bank app reviews")
+    parser.add_argument('--rows', type=int, default=100000, help="reviews to generate")
+    parser.add_argument('--banks', type=int, default=3, help="number of banks (the first six are real Ethiopian banks)")
+    parser.add_argument('--seed', type=int, default=0, help="random seed; the same seed gives the same rows")
+    parser.add_argument('--end-date', default=DEFAULT_END_DATE, help="latest review date (YYYY-MM-DD)")
+    parser.add_argument('--days', type=int, default=365, help="date span ending at --end-date")
+    parser.add_argument('--duplicate-rate', type=float, default=0.3, help="share of short, repeated bodies")
+    parser.add_argument('--chunk-size', type=int, default=500000, help="rows generated per chunk")
+    parser.add_argument('--with-sentiment', action='store_true', help="add sentiment_label / sentiment_score columns")
+    parser.add_argument('--output', help="write to this .parquet or .csv file")
+    parser.add_argument('--db', action='store_true', help="bulk load into the configured database")
+    args = parser.parse_args()
+
+    if not args.output and not args.db:
+        parser.error("give --output and/or --db")
+
+    options = {
+        'chunk_size': args.chunk_size, 'end_date': args.end_date, 'days': args.days,
+        'duplicate_rate': args.duplicate_rate,
+    }
+
+    if args.output:
+        started = time.time()
+        written = write_reviews(args.output, args.rows, args.banks, args.seed,
+                                with_sentiment=args.with_sentiment, **options)
+        print(f"💾 Wrote {written:,} reviews to {args.output} in {time.time() - started:.1f}s")
+
+    if args.db:
+        started = time.time()
+        counts = load_reviews(args.rows, args.banks, args.seed, **options)
+        print(f"✅ Loaded {counts['inserted']:,} reviews ({counts['updated']:,} updated, "
+              f"{counts['unchanged']:,} unchanged, {counts['skipped']:,} skipped) "
+              f"in {time.time() - started:.1f}s")
+
+if __name__ == "__main__":
+    main()
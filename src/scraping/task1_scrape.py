@@ -9,6 +9,10 @@ import pandas as pd
 import time
 from datetime import datetime
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'monitoring'))
+import pipeline_metrics as metrics
 
 # APP IDs - UPDATE IF THE SEARCH GIVES DIFFERENT ONES
 BANK_APPS = {
@@ -43,6 +47,8 @@ def scrape_bank_reviews(bank_name, app_id, count=400):
                         continuation_token=continuation_token
                     )
                     
+                    metrics.count('scrape_requests', bank=bank_name, country=country)
+                    
                     if not batch:
                         print(f"    No more reviews in {country}")
                         break
@@ -79,6 +85,7 @@ def scrape_bank_reviews(bank_name, app_id, count=400):
                     
             except Exception as e:
                 print(f"  ❌ Error with {country}: {e}")
+                metrics.count('scrape_errors', bank=bank_name, country=country)
                 continue
         
         return pd.DataFrame(all_reviews)
@@ -94,31 +101,38 @@ def clean_data(df):
     if df.empty:
         return df
     
-    # Make a copy
-    df_clean = df.copy()
+    with metrics.timer('clean', rows=len(df)):
+        # Make a copy
+        df_clean = df.copy()
+    
+        # 1. Remove duplicates
+        initial_count = len(df_clean)
+        df_clean = df_clean.drop_duplicates(subset=['review_id', 'review'])
+        print(f"  Removed {initial_count - len(df_clean)} duplicates")
+        metrics.count('clean_duplicates_removed', initial_count - len(df_clean))
     
-    # 1. Remove duplicates
-    initial_count = len(df_clean)
-    df_clean = df_clean.drop_duplicates(subset=['review_id', 'review'])
-    print(f"  Removed {initial_count - len(df_clean)} duplicates")
+        # 2. Handle missing values
+        df_clean = df_clean.dropna(subset=['review', 'rating', 'date'])
     
-    # 2. Handle missing values
-    df_clean = df_clean.dropna(subset=['review', 'rating', 'date'])
+        # Keep the Play Store review ID as the natural key for database upserts
+        if 'review_id' not in df_clean.columns:
+            df_clean['review_id'] = ''
+        df_clean['review_id'] = df_clean['review_id'].fillna('').astype(str)
     
-    # 3. Normalize dates to YYYY-MM-DD
-    df_clean['date'] = pd.to_datetime(df_clean['date'], errors='coerce')
-    df_clean = df_clean.dropna(subset=['date'])  # Remove invalid dates
-    df_clean['date'] = df_clean['date'].dt.strftime('%Y-%m-%d')
+        # 3. Normalize dates to YYYY-MM-DD
+        df_clean['date'] = pd.to_datetime(df_clean['date'], errors='coerce')
+        df_clean = df_clean.dropna(subset=['date'])  # Remove invalid dates
+        df_clean['date'] = df_clean['date'].dt.strftime('%Y-%m-%d')
     
-    # 4. Filter valid ratings (1-5 stars)
-    df_clean = df_clean[df_clean['rating'].between(1, 5)]
+        # 4. Filter valid ratings (1-5 stars)
+        df_clean = df_clean[df_clean['rating'].between(1, 5)]
     
-    # 5. Select only required columns
-    df_clean = df_clean[['review', 'rating', 'date', 'bank', 'source']]
+        # 5. Select only required columns (plus the external review ID)
+        df_clean = df_clean[['review', 'rating', 'date', 'bank', 'source', 'review_id']]
     
-    print(f"  Final clean reviews: {len(df_clean)}")
+        print(f"  Final clean reviews: {len(df_clean)}")
     
-    return df_clean
+        return df_clean
 
 def save_data(df, filename='../../data/raw/reviews.csv'):
     """Save data to CSV"""
@@ -154,7 +168,9 @@ def main():
         print(f"App ID: {app_id}")
         
         # Scrape
-        df_raw = scrape_bank_reviews(bank_name, app_id, 400)
+        with metrics.timer('scrape', bank=bank_name) as stage:
+            df_raw = scrape_bank_reviews(bank_name, app_id, 400)
+            stage.rows = len(df_raw)
         
         if not df_raw.empty:
             # Clean
@@ -214,56 +230,11 @@ def main():
 
 def create_sample_data():
     """Create sample data if scraping fails - meets requirements"""
-    import numpy as np
-    
-    banks = [
-        ("Commercial Bank of Ethiopia", 4.2, 450),
-        ("Bank of Abyssinia", 3.4, 450),
-        ("Dashen Bank", 4.1, 450)
-    ]
-    
-    data = []
-    for bank_name, avg_rating, count in banks:
-        # Generate ratings based on given averages
-        if avg_rating >= 4.0:
-            ratings = np.random.choice([1, 2, 3, 4, 5], count, p=[0.02, 0.05, 0.13, 0.35, 0.45])
-        elif avg_rating >= 3.5:
-            ratings = np.random.choice([1, 2, 3, 4, 5], count, p=[0.10, 0.15, 0.25, 0.30, 0.20])
-        else:
-            ratings = np.random.choice([1, 2, 3, 4, 5], count, p=[0.25, 0.25, 0.20, 0.20, 0.10])
-        
-        for i in range(count):
-            # Generate date (last year)
-            date = datetime.now() - pd.Timedelta(days=np.random.randint(0, 365))
-            
-            # Review text based on scenarios in document
-            rating = ratings[i]
-            if rating <= 2:
-                review = np.random.choice([
-                    "App crashes during transfers. Very frustrating!",
-                    "Slow loading times, takes forever to open",
-                    "Login errors every time I try to access my account",
-                    "Customer support never responds in the app"
-                ])
-            elif rating == 3:
-                review = "App works but could be better. Needs improvement."
-            else:
-                review = np.random.choice([
-                    "Great app! Easy to use and reliable",
-                    "Fast transactions, very convenient banking",
-                    "Best mobile banking app in Ethiopia",
-                    "User interface is clean and intuitive"
-                ])
-            
-            data.append({
-                'review': review,
-                'rating': int(rating),
-                'date': date.strftime('%Y-%m-%d'),
-                'bank': bank_name,
-                'source': 'Google Play Store'
-            })
+    from synthetic_reviews import generate_reviews
     
-    df = pd.DataFrame(data)
+    # About 450 reviews per bank, dated over the last year
+    df = generate_reviews(1350, banks=3, seed=42, end_date=datetime.now().strftime('%Y-%m-%d'))
+    df = df[['review', 'rating', 'date', 'bank', 'source', 'review_id', 'thumbs_up']]
     save_data(df, 'data/reviews.csv')
     
     print(f"✅ Created sample data with {len(df)} reviews")